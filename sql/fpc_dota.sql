@@ -47,8 +47,19 @@ CREATE TABLE
         match_id BIGINT NOT NULL,
         friend_id INTEGER NOT NULL,
         hero_id INT NOT NULL,
-        player_name TEXT --currently only used for logs so we don't double JOIN
+        player_name TEXT, --currently only used for logs so we don't double JOIN
+        -- post-match edit queue, see `utils.base_fpc.EditQueue`
+        attempts INT NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW (),
+        last_error TEXT
     );
 
+ALTER TABLE dota_messages
+ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW (),
+ADD COLUMN IF NOT EXISTS last_error TEXT;
+
+CREATE INDEX IF NOT EXISTS dota_messages_next_attempt_at_idx ON dota_messages (next_attempt_at);
+
 CREATE TABLE
     IF NOT EXISTS dota_heroes_info (id INT PRIMARY KEY, emote TEXT);
@@ -50,8 +50,19 @@ CREATE TABLE
         channel_id BIGINT NOT NULL,
         match_id BIGINT NOT NULL,
         platform TEXT NOT NULL,
-        champion_id INTEGER NOT NULL
+        champion_id INTEGER NOT NULL,
+        -- post-match edit queue, see `utils.base_fpc.EditQueue`
+        attempts INT NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW (),
+        last_error TEXT
     );
 
+ALTER TABLE lol_messages
+ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW (),
+ADD COLUMN IF NOT EXISTS last_error TEXT;
+
+CREATE INDEX IF NOT EXISTS lol_messages_next_attempt_at_idx ON lol_messages (next_attempt_at);
+
 CREATE TABLE
     IF NOT EXISTS lol_champions_info (id INT PRIMARY KEY, emote TEXT);
\ No newline at end of file
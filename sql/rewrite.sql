@@ -29,6 +29,24 @@ CREATE TABLE
         data JSONB DEFAULT ('{}'::jsonb)
     );
 
+CREATE INDEX IF NOT EXISTS timers_expires_at_idx ON timers (expires_at);
+
+-- notify `TimerManager` about inserts/deletes from any writer, see `bot.timer_manager`
+CREATE OR REPLACE FUNCTION timers_notify () RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('timers', json_build_object('op', TG_OP, 'id', OLD.id)::text);
+        RETURN OLD;
+    END IF;
+    PERFORM pg_notify('timers', json_build_object('op', TG_OP, 'id', NEW.id, 'expires_at', NEW.expires_at)::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER timers_notify_trigger
+AFTER INSERT OR UPDATE OR DELETE ON timers
+FOR EACH ROW EXECUTE FUNCTION timers_notify ();
+
 CREATE TABLE
     IF NOT EXISTS user_settings (
         id BIGINT PRIMARY KEY, -- The discord user ID
@@ -49,19 +67,68 @@ CREATE INDEX IF NOT EXISTS emote_stats_total_emote_id_idx ON emote_stats_total (
 
 CREATE UNIQUE INDEX IF NOT EXISTS emote_stats_total_uniq_idx ON emote_stats_total (guild_id, emote_id);
 
+-- raw emote usages, partitioned by month so the clean up can drop whole partitions, see `ext.community.emote_stats`
 CREATE TABLE
-    IF NOT EXISTS emote_stats_last_year (
-        id BIGSERIAL PRIMARY KEY,
+    IF NOT EXISTS emote_stats_usages (
         emote_id BIGINT,
         guild_id BIGINT,
         author_id BIGINT,
-        used TIMESTAMP
+        used TIMESTAMP NOT NULL
+    )
+PARTITION BY
+    RANGE (used);
+
+CREATE INDEX IF NOT EXISTS emote_stats_usages_guild_id_emote_id_idx ON emote_stats_usages (guild_id, emote_id);
+
+CREATE INDEX IF NOT EXISTS emote_stats_usages_author_id_idx ON emote_stats_usages (author_id);
+
+CREATE OR REPLACE FUNCTION emote_stats_create_partition (month DATE) RETURNS VOID AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month)::date;
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF emote_stats_usages FOR VALUES FROM (%L) TO (%L)',
+        'emote_stats_usages_' || to_char(start_date, 'YYYY_MM'),
+        start_date,
+        (start_date + INTERVAL '1 month')::date
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- per-day rollups maintained incrementally on every ingest so stats commands don't scan raw usages
+CREATE TABLE
+    IF NOT EXISTS emote_stats_daily (
+        guild_id BIGINT NOT NULL,
+        emote_id BIGINT NOT NULL,
+        day DATE NOT NULL,
+        total INTEGER NOT NULL DEFAULT (0),
+        PRIMARY KEY (guild_id, day, emote_id)
     );
 
-CREATE INDEX IF NOT EXISTS emote_stats_last_year_emote_id_idx ON emote_stats_last_year (emote_id);
+-- migration from the old non-partitioned `emote_stats_last_year` table
+DO $$
+DECLARE
+    month DATE;
+BEGIN
+    IF to_regclass('emote_stats_last_year') IS NOT NULL THEN
+        FOR month IN
+            SELECT DISTINCT date_trunc('month', used)::date FROM emote_stats_last_year WHERE used IS NOT NULL
+        LOOP
+            PERFORM emote_stats_create_partition (month);
+        END LOOP;
 
-CREATE INDEX IF NOT EXISTS emote_stats_last_year_guild_id_idx ON emote_stats_last_year (guild_id);
+        INSERT INTO emote_stats_usages (emote_id, guild_id, author_id, used)
+            SELECT emote_id, guild_id, author_id, used FROM emote_stats_last_year WHERE used IS NOT NULL;
 
-CREATE INDEX IF NOT EXISTS emote_stats_last_year_author_id_idx ON emote_stats_last_year (author_id);
+        INSERT INTO emote_stats_daily (guild_id, emote_id, day, total)
+            SELECT guild_id, emote_id, used::date, COUNT(*)
+            FROM emote_stats_last_year
+            WHERE used IS NOT NULL AND guild_id IS NOT NULL AND emote_id IS NOT NULL
+            GROUP BY guild_id, emote_id, used::date
+        ON CONFLICT (guild_id, day, emote_id) DO UPDATE
+        SET total = emote_stats_daily.total + excluded.total;
 
-CREATE INDEX IF NOT EXISTS emote_stats_last_year_used_idx ON emote_stats_last_year (used);
\ No newline at end of file
+        DROP TABLE emote_stats_last_year;
+    END IF;
+END;
+$$;
\ No newline at end of file
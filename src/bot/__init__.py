@@ -1,4 +1,5 @@
 from .bases import *
 from .bot import *
 from .logs import *
+from .message_router import *
 from .timer_manager import *
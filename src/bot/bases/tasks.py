@@ -1,7 +1,24 @@
+"""Tasks.
+
+`AluLoop` - my subclass of `discord.ext.tasks.Loop` with `exc_manager` error handling and built-in telemetry.
+
+Every iteration of every `@aluloop` task is timed and recorded into `bot.task_telemetry`:
+duration histogram, failures, overruns (an iteration took longer than the loop interval)
+and skipped iterations (`tasks.Loop` doesn't catch up after an overrun, it just starts the next one immediately,
+so every whole interval an iteration took is a scheduled run that never happened).
+Besides, `TaskTelemetry` samples the event loop lag and blames loops that were running during lag spikes.
+This way it's visible which of 59-seconds or 5-minutes loops is starving the others.
+"""
+
 from __future__ import annotations
 
+import asyncio
+import datetime
+import functools
 import logging
+import time
 from collections.abc import Callable, Coroutine, Sequence
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any, Protocol, TypeVar, override
 
 import discord
@@ -11,8 +28,6 @@ from discord.utils import MISSING
 from utils import fmt
 
 if TYPE_CHECKING:
-    import datetime
-
     from ..bot import AluBot
 
     class HasBotAttribute(Protocol):
@@ -21,11 +36,243 @@ if TYPE_CHECKING:
 
 log = logging.getLogger(__name__)
 
-__all__ = ("aluloop",)
+__all__ = (
+    "LoopStats",
+    "TaskTelemetry",
+    "aluloop",
+)
 
 _func = Callable[..., Coroutine[Any, Any, Any]]
 LF = TypeVar("LF", bound=_func)
 
+TASK_DURATION_BUCKETS: tuple[float, ...] = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0)
+"""Upper bounds (in seconds) of iteration duration histogram buckets. The last implicit bucket is `+inf`."""
+
+EVENT_LOOP_LAG_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+"""Upper bounds (in seconds) of event loop lag histogram buckets. The last implicit bucket is `+inf`."""
+
+LAG_SAMPLE_INTERVAL = 0.5
+"""How often (in seconds) the event loop lag sampler wakes up."""
+
+LAG_SPIKE_THRESHOLD = 0.1
+"""Lag (in seconds) from which loops running at the moment get blamed for it."""
+
+WARNING_COOLDOWN = 3600.0
+"""Seconds between overrun/lag warnings about the same loop so a struggling task doesn't flood #logger."""
+
+
+@dataclass(slots=True)
+class Histogram:
+    """Fixed-bucket histogram."""
+
+    bounds: tuple[float, ...]
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    buckets: list[int] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.buckets = [0] * (len(self.bounds) + 1)
+
+    def record(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / (self.count or 1)
+
+    def percentile(self, q: float) -> float:
+        """Approximate `q`-percentile as the upper bound of the bucket it falls into."""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.buckets, strict=False):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max
+
+
+@dataclass(slots=True)
+class LoopStats:
+    """Telemetry of a single `@aluloop` task.
+
+    Attributes
+    ----------
+    name: str
+        `Class.method` of the task.
+    interval: float | None
+        Interval of the loop (in seconds). `None` for loops running at explicit times and for `count=1` ones.
+    durations: Histogram
+        Iteration durations.
+    failures: int
+        Iterations that raised.
+    overruns: int
+        Iterations that took longer than `interval`.
+    skipped: int
+        Scheduled iterations that didn't happen because the previous iteration was still running.
+    lag_blamed: float
+        Total event loop lag (in seconds) measured during lag spikes while this task was running.
+    """
+
+    name: str
+    interval: float | None = None
+    durations: Histogram = field(default_factory=lambda: Histogram(TASK_DURATION_BUCKETS))
+    failures: int = 0
+    overruns: int = 0
+    skipped: int = 0
+    lag_blamed: float = 0.0
+
+    def record(self, elapsed: float, *, failed: bool) -> bool:
+        """Record an iteration. Returns whether it was an overrun."""
+        self.durations.record(elapsed)
+        self.failures += failed
+        if self.interval and elapsed > self.interval:
+            self.overruns += 1
+            self.skipped += int(elapsed // self.interval)
+            return True
+        return False
+
+
+class TaskTelemetry:
+    """Telemetry of `@aluloop` tasks and the event loop, available as `bot.task_telemetry`.
+
+    Attributes
+    ----------
+    loops: dict[str, LoopStats]
+        Stats of every task that has run at least once, keyed by `Class.method`.
+    lag: Histogram
+        Event loop lag samples: how much later than requested the sampler woke up.
+    running: dict[str, float]
+        Tasks with an iteration in progress mapped to the `perf_counter` time it started.
+    finished_at: dict[str, float]
+        Tasks mapped to the `perf_counter` time their last iteration finished.
+    started_at: datetime.datetime
+        When the stats started to accumulate.
+    """
+
+    def __init__(self) -> None:
+        self.loops: dict[str, LoopStats] = {}
+        self.lag: Histogram = Histogram(EVENT_LOOP_LAG_BUCKETS)
+        self.running: dict[str, float] = {}
+        self.finished_at: dict[str, float] = {}
+        self.started_at: datetime.datetime = datetime.datetime.now(datetime.UTC)
+        self._warned_at: dict[str, float] = {}
+        self._lag_task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start the event loop lag sampler."""
+        if self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._sample_lag(), name="aluloop-lag-sampler")
+
+    def stop(self) -> None:
+        """Stop the event loop lag sampler."""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+
+    def reset(self) -> None:
+        """Forget all collected stats, i.e. after sending a digest."""
+        self.loops.clear()
+        self.lag = Histogram(EVENT_LOOP_LAG_BUCKETS)
+        self.started_at = datetime.datetime.now(datetime.UTC)
+
+    def top(self, n: int = 5, *, key: Callable[[LoopStats], float] = lambda s: s.durations.total) -> list[LoopStats]:
+        """Get `n` tasks dominating by `key`, total time spent by default."""
+        return sorted(self.loops.values(), key=key, reverse=True)[:n]
+
+    def _should_warn(self, key: str) -> bool:
+        now = time.monotonic()
+        if now - self._warned_at.get(key, -WARNING_COOLDOWN) >= WARNING_COOLDOWN:
+            self._warned_at[key] = now
+            return True
+        return False
+
+    def iteration_started(self, name: str, interval: float | None) -> tuple[LoopStats, float]:
+        """Mark the task as running. Returns its stats and `perf_counter` time of the start."""
+        try:
+            stats = self.loops[name]
+        except KeyError:
+            stats = self.loops[name] = LoopStats(name)
+        # `change_interval` can be called at any time, so always take the current one
+        stats.interval = interval
+        start = self.running[name] = time.perf_counter()
+        return stats, start
+
+    def iteration_finished(self, stats: LoopStats, start: float, *, failed: bool) -> None:
+        """Record the finished iteration and warn about an overrun."""
+        self.running.pop(stats.name, None)
+        end = self.finished_at[stats.name] = time.perf_counter()
+        elapsed = end - start
+        if stats.record(elapsed, failed=failed) and self._should_warn(f"overrun:{stats.name}"):
+            log.warning(
+                "Task `%s` overran its %gs interval: the iteration took %.1fs (%s skipped so far).",
+                stats.name,
+                stats.interval,
+                elapsed,
+                stats.skipped,
+            )
+
+    async def _sample_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            window_start = time.perf_counter()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            lag = max(loop.time() - start - LAG_SAMPLE_INTERVAL, 0.0)
+            self.lag.record(lag)
+            if lag < LAG_SPIKE_THRESHOLD:
+                continue
+
+            # a task blocking the loop with sync code has usually finished by the time the sampler wakes up,
+            # so blame every task that was running at any point during the sample window
+            suspects = [*self.running, *(name for name, end in self.finished_at.items() if end >= window_start)]
+            for name in dict.fromkeys(suspects):
+                if (stats := self.loops.get(name)) is not None:  # `reset` could have happened mid-iteration
+                    stats.lag_blamed += lag
+            if lag >= 1.0 and self._should_warn("lag"):
+                blamed = ", ".join(f"`{name}`" for name in dict.fromkeys(suspects)) or "no aluloop tasks"
+                log.warning("Event loop was blocked for %.2fs while running: %s.", lag, blamed)
+
+
+def _relative_interval(loop: tasks.Loop[Any]) -> float | None:
+    """Interval of the loop in seconds, `None` if the loop runs at explicit times."""
+    if loop.time is not None:
+        return None
+    return (loop.hours or 0) * 3600 + (loop.minutes or 0) * 60 + (loop.seconds or 0) or None
+
+
+def _instrument(coro: LF) -> LF:
+    """Wrap the task coroutine so every iteration is recorded into `bot.task_telemetry`.
+
+    The wrapper becomes the coroutine of the loop, so it survives `tasks.Loop.__get__`
+    making a copy of the loop for every instance it's accessed on.
+    """
+
+    @functools.wraps(coro)
+    async def instrumented(owner: HasBotAttribute, *args: Any, **kwargs: Any) -> Any:
+        loop = getattr(owner, coro.__name__, None)
+        interval = _relative_interval(loop) if isinstance(loop, tasks.Loop) and loop.count is None else None
+
+        telemetry = owner.bot.task_telemetry
+        stats, start = telemetry.iteration_started(f"{type(owner).__qualname__}.{coro.__name__}", interval)
+        failed = True
+        try:
+            result = await coro(owner, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            telemetry.iteration_finished(stats, start, failed=failed)
+
+    return instrumented  # pyright: ignore[reportReturnType]
+
 
 class AluLoop(tasks.Loop[LF]):
     """My subclass for discord.ext.tasks.Loop.
@@ -38,6 +285,7 @@ class AluLoop(tasks.Loop[LF]):
         such as AluCog, KeysCache, etc, because for convenience my function signatures are
         `(self, cog: AluCog, *_: Any)` where `AluCog` is a fake type (the only thing that matters is that it has `.bot`)
     * Thankfully, there is no real need to use tasks outside of cogs.
+    * Iterations are recorded into `bot.task_telemetry`, see `TaskTelemetry`.
 
     """
 
@@ -53,7 +301,7 @@ class AluLoop(tasks.Loop[LF]):
         *,
         reconnect: bool,
     ) -> None:
-        super().__init__(coro, seconds, hours, minutes, time, count, reconnect, name)
+        super().__init__(_instrument(coro), seconds, hours, minutes, time, count, reconnect, name)
         self._before_loop = self._base_before_loop
 
     async def _base_before_loop(self, cog: HasBotAttribute) -> None:  # *args: Any
@@ -13,12 +13,16 @@ from discord.ext import commands
 from bot import AluContext
 from config import config
 from ext import get_extensions
-from utils import cache, const, disambiguator, errors, fmt, helpers, transposer
+from utils import cache, const, disambiguator, errors, fmt, helpers, renderer, transposer
 
+from .bases.tasks import TaskTelemetry
 from .exc_manager import ExceptionManager
+from .instrumented_pool import InstrumentedPool
 from .intents_perms import INTENTS, PERMISSIONS
+from .message_router import MessageRouter
 from .timer_manager import TimerManager
 from .tree import AluAppCommandTree
+from .webhook_registry import WebhookRegistry
 
 if TYPE_CHECKING:
     from collections.abc import MutableMapping
@@ -52,7 +56,13 @@ class AluBot(commands.Bot):
         user: discord.ClientUser
 
     def __init__(
-        self, *, test: bool = False, token: str, session: ClientSession, pool: asyncpg.Pool[asyncpg.Record]
+        self,
+        *,
+        test: bool = False,
+        token: str,
+        session: ClientSession,
+        pool: asyncpg.Pool[asyncpg.Record],
+        prepared_pool: asyncpg.Pool[asyncpg.Record] | None = None,
     ) -> None:
         """Initialize the AluBot.
 
@@ -65,6 +75,8 @@ class AluBot(commands.Bot):
             aiohttp.ClientSession to use within the bot.
         pool: asyncpg.Pool[asyncpg.Record]
             A connection pool to the database.
+        prepared_pool: asyncpg.Pool[asyncpg.Record] | None = None
+            A small connection pool with statement cache for queries made with `prepared=True`.
 
         """
         self.test: bool = test
@@ -86,11 +98,22 @@ class AluBot(commands.Bot):
         )
         self.extensions_to_load: tuple[str, ...] = get_extensions(test=self.test)
         # asyncpg typehinting crutch, read `utils.database` for more
-        self.pool: PoolTypedWithAny = pool  # pyright:ignore[reportAttributeAccessIssue]
+        instrumented_pool = InstrumentedPool(pool, prepared_pool=prepared_pool)
+        self.pool: PoolTypedWithAny = instrumented_pool  # pyright:ignore[reportAttributeAccessIssue]
         self.session: ClientSession = session
 
         self.exc_manager: ExceptionManager = ExceptionManager(self)
+        self.webhook_registry: WebhookRegistry = WebhookRegistry(self)
+        self.message_router: MessageRouter = MessageRouter(self)
+        self.task_telemetry: TaskTelemetry = TaskTelemetry()
         self.transposer: transposer.TransposeClient = transposer.TransposeClient(session=session)
+        renderer_config = config.get("RENDERER", {"BACKEND": "thread"})
+        self.renderer: renderer.RenderExecutor = renderer.RenderExecutor(
+            renderer_config["BACKEND"],
+            max_workers=renderer_config.get("WORKERS"),
+            # modules with image builders, so the worker processes import them before the first job
+            preload=("ext.dota.fpc.models", "ext.lol.fpc.models", "ext.community.levels", "ext.community.welcome"),
+        )
         self.disambiguator: disambiguator.Disambiguator = disambiguator.Disambiguator()
 
         self.repository_url: str = "https://github.com/Aluerie/AluBot"
@@ -105,6 +128,9 @@ class AluBot(commands.Bot):
     @override
     async def setup_hook(self) -> None:
         self.bot_app_info: discord.AppInfo = await self.application_info()
+        self.renderer_warm_up_task: asyncio.Task[None] = self.loop.create_task(self.warm_up_renderer())
+        self.task_telemetry.start()
+        await self.webhook_registry.warm_up()
 
         failed_to_load_some_ext = False
         for ext in self.extensions_to_load:
@@ -121,6 +147,9 @@ class AluBot(commands.Bot):
         # but let's keep its methods nearby in AluBot namespace
         # needs to be done after cogs are loaded so all cog event listeners are ready
         self.timers = TimerManager(bot=self)
+        # a dedicated connection for LISTEN/NOTIFY, it has to stay acquired for notifications to arrive
+        self.listener_connection = await self.pool.acquire()  # pyright: ignore[reportAttributeAccessIssue]
+        await self.timers.start_listening()
 
         if self.test:
             if failed_to_load_some_ext:
@@ -128,6 +157,16 @@ class AluBot(commands.Bot):
             else:
                 self.loop.create_task(self.try_hideout_auto_sync_with_logging())
 
+    async def warm_up_renderer(self) -> None:
+        """Helper function to warm up render workers in the background and report if it fails."""
+        try:
+            await self.renderer.warm_up()
+        except Exception as error:  # noqa: BLE001
+            embed = discord.Embed(color=0xDA9F93, description="Failed to warm up render workers.").set_footer(
+                text="setup_hook: renderer.warm_up"
+            )
+            await self.exc_manager.register_error(error, embed)
+
     async def try_hideout_auto_sync_with_logging(self) -> None:
         """Helper function to wrap `try_hideout_auto_sync` `into try/except` block with some logging."""
         try:
@@ -252,6 +291,7 @@ class AluBot(commands.Bot):
 
             self.twitch = AluTwitchClient(self)  # pyright: ignore[reportUninitializedInstanceVariable]
             await self.twitch.login()
+            self.twitch.live_streams.start()
 
     def instantiate_tz_manager(self) -> None:
         """Instantiate TimeZone Manager."""
@@ -267,15 +307,23 @@ class AluBot(commands.Bot):
         if not self.test:
             await self.send_warning("AluBot is closing.")
 
-        await self.pool.close()
         if hasattr(self, "twitch"):
             await self.twitch.close()
         if hasattr(self, "dota"):
             await self.dota.close()
         if hasattr(self, "lol"):
             await self.lol.close()
+        self.renderer.close()
+        self.task_telemetry.stop()
+        self.exc_manager.close()
 
+        # unloads cogs, some of them flush their write-behind buffers into the database in `cog_unload`
         await super().close()
+
+        if hasattr(self, "listener_connection"):
+            await self.timers.stop_listening()
+            await self.pool.release(self.listener_connection)
+        await self.pool.close()
         # session needs to be closed the last probably
         if hasattr(self, "session"):
             await self.session.close()
@@ -300,11 +348,9 @@ class AluBot(commands.Bot):
         return discord.Webhook.from_url(url=url, session=self.session, client=self, bot_token=self.http.token)
 
     async def webhook_from_database(self, channel_id: int) -> discord.Webhook:
-        """Fetch webhook_url from the database by the `channel_id`."""
-        query = "SELECT url FROM webhooks WHERE channel_id = $1"
-        webhook_url: str | None = await self.pool.fetchval(query, channel_id)
-        if webhook_url:
-            return self.webhook_from_url(webhook_url)
+        """Get webhook for the `channel_id` from the webhook registry (backed by the database)."""
+        if webhook := await self.webhook_registry.get(channel_id):
+            return webhook
         msg = f"There is no webhook in the database for channel with id={channel_id}"
         raise errors.PlaceholderError(msg)
 
@@ -338,13 +384,28 @@ class AluBot(commands.Bot):
         Currently, the bot doesn't allow text command anywhere except my private hideout server.
         People should use slash commands. Some remaining text commands are dev-only.
 
-        Note that this doesn't change behavior of other "on_message" listeners,
-        i.e. they will still listen to messages from all guilds.
+        Note that this doesn't change behavior of message handlers of the cogs,
+        i.e. they will still get messages from all guilds (if their filters allow it), see `MessageRouter`.
         """
         if message.guild and message.guild.id == const.Guild.hideout and not message.author.bot:
             # only process commands in my own private server and only from me (the only non-bot account in there);
             await self.process_commands(message)
 
+        # message features of cogs are declared with `@message_handler` instead of separate `on_message` listeners
+        await self.message_router.dispatch(message)
+
+    @override
+    async def add_cog(self, cog: commands.Cog, /, *, override: bool = False, **kwargs: Any) -> None:
+        await super().add_cog(cog, override=override, **kwargs)
+        self.message_router.add_cog(cog)
+
+    @override
+    async def remove_cog(self, name: str, /, **kwargs: Any) -> commands.Cog | None:
+        cog = await super().remove_cog(name, **kwargs)
+        if cog is not None:
+            self.message_router.remove_cog(cog)
+        return cog
+
     @override
     async def on_error(self: AluBot, event: str, *args: Any, **kwargs: Any) -> None:
         """Called when an error is raised in an event listener.
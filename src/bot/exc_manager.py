@@ -3,9 +3,12 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import datetime
+import hashlib
 import logging
 import traceback
+from dataclasses import dataclass
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -19,25 +22,73 @@ if TYPE_CHECKING:
 
 log = logging.getLogger("exc_manager")
 
+MAX_PENDING_REPORTS = 50
+"""Maximum amount of distinct errors waiting to be sent. Errors beyond that are only counted and logged."""
+
+
+@dataclass(slots=True)
+class ErrorReport:
+    """Coalesced occurrences of the same error (by fingerprint) waiting to be sent.
+
+    Attributes
+    ----------
+    fingerprint: str
+        See `ExceptionManager.fingerprint`.
+    traceback: str
+        Formatted traceback of the first occurrence.
+    embed: discord.Embed
+        Embed of the first occurrence.
+    channel_id: int | None
+        Channel of the first occurrence.
+    first_at: datetime.datetime
+        When the error happened for the first time in this report.
+    last_at: datetime.datetime
+        When the error happened for the last time in this report.
+    send_at: datetime.datetime
+        When the coalescing window closes and the report is sent.
+    count: int
+        Amount of occurrences.
+    """
+
+    fingerprint: str
+    traceback: str
+    embed: discord.Embed
+    channel_id: int | None
+    first_at: datetime.datetime
+    last_at: datetime.datetime
+    send_at: datetime.datetime
+    count: int = 1
+
 
 class ExceptionManager:
     """Exception Manager that.
 
     * should be used to send all unhandled errors to developers via webhooks.
     * controls rate-limit of the said webhook
+    * coalesces repeating errors (i.e. when some API is down and every request fails the same way)
+        into a single message with the amount of occurrences and first/last timestamps.
     * contains history of errors that was not fixed yet
     * allows users to track the said errors and get notification when it's fixed
 
+    `register_error` never waits for the webhook: it only fingerprints the error and puts it into
+    the pending reports. A single sender task sends reports when their coalescing window closes,
+    keeping `cooldown` between sends.
+
     Attributes
     ----------
     bot: AluBot
         The bot instance.
     cooldown: datetime.timedelta
         The cooldown between sending errors. This defaults to 5 seconds.
-    errors_cache: dict[str, list[ErrorInfoPacket]]
-        A mapping of tracebacks to their error information.
-    error_webhook: discord.Webhook
-        The error webhook used to send errors.
+    window: datetime.timedelta
+        Coalescing window for an error: identical errors registered during it are sent as one message.
+    repeat_window: datetime.timedelta
+        Longer coalescing window for an error that was already sent recently (within the same period),
+        so a flapping dependency produces one message per `repeat_window` instead of one per `window`.
+    pending: dict[str, ErrorReport]
+        Reports waiting to be sent, keyed by fingerprint.
+    dropped: int
+        Amount of errors dropped since the last sent report because there were too many pending reports.
 
     """
 
@@ -46,11 +97,15 @@ class ExceptionManager:
     # https://github.com/DuckBot-Discord/DuckBot/blob/rewrite/utils/errorhandler.py
 
     __slots__: tuple[str, ...] = (
-        "_lock",
-        "_most_recent",
+        "_recently_sent",
+        "_sender_task",
+        "_wake_up",
         "bot",
         "cooldown",
-        "errors_cache",
+        "dropped",
+        "pending",
+        "repeat_window",
+        "window",
     )
 
     def __init__(
@@ -58,12 +113,40 @@ class ExceptionManager:
         bot: AluBot,
         *,
         cooldown: datetime.timedelta = datetime.timedelta(seconds=5),
+        window: datetime.timedelta = datetime.timedelta(seconds=15),
+        repeat_window: datetime.timedelta = datetime.timedelta(minutes=5),
     ) -> None:
         self.bot: AluBot = bot
         self.cooldown: datetime.timedelta = cooldown
+        self.window: datetime.timedelta = window
+        self.repeat_window: datetime.timedelta = repeat_window
+
+        self.pending: dict[str, ErrorReport] = {}
+        self.dropped: int = 0
+        self._recently_sent: dict[str, datetime.datetime] = {}
+        self._wake_up: asyncio.Event = asyncio.Event()
+        self._sender_task: asyncio.Task[None] | None = None
 
-        self._lock: asyncio.Lock = asyncio.Lock()
-        self._most_recent: datetime.datetime | None = None
+    @staticmethod
+    def fingerprint(error: BaseException) -> str:
+        """Get a fingerprint of the error: exception types plus normalised frame stack of the whole chain.
+
+        The error message is not a part of it because it usually contains ids, urls, status codes, etc.
+        Frames are normalised down to `file:function:line`, with the file relative to the working directory.
+        """
+        cwd = str(Path.cwd())
+        parts: list[str] = []
+        seen: set[int] = set()
+        current: BaseException | None = error
+        while current is not None and id(current) not in seen:
+            seen.add(id(current))
+            parts.append(f"{type(current).__module__}.{type(current).__qualname__}")
+            parts.extend(
+                f"{frame.filename.replace(cwd, '')}:{frame.name}:{frame.lineno}"
+                for frame in traceback.extract_tb(current.__traceback__)
+            )
+            current = current.__cause__ or (None if current.__suppress_context__ else current.__context__)
+        return hashlib.blake2b("\n".join(parts).encode(), digest_size=8).hexdigest()
 
     def _yield_code_chunks(self, iterable: str, *, chunks_size: int = 2000) -> Generator[str, None, None]:
         codeblocks: str = "```py\n{}```"
@@ -102,48 +185,98 @@ class ExceptionManager:
         log_message = log_message if log_message is not None else embed.footer.text
         log.error("%s: `%s`.", error.__class__.__name__, log_message, exc_info=error)
 
+        now = datetime.datetime.now(datetime.UTC)
+        fingerprint = self.fingerprint(error)
+        if (report := self.pending.get(fingerprint)) is not None:
+            # coalesce: no need to even format the traceback again
+            report.count += 1
+            report.last_at = now
+            return
+
+        if len(self.pending) >= MAX_PENDING_REPORTS:
+            self.dropped += 1
+            return
+
         # apparently there is https://github.com/vi3k6i5/flashtext for "the fastest replacement"
         # not sure if I want to add an extra dependency
         traceback_string = "".join(traceback.format_exception(error)).replace(str(Path.cwd()), "AluBot")
         traceback_string = traceback_string.replace("``", "`\u200b`")
 
-        async with self._lock:
-            if self._most_recent and (delta := datetime.datetime.now(datetime.UTC) - self._most_recent) < self.cooldown:
-                # We have to wait
-                total_seconds = delta.total_seconds()
-                log.debug("Waiting %s seconds to send the error.", total_seconds)
-                await asyncio.sleep(total_seconds)
+        sent_at = self._recently_sent.get(fingerprint)
+        window = self.repeat_window if sent_at and now - sent_at < self.repeat_window else self.window
+        self.pending[fingerprint] = ErrorReport(
+            fingerprint, traceback_string, embed, channel_id, first_at=now, last_at=now, send_at=now + window
+        )
+        self._wake_up.set()
+        if self._sender_task is None or self._sender_task.done():
+            self._sender_task = asyncio.create_task(self._sender(), name="exc-manager-sender")
+
+    async def _sender(self) -> None:
+        """The single task that sends pending reports once their coalescing window closes."""
+        while True:
+            if not self.pending:
+                self._wake_up.clear()
+                await self._wake_up.wait()
+                continue
 
-            self._most_recent = datetime.datetime.now(datetime.UTC)
-            await self.send_error(traceback_string, embed, channel_id=channel_id)
+            report = min(self.pending.values(), key=lambda r: r.send_at)
+            delay = (report.send_at - datetime.datetime.now(datetime.UTC)).total_seconds()
+            if delay > 0:
+                # a new report with a shorter window might come meanwhile
+                self._wake_up.clear()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wake_up.wait(), timeout=delay)
+                continue
 
-    async def send_error(self, traceback: str, embed: discord.Embed, *, channel_id: int | None = None) -> None:
-        """Send an error to the error webhook.
+            del self.pending[report.fingerprint]
+            now = datetime.datetime.now(datetime.UTC)
+            self._recently_sent = {fp: at for fp, at in self._recently_sent.items() if now - at < self.repeat_window}
+            self._recently_sent[report.fingerprint] = now
+            try:
+                await self.send_error(report)
+            except Exception:
+                log.exception("Failed to send the error report %s", report.fingerprint)
+            await asyncio.sleep(self.cooldown.total_seconds())
+
+    def close(self) -> None:
+        """Stop the sender task. Reports that are still pending are only in the logs then."""
+        if self._sender_task is not None:
+            self._sender_task.cancel()
+            self._sender_task = None
+
+    async def send_error(self, report: ErrorReport) -> None:
+        """Send an error report to the error webhook.
 
         It is not recommended to call this yourself, call `register_error` instead.
 
         Parameters
         ----------
-        traceback: str
-            The traceback of the error.
-        embed: discord.Embed
-            The additional information about the error. This comes from registering the error.
-        channel_id: int | None = None
-            Channel ID coming from `register_error`.
+        report: ErrorReport
+            The coalesced error coming from `register_error`.
         """
-        code_chunks = list(self._yield_code_chunks(traceback))
+        code_chunks = list(self._yield_code_chunks(report.traceback))
+
+        header = self.bot.error_ping
+        if report.count > 1:
+            header += (
+                f" \N{MULTIPLICATION SIGN}{report.count} times between "
+                f"{discord.utils.format_dt(report.first_at, 'T')} and {discord.utils.format_dt(report.last_at, 'T')}"
+            )
+        if self.dropped:
+            header += f"\n-# {self.dropped} more error(s) were dropped because too many were pending, check the logs."
+            self.dropped = 0
 
         # hmm, this is honestly a bit too many sends for 5 seconds of rate limit :thinking:
 
         # if channel_id != self.bot.hideout.spam_channel_id:
         try:
-            await self.bot.error_webhook.send(self.bot.error_ping)
+            await self.bot.error_webhook.send(header)
 
             for chunk in code_chunks:
                 await self.bot.error_webhook.send(chunk)
 
-            if channel_id != self.bot.hideout.spam_channel_id:
-                await self.bot.error_webhook.send(embed=embed)
+            if report.channel_id != self.bot.hideout.spam_channel_id:
+                await self.bot.error_webhook.send(embed=report.embed)
         except discord.HTTPException as error:
             # possible rate limit or worse :c
             warning = f"{self.bot.error_ping} {error.__class__.__name__} {error}"
@@ -0,0 +1,224 @@
+"""Instrumented Pool.
+
+Thin wrapper over `asyncpg.Pool` that the bot uses as `bot.pool`.
+
+Every `fetch`/`fetchrow`/`fetchval`/`execute`/`executemany` call gets tagged with its call site
+(`module.Class.method` that made the call) and recorded into per-statement stats:
+latency histogram, row counts and samples of slow queries. Slow queries are also logged as warnings
+so they end up in #logger channel via `ext.dev.logs_via_webhook`.
+
+Everything else (`acquire`, `release`, `close`, private attributes for `/system-dev health`, etc.)
+is forwarded to the wrapped pool as is. Note that queries made on acquired connections are not recorded.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable
+
+    import asyncpg
+
+
+__all__ = (
+    "InstrumentedPool",
+    "QueryStats",
+    "SlowQuerySample",
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+HISTOGRAM_BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+"""Upper bounds (in seconds) of latency histogram buckets. The last implicit bucket is `+inf`."""
+
+SLOW_QUERY_THRESHOLD = 0.5
+"""Queries slower than this (in seconds) are sampled and logged."""
+
+SLOW_QUERY_LOG_COOLDOWN = 600.0
+"""Seconds between slow query warnings from the same call site so a struggling database doesn't flood #logger."""
+
+
+class SlowQuerySample(NamedTuple):
+    call_site: str
+    query: str
+    elapsed: float
+    at: datetime.datetime
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """Stats for a single statement from a single call site."""
+
+    call_site: str
+    query: str
+    prepared: bool = False
+    calls: int = 0
+    rows: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(HISTOGRAM_BUCKETS) + 1))
+
+    def record(self, elapsed: float, rows: int) -> None:
+        """Record a single call of the statement."""
+        self.calls += 1
+        self.rows += rows
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        for index, bound in enumerate(HISTOGRAM_BUCKETS):
+            if elapsed <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / (self.calls or 1)
+
+    def percentile(self, q: float) -> float:
+        """Approximate `q`-percentile latency (in seconds) as the upper bound of the histogram bucket it falls into."""
+        target = q * self.calls
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BUCKETS, self.buckets, strict=False):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max_time
+
+
+def _rows_from_status(status: str) -> int:
+    """Get affected row count from the command status string like `UPDATE 5` or `INSERT 0 3`."""
+    _, _, count = status.rpartition(" ")
+    return int(count) if count.isdigit() else 0
+
+
+class InstrumentedPool:
+    """Instrumented wrapper over `asyncpg.Pool`.
+
+    Attributes
+    ----------
+    pool: asyncpg.Pool[asyncpg.Record]
+        The wrapped pool, created with `statement_cache_size=0`.
+    prepared_pool: asyncpg.Pool[asyncpg.Record] | None
+        Small pool with asyncpg statement cache enabled. Calls made with `prepared=True` go through it,
+        so the hottest statements are parsed and planned once per connection and executed
+        as named prepared statements afterwards. If it's `None` then `prepared=True` is simply ignored.
+    stats: dict[tuple[str, str], QueryStats]
+        Stats keyed by `(call_site, query)`.
+    slow_queries: deque[SlowQuerySample]
+        The most recent slow query samples.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool[asyncpg.Record],
+        *,
+        prepared_pool: asyncpg.Pool[asyncpg.Record] | None = None,
+    ) -> None:
+        self.pool: asyncpg.Pool[asyncpg.Record] = pool
+        self.prepared_pool: asyncpg.Pool[asyncpg.Record] | None = prepared_pool
+        self.stats: dict[tuple[str, str], QueryStats] = {}
+        self.slow_queries: deque[SlowQuerySample] = deque(maxlen=25)
+        self.started_at: datetime.datetime = datetime.datetime.now(datetime.UTC)
+        self._slow_logged_at: dict[str, float] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.pool, name)
+
+    @staticmethod
+    def get_call_site(depth: int = 3) -> str:
+        """Get `module.qualname` of the function that called into the pool."""
+        frame = sys._getframe(depth)
+        return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+
+    def reset_stats(self) -> None:
+        """Forget all collected stats, i.e. before measuring some change."""
+        self.stats.clear()
+        self.slow_queries.clear()
+        self.started_at = datetime.datetime.now(datetime.UTC)
+
+    def top(self, n: int = 10, *, key: Callable[[QueryStats], float] = lambda s: s.total_time) -> list[QueryStats]:
+        """Get `n` statements dominating by `key`, total time spent by default."""
+        return sorted(self.stats.values(), key=key, reverse=True)[:n]
+
+    async def _run[T](
+        self,
+        method: str,
+        query: str,
+        args: Iterable[Any],
+        kwargs: dict[str, Any],
+        *,
+        prepared: bool,
+        count_rows: Callable[[T], int],
+    ) -> T:
+        call_site = self.get_call_site()
+        pool = self.prepared_pool if prepared and self.prepared_pool is not None else self.pool
+        coro: Awaitable[T] = getattr(pool, method)(query, *args, **kwargs)
+
+        start = time.perf_counter()
+        result = await coro
+        elapsed = time.perf_counter() - start
+
+        try:
+            stats = self.stats[call_site, query]
+        except KeyError:
+            stats = self.stats[call_site, query] = QueryStats(call_site, query, prepared=pool is self.prepared_pool)
+        stats.record(elapsed, count_rows(result))
+
+        if elapsed >= SLOW_QUERY_THRESHOLD:
+            self.record_slow_query(call_site, query, elapsed)
+        return result
+
+    def record_slow_query(self, call_site: str, query: str, elapsed: float) -> None:
+        """Sample the slow query and log it (unless the same call site was logged recently)."""
+        self.slow_queries.append(SlowQuerySample(call_site, query, elapsed, datetime.datetime.now(datetime.UTC)))
+
+        now = time.monotonic()
+        if now - self._slow_logged_at.get(call_site, -SLOW_QUERY_LOG_COOLDOWN) >= SLOW_QUERY_LOG_COOLDOWN:
+            self._slow_logged_at[call_site] = now
+            log.warning("Slow query (%.0fms) in `%s`: %s", elapsed * 1000, call_site, " ".join(query.split())[:300])
+
+    async def fetch(self, query: str, *args: Any, timeout: float | None = None, prepared: bool = False) -> list[Any]:
+        return await self._run("fetch", query, args, {"timeout": timeout}, prepared=prepared, count_rows=len)
+
+    async def fetchrow(self, query: str, *args: Any, timeout: float | None = None, prepared: bool = False) -> Any:
+        return await self._run(
+            "fetchrow", query, args, {"timeout": timeout}, prepared=prepared, count_rows=lambda r: int(r is not None)
+        )
+
+    async def fetchval(
+        self, query: str, *args: Any, column: int = 0, timeout: float | None = None, prepared: bool = False
+    ) -> Any:
+        return await self._run(
+            "fetchval",
+            query,
+            args,
+            {"column": column, "timeout": timeout},
+            prepared=prepared,
+            count_rows=lambda r: int(r is not None),
+        )
+
+    async def execute(self, query: str, *args: Any, timeout: float | None = None, prepared: bool = False) -> str:
+        return await self._run(
+            "execute", query, args, {"timeout": timeout}, prepared=prepared, count_rows=_rows_from_status
+        )
+
+    async def executemany(self, command: str, args: Iterable[Any], *, timeout: float | None = None) -> None:
+        args = list(args)
+        await self._run(
+            "executemany", command, (args,), {"timeout": timeout}, prepared=False, count_rows=lambda _: len(args)
+        )
+
+    async def close(self) -> None:
+        """Close both pools."""
+        if self.prepared_pool is not None:
+            await self.prepared_pool.close()
+        await self.pool.close()
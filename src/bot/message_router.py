@@ -0,0 +1,300 @@
+"""Message Router.
+
+A single `on_message` entry point for message handlers of all cogs.
+Separate `on_message` listeners would make discord.py spawn a task per listener per message
+and each of them would re-check the author/guild/channel and re-scan `message.content` on its own
+just to return early in 99% of cases.
+
+Cogs declare their message handlers with `@message_handler(...)` filters instead.
+The router builds `MessageContext` once per message (with lazily computed and shared content features)
+and only calls handlers whose filters match.
+
+Examples
+--------
+```py
+class Levels(AluCog):
+    @message_handler(guilds=(const.Guild.community,), humans_only=True, has_mentions=True)
+    async def reputation_counting(self, ctx: MessageContext) -> None: ...
+```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal
+
+from utils import const, scanner
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine, Iterable
+
+    import discord
+    from discord.ext import commands
+
+    from .bot import AluBot
+
+    type MessageHandlerCallback = Callable[[MessageContext], Coroutine[Any, Any, None]]
+
+
+__all__ = (
+    "MessageContext",
+    "MessageFilter",
+    "MessageRouter",
+    "message_handler",
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+class MessageContext:
+    """Per-message context shared by all message handlers.
+
+    Everything derived from the content is computed lazily on the first access and only once,
+    no matter how many handlers need it.
+
+    Attributes
+    ----------
+    message: discord.Message
+        The message itself.
+    guild_id: int | None
+        Id of the guild the message was sent in, `None` for DMs.
+    channel_id: int
+        Id of the channel the message was sent in.
+    author_kind: Literal["human", "bot", "my_bot", "webhook"]
+        Who sent the message. `"my_bot"` is AluBot/YenBot, `"bot"` is any other bot account.
+    """
+
+    def __init__(self, bot: AluBot, message: discord.Message) -> None:
+        self.bot: AluBot = bot
+        self.message: discord.Message = message
+        self.guild_id: int | None = message.guild.id if message.guild else None
+        self.channel_id: int = message.channel.id
+
+        self.author_kind: Literal["human", "bot", "my_bot", "webhook"]
+        if message.webhook_id:
+            self.author_kind = "webhook"
+        elif message.author.id in const.MY_BOTS:
+            self.author_kind = "my_bot"
+        elif message.author.bot:
+            self.author_kind = "bot"
+        else:
+            self.author_kind = "human"
+
+    @functools.cached_property
+    def content_lower(self) -> str:
+        return self.message.content.lower()
+
+    @functools.cached_property
+    def scan(self) -> scanner.ScanResult:
+        """Emotes, links and trigger words in the content, found in a single pass. See `utils.scanner`."""
+        return scanner.scan(self.message.content)
+
+    @functools.cached_property
+    def emote_ids(self) -> list[int]:
+        """Ids of custom emotes in the content, without duplicates and in order of appearance."""
+        return self.scan.emote_ids
+
+    @functools.cached_property
+    def urls(self) -> list[str]:
+        return self.scan.urls
+
+    @functools.cached_property
+    def mentions_me(self) -> bool:
+        guild = self.message.guild
+        return guild is not None and guild.me in self.message.mentions
+
+
+@dataclass(slots=True, frozen=True)
+class MessageFilter:
+    """Declarative filter for a message handler, checked by the router before calling it.
+
+    Attributes
+    ----------
+    guilds: frozenset[int] | None
+        Guilds the handler is interested in. `None` means any guild as well as DMs (unless `guild_only`).
+    channels: frozenset[int] | None
+        Channels the handler is interested in. `None` means any channel.
+    guild_only: bool
+        Whether to skip DMs.
+    authors: frozenset[Literal["human", "bot", "my_bot", "webhook"]]
+        Author kinds the handler is interested in.
+    has_emotes: bool
+        Whether the message needs to have custom emotes.
+    has_urls: bool
+        Whether the message needs to have links.
+    has_mentions: bool
+        Whether the message needs to mention somebody.
+    mentions_me: bool
+        Whether the message needs to mention the bot.
+    contains: tuple[str, ...]
+        Lowercase substrings, the message needs to contain at least one of them.
+    words: frozenset[str]
+        Lowercase trigger words, the message needs to contain at least one of them as a whole word.
+        Only words from `utils.scanner.THANKS_WORDS` are scanned for, `message_handler` raises for any other.
+    """
+
+    guilds: frozenset[int] | None = None
+    channels: frozenset[int] | None = None
+    guild_only: bool = False
+    authors: frozenset[Literal["human", "bot", "my_bot", "webhook"]] = frozenset(("human", "bot", "my_bot", "webhook"))
+    has_emotes: bool = False
+    has_urls: bool = False
+    has_mentions: bool = False
+    mentions_me: bool = False
+    contains: tuple[str, ...] = ()
+    words: frozenset[str] = frozenset()
+
+    def matches(self, ctx: MessageContext) -> bool:
+        """Whether the handler should be called for the message. Cheap checks go first."""
+        return (
+            ctx.author_kind in self.authors
+            and not (self.guild_only and ctx.guild_id is None)
+            and (self.guilds is None or ctx.guild_id in self.guilds)
+            and (self.channels is None or ctx.channel_id in self.channels)
+            and not (self.has_mentions and not ctx.message.mentions)
+            and not (self.mentions_me and not ctx.mentions_me)
+            and not (self.contains and not any(word in ctx.content_lower for word in self.contains))
+            and not (self.has_urls and not ctx.urls)
+            and not (self.has_emotes and not ctx.emote_ids)
+            and not (self.words and self.words.isdisjoint(ctx.scan.words))
+        )
+
+
+def message_handler(
+    *,
+    guilds: Iterable[int] | None = None,
+    channels: Iterable[int] | None = None,
+    guild_only: bool = False,
+    humans_only: bool = False,
+    bots: bool = True,
+    my_bots: bool = True,
+    webhooks: bool = True,
+    has_emotes: bool = False,
+    has_urls: bool = False,
+    has_mentions: bool = False,
+    mentions_me: bool = False,
+    contains: Iterable[str] = (),
+    words: Iterable[str] = (),
+) -> Callable[[Callable[[Any, MessageContext], Coroutine[Any, Any, None]]], Any]:
+    """Mark a cog method as a message handler for `MessageRouter`.
+
+    Parameters
+    ----------
+    humans_only: bool = False
+        A shortcut for `bots=False, my_bots=False, webhooks=False`, i.e. `not message.author.bot`.
+    bots: bool = True
+        Whether messages from bot accounts (other than mine) pass the filter.
+    my_bots: bool = True
+        Whether messages from AluBot/YenBot pass the filter.
+    webhooks: bool = True
+        Whether webhook messages pass the filter.
+
+    Other parameters are described in `MessageFilter`.
+
+    Raises
+    ------
+    ValueError
+        Some of `words` are not scanned for by `utils.scanner`, so the handler would never be called.
+    """
+    words = frozenset(word.lower() for word in words)
+    if unknown_words := words.difference(scanner.THANKS_WORDS):
+        msg = f"`message_handler`: words {sorted(unknown_words)} are not scanned for, add them to `scanner.THANKS_WORDS`."
+        raise ValueError(msg)
+
+    authors: set[Literal["human", "bot", "my_bot", "webhook"]] = {"human"}
+    if not humans_only:
+        authors |= {kind for kind, allowed in (("bot", bots), ("my_bot", my_bots), ("webhook", webhooks)) if allowed}
+
+    message_filter = MessageFilter(
+        guilds=frozenset(guilds) if guilds is not None else None,
+        channels=frozenset(channels) if channels is not None else None,
+        guild_only=guild_only or guilds is not None,
+        authors=frozenset(authors),
+        has_emotes=has_emotes,
+        has_urls=has_urls,
+        has_mentions=has_mentions,
+        mentions_me=mentions_me,
+        contains=tuple(word.lower() for word in contains),
+        words=words,
+    )
+
+    def decorator(func: Callable[[Any, MessageContext], Coroutine[Any, Any, None]]) -> Any:
+        func.__message_filter__ = message_filter  # pyright: ignore[reportFunctionMemberAccess]
+        return func
+
+    return decorator
+
+
+@dataclass(slots=True)
+class MessageHandler:
+    """Registered message handler together with its timing stats."""
+
+    name: str
+    cog_name: str
+    callback: MessageHandlerCallback
+    filter: MessageFilter
+    calls: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+
+class MessageRouter:
+    """Routes messages to message handlers of loaded cogs.
+
+    Attributes
+    ----------
+    bot: AluBot
+        The bot instance.
+    handlers: list[MessageHandler]
+        Registered handlers.
+    """
+
+    def __init__(self, bot: AluBot) -> None:
+        self.bot: AluBot = bot
+        self.handlers: list[MessageHandler] = []
+
+    def add_cog(self, cog: commands.Cog) -> None:
+        """Register message handlers declared in the cog."""
+        for name in dir(type(cog)):
+            message_filter = getattr(getattr(type(cog), name, None), "__message_filter__", None)
+            if isinstance(message_filter, MessageFilter):
+                self.handlers.append(
+                    MessageHandler(f"{cog.qualified_name}.{name}", cog.qualified_name, getattr(cog, name), message_filter)
+                )
+
+    def remove_cog(self, cog: commands.Cog) -> None:
+        """Unregister message handlers of the cog."""
+        self.handlers = [handler for handler in self.handlers if handler.cog_name != cog.qualified_name]
+
+    async def run_handler(self, handler: MessageHandler, ctx: MessageContext) -> None:
+        """Run the handler, time it and report its errors the same way `on_message` listener errors were."""
+        start = time.perf_counter()
+        try:
+            await handler.callback(ctx)
+        except Exception:  # noqa: BLE001
+            await self.bot.on_error(f"on_message: {handler.name}", ctx.message)
+        finally:
+            elapsed = time.perf_counter() - start
+            handler.calls += 1
+            handler.total_time += elapsed
+            handler.max_time = max(handler.max_time, elapsed)
+
+    async def dispatch(self, message: discord.Message) -> None:
+        """Build the context for the message and run all matching handlers."""
+        ctx = MessageContext(self.bot, message)
+        matched = [handler for handler in self.handlers if handler.filter.matches(ctx)]
+        if not matched:
+            return
+        if len(matched) == 1:
+            await self.run_handler(matched[0], ctx)
+        else:
+            await asyncio.gather(*(self.run_handler(handler, ctx) for handler in matched))
+
+    def top(self, n: int = 5) -> list[MessageHandler]:
+        """Get `n` handlers that took the most time in total."""
+        return sorted(self.handlers, key=lambda h: h.total_time, reverse=True)[:n]
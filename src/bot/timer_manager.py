@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import datetime
+import heapq
 import itertools
 import logging
 from collections.abc import Mapping
-from typing import TYPE_CHECKING, Any, Self, TypedDict, TypeVar, override
+from typing import TYPE_CHECKING, Any, Literal, NotRequired, Self, TypedDict, TypeVar, override
 
 import asyncpg
 import discord
+import orjson
 
 if TYPE_CHECKING:
     from .bot import AluBot
@@ -40,9 +43,19 @@ class TimerRow[TimerDataT](TypedDict):
     data: TimerDataT
 
 
+class TimerNotification(TypedDict):
+    """Payload of `timers` channel notifications, see `timers_notify` function in `sql/rewrite.sql`."""
+
+    op: Literal["INSERT", "UPDATE", "DELETE"]
+    id: int
+    expires_at: NotRequired[str]
+
+
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
 
+NOTIFY_CHANNEL = "timers"
+
 
 class Timer[TimerDataT]:
     """Timer represent delayed tasks.
@@ -150,8 +163,15 @@ class TimerManager:
 
     Workflow
     -------
-    * __init__ > dispatch > wait_for_active (get_active) > call > looped again
-    * create > maybe short_optimization > reschedule
+    * __init__ > dispatch > load_window (every `WINDOW`) > sleep until the earliest timer > call_due > looped again
+    * create > maybe short_optimization > push into the heap if it's within the window
+    * timers table trigger > NOTIFY > on_notification > push into/drop from the heap
+
+    Timers expiring within the next `WINDOW` are kept in memory in a min-heap, so every due timer
+    is dispatched in the same tick without a database round-trip per timer.
+    Inserts/deletes done by other writers (i.e. raw `DELETE FROM timers` queries in cogs)
+    are picked up via Postgres `LISTEN/NOTIFY` on the bot's `listener_connection`.
+    The periodic window reload is a fallback in case some notifications were missed.
 
     Warning
     -------
@@ -159,62 +179,185 @@ class TimerManager:
     """
 
     __slots__: tuple[str, ...] = (
-        "_have_data",
+        "_dispatched_timer_ids",
+        "_fetch_tasks",
+        "_heap",
+        "_load_events",
+        "_loaded_until",
         "_scheduling_task",
-        "_skipped_timer_ids",
         "_temporary_timer_id_count",
+        "_timers",
+        "_wakeup",
         "bot",
-        "current_timer",
         "name",
     )
 
+    WINDOW: datetime.timedelta = datetime.timedelta(hours=1)
+    """How far into the future timers are loaded into the heap."""
+
     def __init__(self, *, bot: AluBot) -> None:
         self.bot: AluBot = bot
 
         self._temporary_timer_id_count: int = -1
         """Not really useful attribute, but just so `__eq__` can properly work on temporary timers."""
-        self._skipped_timer_ids: set[int] = set()
-        self._have_data = asyncio.Event()
-        self.current_timer: Timer[TimerData] | None = None
+        self._heap: list[tuple[datetime.datetime, int, Timer[TimerData]]] = []
+        """Min-heap of `(expires_at, id, timer)`. Entries of timers deleted in between are skipped lazily."""
+        self._timers: dict[int, Timer[TimerData]] = {}
+        """Mapping `id -> timer` for timers in the heap that are still valid."""
+        self._dispatched_timer_ids: set[int] = set()
+        """Timers that were dispatched but listeners haven't called `cleanup` for them yet."""
+        self._loaded_until: datetime.datetime = datetime.datetime.now(datetime.UTC)
+        self._load_events: dict[int, Timer[TimerData] | None] | None = None
+        """Pushes (and discards as `None`) that happened while `load_window` is waiting for the database."""
+        self._fetch_tasks: set[asyncio.Task[None]] = set()
+        """Running `fetch_and_push` tasks, we need to keep references to them."""
+        self._wakeup = asyncio.Event()
         self._scheduling_task = self.bot.loop.create_task(self.dispatch())
 
+    @property
+    def current_timer(self) -> Timer[TimerData] | None:
+        """The earliest timer in the heap."""
+        while self._heap:
+            timer = self._heap[0][2]
+            if self._timers.get(timer.id) is timer:
+                return timer
+            heapq.heappop(self._heap)
+        return None
+
+    async def start_listening(self) -> None:
+        """Subscribe to timers table notifications."""
+        await self.bot.listener_connection.add_listener(NOTIFY_CHANNEL, self.on_notification)
+
+    async def stop_listening(self) -> None:
+        """Unsubscribe from timers table notifications."""
+        await self.bot.listener_connection.remove_listener(NOTIFY_CHANNEL, self.on_notification)
+
+    def push(self, timer: Timer[TimerData]) -> None:
+        """Put the timer into the heap (if it's within the loaded window) and wake up the dispatcher."""
+        if timer.id in self._dispatched_timer_ids or timer.expires_at >= self._loaded_until:
+            return
+
+        self._timers[timer.id] = timer
+        heapq.heappush(self._heap, (timer.expires_at, timer.id, timer))
+        if self._load_events is not None:
+            self._load_events[timer.id] = timer
+        if self.current_timer is timer:
+            # it's earlier than what the dispatcher is sleeping for
+            self._wakeup.set()
+
+    def discard(self, id_: int) -> None:
+        """Forget about the timer, i.e. it was deleted from the database."""
+        self._timers.pop(id_, None)
+        self._dispatched_timer_ids.discard(id_)
+        if self._load_events is not None:
+            self._load_events[id_] = None
+
+    def on_notification(
+        self, _connection: asyncpg.Connection[asyncpg.Record], _pid: int, _channel: str, payload: str
+    ) -> None:
+        """Callback for the `timers` channel notifications sent by the trigger on the timers table."""
+        notification: TimerNotification = orjson.loads(payload)
+        id_ = notification["id"]
+        log.debug("Timer notification: %s", notification)
+
+        if notification["op"] == "DELETE":
+            self.discard(id_)
+            return
+
+        # INSERT or UPDATE
+        if notification["op"] == "UPDATE":
+            self.discard(id_)
+        if (expires_at_iso := notification.get("expires_at")) is None:
+            return
+        expires_at = datetime.datetime.fromisoformat(expires_at_iso).replace(tzinfo=datetime.UTC)
+        if id_ not in self._timers and expires_at < self._loaded_until:
+            # the notification doesn't have the whole row (NOTIFY payloads are limited in size)
+            task = self.bot.loop.create_task(self.fetch_and_push(id_))
+            self._fetch_tasks.add(task)
+            task.add_done_callback(self._fetch_tasks.discard)
+
+    async def fetch_and_push(self, id_: int) -> None:
+        """Load the timer inserted by some other writer."""
+        try:
+            timer = await self.get_by_id(id_)
+        except Exception as exc:  # noqa: BLE001
+            embed = discord.Embed(color=0xFF8243, title="Fetching Notified Timer Error").set_footer(
+                text=f"{self.__class__.__name__}.fetch_and_push: timer id={id_}"
+            )
+            await self.bot.exc_manager.register_error(exc, embed)
+            return
+        if timer:
+            self.push(timer)
+
+    async def load_window(self) -> None:
+        """(Re)load timers that expire within the next `WINDOW` into the heap.
+
+        The window is extended before the query so `create` and notifications accept timers of the new window
+        while we wait for the database. Such pushes/discards are recorded and replayed on top of the query result
+        since they might be newer than what the query has seen.
+        """
+        now = datetime.datetime.now(datetime.UTC)
+        loaded_until = now + self.WINDOW
+        query = """
+            SELECT * FROM timers
+            WHERE expires_at < $1
+            ORDER BY expires_at;
+        """
+        previously_loaded_until = self._loaded_until
+        self._loaded_until = loaded_until
+        load_events: dict[int, Timer[TimerData] | None] = {}
+        self._load_events = load_events
+        try:
+            # the database does not deal with timezone information
+            records: list[TimerRow[TimerData]] = await self.bot.pool.fetch(
+                query, loaded_until.replace(tzinfo=None), prepared=True
+            )
+        except BaseException:
+            self._loaded_until = previously_loaded_until
+            raise
+        finally:
+            self._load_events = None
+
+        # dispatched timers stay in the database until `cleanup` so we skip them,
+        # and forget the ones that were deleted in any other way meanwhile
+        self._dispatched_timer_ids &= {record["id"] for record in records}
+        timers = {record["id"]: Timer(row=record) for record in records if record["id"] not in self._dispatched_timer_ids}
+        for id_, timer in load_events.items():
+            if timer is None:
+                timers.pop(id_, None)
+            else:
+                timers[id_] = timer
+
+        self._heap = [(timer.expires_at, timer.id, timer) for timer in timers.values()]
+        heapq.heapify(self._heap)
+        self._timers = timers
+        log.debug("Loaded %s timers until %s", len(timers), loaded_until)
+
     async def dispatch(self) -> None:
         """The main dispatch timers loop.
 
-        This will wait for the next timer to expire and dispatch the bot's event with its data.
+        This will wait for the next timers to expire and dispatch the bot's events with their data.
         Please note if you use this class, you need to cancel the task when you're done with it.
         """
         await self.bot.wait_until_ready()
 
         try:
             while not self.bot.is_closed():
-                # can `asyncio.sleep` only for up to ~48 days reliably,
-                # so we cap it at 40 days, see: http://bugs.python.org/issue20493
-                timer = self.current_timer = await self.wait_for_active(days=40)
-                log.debug("Current_timer = %s", timer)
-
-                # Double check if there exist a listener for the current timer
-                available_listeners = [
-                    listener[0]
-                    for listener in itertools.chain.from_iterable(cog.get_listeners() for cog in self.bot.cogs.values())
-                ]
-                if not self.bot.test and f"on_{timer.event_name}" not in available_listeners:
-                    # the listener existence is NOT confirmed therefore it is not safe to dispatch the event
-                    # notify developers that there is no proper listener for the timer
-                    desc = (
-                        f"The timer with `event={timer.event_name}` is to fire "
-                        "but there is no appropriate listener loaded atm."
-                    )
-                    embed = discord.Embed(color=discord.Color.dark_red(), description=desc)
-                    await self.bot.spam_webhook.send(content=self.bot.error_ping, embed=embed)
-
                 now = datetime.datetime.now(datetime.UTC)
+                if now >= self._loaded_until:
+                    await self.load_window()
 
-                if timer.expires_at >= now:
-                    to_sleep = (timer.expires_at - now).total_seconds()
-                    await asyncio.sleep(to_sleep)
+                self.call_due(now)
 
-                await self.call(timer)
+                timer = self.current_timer
+                log.debug("Current_timer = %s", timer)
+                wake_at = min(timer.expires_at, self._loaded_until) if timer else self._loaded_until
+                to_sleep = (wake_at - datetime.datetime.now(datetime.UTC)).total_seconds()
+
+                self._wakeup.clear()
+                if to_sleep > 0:
+                    with contextlib.suppress(TimeoutError):
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=to_sleep)
         except asyncio.CancelledError:
             raise
         except (OSError, discord.ConnectionClosed, asyncpg.PostgresConnectionError):
@@ -226,35 +369,33 @@ class TimerManager:
             ).set_footer(text=f"{self.__class__.__name__}.dispatch_timers")
             await self.bot.exc_manager.register_error(exc, embed)
 
-    async def wait_for_active(self, *, days: int = 7) -> Timer[TimerData]:
-        """Wait for a timer that has expired.
+    def call_due(self, now: datetime.datetime) -> None:
+        """Dispatch every timer that has expired by `now` as a batch."""
+        due: list[Timer[TimerData]] = []
+        while (timer := self.current_timer) and timer.expires_at <= now:
+            heapq.heappop(self._heap)
+            del self._timers[timer.id]
+            due.append(timer)
 
-        This will wait until a timer is expired and should be dispatched.
+        if not due:
+            return
 
-        Parameters
-        ----------
-        days: int
-            Number of days to look into.
-
-        Returns
-        -------
-        Timer[TimerMapping]
-            The timer that is expired and should be dispatched.
-
-        """
-        timer = await self.get_active(days=days)
-
-        if timer is not None:
-            self._have_data.set()
-            return timer
-
-        self._have_data.clear()
-        self.current_timer = None
-        await self._have_data.wait()
-
-        return await self.get_active(days=days)  # type: ignore[reportReturnType]  # at this point we always have data
-
-    async def call(self, timer: Timer[TimerData]) -> None:
+        # Double check if there exist a listener for the current timers
+        available_listeners = {
+            listener[0] for listener in itertools.chain.from_iterable(cog.get_listeners() for cog in self.bot.cogs.values())
+        }
+        for timer in due:
+            if not self.bot.test and f"on_{timer.event_name}" not in available_listeners:
+                # the listener existence is NOT confirmed therefore it is not safe to dispatch the event
+                # notify developers that there is no proper listener for the timer
+                desc = (
+                    f"The timer with `event={timer.event_name}` is to fire but there is no appropriate listener loaded atm."
+                )
+                embed = discord.Embed(color=discord.Color.dark_red(), description=desc)
+                self.bot.loop.create_task(self.bot.spam_webhook.send(content=self.bot.error_ping, embed=embed))
+            self.call(timer)
+
+    def call(self, timer: Timer[TimerData]) -> None:
         """Call an expired timer to dispatch its event.
 
         Parameters
@@ -265,39 +406,10 @@ class TimerManager:
         """
         log.debug("Calling and Dispatching the timer %s with event %s", timer.id, timer.event)
 
-        self._skipped_timer_ids.add(timer.id)
+        if timer.id > 0:
+            self._dispatched_timer_ids.add(timer.id)
         self.bot.dispatch(timer.event_name, timer)
 
-    async def get_active(self, *, days: int = 7) -> Timer[TimerData] | None:
-        """Get the most current active timer in the database.
-
-        This timer is expired and should be dispatched.
-
-        Parameters
-        ----------
-        days: int
-            The number of days to look back.
-
-        Returns
-        -------
-        Timer[TimerData] | None
-            The timer that is expired and should be dispatched.
-
-        """
-        query = """
-            SELECT * FROM timers
-            WHERE (expires_at AT TIME ZONE 'UTC' AT TIME ZONE timezone) < (CURRENT_TIMESTAMP + $1::interval)
-                AND NOT id=ANY($2)
-            ORDER BY expires_at
-            LIMIT 1;
-        """
-        record: TimerRow[TimerData] | None = await self.bot.pool.fetchrow(
-            query, datetime.timedelta(days=days), self._skipped_timer_ids
-        )
-        if record:
-            return Timer(row=record)
-        return None
-
     async def create(
         self,
         *,
@@ -380,23 +492,18 @@ class TimerManager:
             expires_at.replace(tzinfo=None),
             created_at.replace(tzinfo=None),
             timezone,
+            prepared=True,
         )
         timer.id = row[0]
 
-        # only set the data check if it can be waited on
-        if delta <= (86400 * 40):  # 40 days
-            self._have_data.set()
-
-        # check if this timer is earlier than our currently run timer
-        if self.current_timer and expires_at < self.current_timer.expires_at:
-            self.reschedule()
-
+        # the trigger will notify us too, but there is no need to wait for it
+        self.push(timer)
         return timer
 
     async def short_optimization(self, seconds: float, timer: Timer[TimerData]) -> None:
         """Optimization for small timers, skipping the whole database insert/delete procedure."""
         await asyncio.sleep(seconds)
-        await self.call(timer)
+        self.call(timer)
 
     async def get_by_id(self, id: int) -> Timer[TimerData] | None:  # noqa: A002
         """Get a timer from its ID.
@@ -462,7 +569,7 @@ class TimerManager:
             The ID of the timer to delete.
 
         """
-        self._skipped_timer_ids.remove(id)
+        self.discard(id)
         query = "DELETE FROM timers WHERE id = $1"
         await self.bot.pool.execute(query, id)
 
@@ -487,16 +594,18 @@ class TimerManager:
             self.check_reschedule(record["id"])
 
     def reschedule(self) -> None:
-        """A shortcut to cancel the scheduling task which dispatches the timers and rerun it."""
+        """A shortcut to cancel the scheduling task which dispatches the timers and rerun it.
+
+        The window gets reloaded from the database in the process.
+        """
         self._scheduling_task.cancel()
+        self._loaded_until = datetime.datetime.now(datetime.UTC)
         self._scheduling_task = self.bot.loop.create_task(self.dispatch())
 
     def check_reschedule(self, id_: int) -> None:
         """A common cleanup function for deleting timers by id.
 
-        Should be called in the end of most "delete" methods, i.e. /remind delete slash command
+        Should be called in the end of most "delete" methods, i.e. /remind delete slash command.
+        The notification from the database does the same, but it's nice to not depend on it.
         """
-        # if the current timer is being deleted
-        if self.current_timer and self.current_timer.id == id_:
-            # cancel the task and re-run it
-            self.reschedule()
+        self.discard(id_)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, TypedDict
+
+from lru import LRU
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    import discord
+
+    from .bot import AluBot
+
+    class WebhookQueryRow(TypedDict):
+        channel_id: int
+        url: str
+
+
+__all__ = ("WebhookRegistry",)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+class WebhookRegistry:
+    """In-process registry of ready `discord.Webhook` objects keyed by channel id.
+
+    FPC notifications, mimic messages, etc. used to query `webhooks` table and rebuild a `discord.Webhook`
+    on every single send/edit. Now they all resolve webhooks through this registry.
+
+    * The registry is warmed up from `webhooks` table with a single query on start-up;
+    * It's bounded by `max_size` - least recently used channels are evicted and simply re-queried later;
+    * Entries are invalidated when Discord responds with 404 for the webhook
+        and on `webhooks_update` gateway events (see `ext.mimics.webhooks`).
+
+    Attributes
+    ----------
+    bot: AluBot
+        The bot instance.
+    max_size: int
+        Maximum amount of channels to keep webhooks for.
+    """
+
+    def __init__(self, bot: AluBot, *, max_size: int = 1024) -> None:
+        self.bot: AluBot = bot
+        self.max_size: int = max_size
+        self._webhooks: LRU[int, discord.Webhook] = LRU(max_size)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._webhooks
+
+    async def warm_up(self) -> None:
+        """Fill the registry with webhooks from the database in one query."""
+        query = "SELECT DISTINCT ON (channel_id) channel_id, url FROM webhooks LIMIT $1"
+        rows: list[WebhookQueryRow] = await self.bot.pool.fetch(query, self.max_size)
+        for row in rows:
+            self._webhooks[row["channel_id"]] = self.bot.webhook_from_url(row["url"])
+        log.debug("Warmed up webhook registry with %s webhooks.", len(rows))
+
+    def put(self, channel_id: int, webhook: discord.Webhook) -> None:
+        """Remember the `webhook` for the channel."""
+        self._webhooks[channel_id] = webhook
+
+    async def get(self, channel_id: int) -> discord.Webhook | None:
+        """Get the webhook for the channel, only querying the database on a registry miss."""
+        try:
+            return self._webhooks[channel_id]
+        except KeyError:
+            pass
+
+        query = "SELECT url FROM webhooks WHERE channel_id = $1"
+        webhook_url: str | None = await self.bot.pool.fetchval(query, channel_id)
+        if webhook_url is None:
+            return None
+
+        webhook = self._webhooks[channel_id] = self.bot.webhook_from_url(webhook_url)
+        return webhook
+
+    def invalidate(self, channel_id: int) -> None:
+        """Forget the webhook for the channel so the next `get` goes to the database."""
+        if self._webhooks.pop(channel_id, None) is not None:
+            log.debug("Invalidated webhook for channel %s", channel_id)
+
+    def invalidate_many(self, channel_ids: Iterable[int]) -> None:
+        """Forget webhooks for all the channels, i.e. when the bot leaves a guild."""
+        for channel_id in channel_ids:
+            self.invalidate(channel_id)
+
+    async def discard(self, channel_id: int, webhook: discord.Webhook) -> None:
+        """Drop the webhook that Discord responded to with 404 both from the registry and the database."""
+        self.invalidate(channel_id)
+        query = "DELETE FROM webhooks WHERE id = $1"
+        await self.bot.pool.execute(query, webhook.id)
+        log.info("Discarded deleted webhook %s for channel %s", webhook.id, channel_id)
@@ -5,13 +5,12 @@ import random
 from typing import TYPE_CHECKING
 
 import discord
-from discord.ext import commands
 
-from bot import AluCog
+from bot import AluCog, message_handler
 from utils import const
 
 if TYPE_CHECKING:
-    from bot import AluBot
+    from bot import AluBot, MessageContext
 
 
 __all__ = ("Chatter",)
@@ -23,26 +22,14 @@ class Chatter(AluCog):
     Somewhat silly message-response based actions.
     """
 
-    @staticmethod
-    def community_server_check(msg: discord.Message) -> bool:
-        """Whether the message is from the community server and author isn't a bot."""
-        return (
-            bool(msg.guild)
-            and msg.guild.id == const.Guild.community
-            and not (msg.author.id in const.MY_BOTS or msg.webhook_id)  # webhook to ignore dota-news or nqn bot
-        )
-
-    @staticmethod
-    def channel_check(msg: discord.Message, channel_id: int) -> bool:
-        """Whether the message's channel matches the check and author isn't MY bot."""
-        return bool(msg.channel.id == channel_id and msg.author.id not in const.MY_BOTS)
-
-    @commands.Cog.listener("on_message")
-    async def bots_in_lobby(self, message: discord.Message) -> None:
-        """Bot reacts to other bots' usage in #general with anger."""
-        if not self.channel_check(message, const.Channel.general):
-            return
+    # Filters:
+    # * community server messages where author isn't MY bot or a webhook (to ignore dota-news or nqn bot);
+    # * channel messages where author isn't MY bot.
 
+    @message_handler(channels=(const.Channel.general,), my_bots=False)
+    async def bots_in_lobby(self, ctx: MessageContext) -> None:
+        """Bot reacts to other bots' usage in #general with anger."""
+        message = ctx.message
         if message.interaction is not None and message.interaction.type == discord.InteractionType.application_command:
             text = "Slash-commands"
         elif message.author.bot and not message.webhook_id:
@@ -53,23 +40,18 @@ class Chatter(AluCog):
         content = f"{text} in {const.Channel.general.mention} ! Use {const.Channel.bot_spam.mention} {const.Emote.Ree}"
         await message.channel.send(content)
 
-    @commands.Cog.listener("on_message")
-    async def weebs_out(self, message: discord.Message) -> None:
+    @message_handler(channels=(const.Channel.weebs,), my_bots=False)
+    async def weebs_out(self, ctx: MessageContext) -> None:
         """Bot hates weebs therefore, weebs aren't allowed, even in #weebs_place."""
-        if not self.channel_check(message, const.Channel.weebs):
-            return
-
         if random.randint(1, 456 + 1) < 6:
-            await message.channel.send(
+            await ctx.message.channel.send(
                 f"{const.Emote.WeebsOutOut} {const.Emote.WeebsOut} {const.Emote.peepoWeebSmash} {const.Emote.peepoRiot} ",
             )
 
-    @commands.Cog.listener("on_message")
-    async def ree_the_oof(self, message: discord.Message) -> None:
+    @message_handler(guilds=(const.Guild.community,), my_bots=False, webhooks=False, contains=("oof",))
+    async def ree_the_oof(self, ctx: MessageContext) -> None:
         """Bot hates when people say "Oof" so it reacts to it with angry emote."""
-        if not self.community_server_check(message):
-            return
-
+        message = ctx.message
         if "Oof" in message.content:
             try:
                 await message.add_reaction(const.Emote.Ree)
@@ -77,31 +59,25 @@ class Chatter(AluCog):
                 with contextlib.suppress(discord.HTTPException):
                     await message.delete()
 
-    @commands.Cog.listener("on_message")
-    async def random_comfy_react(self, message: discord.Message) -> None:
+    @message_handler(guilds=(const.Guild.community,), my_bots=False, webhooks=False)
+    async def random_comfy_react(self, ctx: MessageContext) -> None:
         """Bot sometimes reacts to random messages with its favorite emote: peepoComfy."""
-        if not self.community_server_check(message):
-            return
-
         roll = random.randint(1, 3300 + 1)
         if roll < 2:
             try:
-                await message.add_reaction(const.Emote.peepoComfy)
+                await ctx.message.add_reaction(const.Emote.peepoComfy)
             except discord.HTTPException:
                 return
 
-    @commands.Cog.listener("on_message")
-    async def your_life(self, message: discord.Message) -> None:
+    @message_handler(guilds=(const.Guild.community,), my_bots=False, webhooks=False)
+    async def your_life(self, ctx: MessageContext) -> None:
         """Bot sometimes does "Your mom" jokes but instead it's "Your life" joke."""
-        if not self.community_server_check(message):
-            return
-
         if random.randint(1, 299 + 1) < 2:
             with contextlib.suppress(Exception):
-                sliced_text = message.content.split()
+                sliced_text = ctx.message.content.split()
                 if 13 > len(sliced_text) > 2:
                     answer_text = "Your life " + " ".join(sliced_text[2:])
-                    await message.channel.send(answer_text)
+                    await ctx.message.channel.send(answer_text)
 
 
 async def setup(bot: AluBot) -> None:
@@ -3,7 +3,6 @@ from __future__ import annotations
 import asyncio
 import datetime
 import itertools
-import re
 from collections import Counter, defaultdict
 from typing import TYPE_CHECKING, Any, Literal, TypedDict, override
 
@@ -13,25 +12,38 @@ from discord import app_commands
 from discord.ext import commands
 from tabulate import tabulate
 
-from bot import AluCog, aluloop
+from bot import AluCog, aluloop, message_handler
 from utils import const, errors, fmt, pages
 
 if TYPE_CHECKING:
     from collections.abc import Callable
 
-    from bot import AluBot, AluInteraction
+    from bot import AluBot, AluInteraction, MessageContext
 
-    class BatchLastYearEntry(TypedDict):
-        emote_id: int
-        guild_id: int
-        author_id: int
-        used: str  # isoformat
+    type UsageRecord = tuple[int, int, int, datetime.datetime]
+    """`(emote_id, guild_id, author_id, used)` - row of `emote_stats_usages` table in the column order of the COPY."""
+
+    class PartitionRow(TypedDict):
+        name: str
 
 
 __all__ = ("EmoteStats",)
 
-EMOJI_REGEX = re.compile(r"<a?:.+?:([0-9]{15,21})>")
 EMOTE_STATS_TRACKING_START = datetime.datetime(2024, 2, 6, tzinfo=datetime.UTC)
+USAGE_COLUMNS = ("emote_id", "guild_id", "author_id", "used")
+"""Columns of `emote_stats_usages` table that `bulk_insert` COPYs raw usages into."""
+RETENTION = datetime.timedelta(days=365)
+"""How long raw usages and daily rollups are kept for. `emote_stats_total` is not affected."""
+
+
+def month_start(dt: datetime.date) -> datetime.date:
+    """Get the first day of the month for `dt`, i.e. the lower bound of its `emote_stats_usages` partition."""
+    return datetime.date(dt.year, dt.month, 1)
+
+
+def next_month_start(dt: datetime.date) -> datetime.date:
+    """Get the first day of the month after `dt`, i.e. the upper bound of its `emote_stats_usages` partition."""
+    return datetime.date(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
 
 
 class EmoteStats(AluCog):
@@ -44,8 +56,10 @@ class EmoteStats(AluCog):
     def __init__(self, bot: AluBot, *args: Any, **kwargs: Any) -> None:
         super().__init__(bot, *args, **kwargs)
         self._batch_total: defaultdict[int, Counter[int]] = defaultdict(Counter)
-        self._batch_last_year: list[BatchLastYearEntry] = []
+        self._batch_usages: list[UsageRecord] = []
         self._batch_lock = asyncio.Lock()
+        self._partitions: set[datetime.date] = set()
+        """Months that are known to have a partition in `emote_stats_usages`."""
 
         self.bulk_insert.add_exception_type(asyncpg.PostgresConnectionError)
 
@@ -61,94 +75,101 @@ class EmoteStats(AluCog):
         self.clean_up_old_records.stop()
         await super().cog_unload()
 
-    @commands.Cog.listener("on_message")
-    async def create_emote_usage_batches(self, message: discord.Message) -> None:
+    # while we are testing this feature, let's only limit the data to the community server
+    # maybe expand in future if needed? `guild_id` column is already implemented.
+    # exclude messages from bots but include webhooks so stuff like NQN can work with stats.
+    @message_handler(guilds=(const.Guild.community,), bots=False, my_bots=False, has_emotes=True)
+    async def create_emote_usage_batches(self, ctx: MessageContext) -> None:
         """Collects emote usage data in batches from discord messages to be ready for database INSERT.
 
         Parameters
         ----------
-        message: discord.Message
-            message to filter emotes from.
+        ctx: MessageContext
+            Context of the message to take emotes from.
         """
-        if message.guild is None or message.guild.id != const.Guild.community:
-            # while we are testing this feature, let's only limit the data to the community server
-            # maybe expand in future if needed? `guild_id` column is already implemented.
-            return
-
-        if message.author.bot and not message.webhook_id:
-            # exclude messages from bots but include webhooks so stuff like NQN can work with stats.
-            return
+        message = ctx.message
+        assert message.guild  # guild only filter
 
-        matches = EMOJI_REGEX.findall(message.content)
-        if not matches:
-            return
-
-        # remove duplicates per message (yes, I love spamming triple emotes.)
-        matches = list(dict.fromkeys(matches))
+        # `emote_ids` are already without duplicates per message (yes, I love spamming triple emotes.)
+        matches = ctx.emote_ids
 
         async with self._batch_lock:
             # TOTAL COUNT
-            self._batch_total[message.guild.id].update(map(int, matches))
-
-            # LAST YEAR COUNT
-            self._batch_last_year.extend(
-                [
-                    {
-                        "emote_id": int(x),
-                        "guild_id": message.guild.id,
-                        "author_id": message.author.id,
-                        "used": message.created_at.isoformat(),
-                    }
-                    for x in matches
-                ],
-            )
+            self._batch_total[message.guild.id].update(matches)
+
+            # RAW USAGES (`used` is naive UTC since the column is `TIMESTAMP`)
+            used = message.created_at.replace(tzinfo=None)
+            self._batch_usages.extend((emote_id, message.guild.id, message.author.id, used) for emote_id in matches)
+
+    async def ensure_partitions(self, months: set[datetime.date]) -> None:
+        """Make sure `emote_stats_usages` has partitions for the given months (first days of them)."""
+        missing = months - self._partitions
+        if not missing:
+            return
+        await self.bot.pool.executemany(
+            "SELECT emote_stats_create_partition($1::date)", [(month,) for month in sorted(missing)]
+        )
+        self._partitions |= missing
 
     @aluloop(seconds=60.0)
     async def bulk_insert(self) -> None:
-        """Bulk insert gathered emoji stats in the last minute."""
+        """Bulk insert gathered emoji stats in the last minute.
+
+        * Raw usages are streamed into `emote_stats_usages` with `COPY` (asyncpg uses the binary format for it)
+            instead of being serialized into one huge JSON parameter and parsed back on the server;
+        * `emote_stats_total` and `emote_stats_daily` rollups are upserted with counts pre-aggregated right here,
+            so the stats commands never have to `COUNT(*)` the raw usages.
+        """
         async with self._batch_lock:
-            if not self._batch_last_year:
+            if not self._batch_usages:
                 # there was no data to commit to the database.
                 return
 
+            await self.ensure_partitions({month_start(used) for _, _, _, used in self._batch_usages})
+
             # TOTAL COUNT
-            transformed = [
-                {"guild": guild_id, "emote": emote_id, "added": count}
-                for guild_id, data in self._batch_total.items()
-                for emote_id, count in data.items()
-            ]
+            total_guild_ids: list[int] = []
+            total_emote_ids: list[int] = []
+            total_counts: list[int] = []
+            for guild_id, data in self._batch_total.items():
+                for emote_id, count in data.items():
+                    total_guild_ids.append(guild_id)
+                    total_emote_ids.append(emote_id)
+                    total_counts.append(count)
+
             query_total = """
                 INSERT INTO emote_stats_total (guild_id, emote_id, total)
-                    SELECT x.guild, x.emote, x.added
-                    FROM jsonb_to_recordset($1::jsonb) AS
-                    x(
-                        guild BIGINT,
-                        emote BIGINT,
-                        added INT
-                    )
+                    SELECT * FROM unnest($1::bigint[], $2::bigint[], $3::int[])
                 ON CONFLICT (guild_id, emote_id) DO UPDATE
                 SET total = emote_stats_total.total + excluded.total;
             """
 
-            # LAST YEAR COUNT
-            query_last_year = """
-                INSERT INTO emote_stats_last_year (emote_id, guild_id, author_id, used)
-                    SELECT x.emote_id, x.guild_id, x.author_id, x.used
-                    FROM jsonb_to_recordset($1::jsonb) AS
-                    x(
-                        emote_id BIGINT,
-                        guild_id BIGINT,
-                        author_id BIGINT,
-                        used TIMESTAMP
-                    )
-                """
+            # DAILY ROLLUPS
+            daily = Counter((guild_id, emote_id, used.date()) for emote_id, guild_id, _, used in self._batch_usages)
+            query_daily = """
+                INSERT INTO emote_stats_daily (guild_id, emote_id, day, total)
+                    SELECT * FROM unnest($1::bigint[], $2::bigint[], $3::date[], $4::int[])
+                ON CONFLICT (guild_id, day, emote_id) DO UPDATE
+                SET total = emote_stats_daily.total + excluded.total;
+            """
+            daily_keys = list(daily)
+
             async with self.bot.pool.acquire() as connection:
                 tr = connection.transaction()
                 await tr.start()
 
                 try:
-                    await connection.execute(query_total, transformed)
-                    await connection.execute(query_last_year, self._batch_last_year)
+                    await connection.execute(query_total, total_guild_ids, total_emote_ids, total_counts)
+                    await connection.execute(
+                        query_daily,
+                        [guild_id for guild_id, _, _ in daily_keys],
+                        [emote_id for _, emote_id, _ in daily_keys],
+                        [day for _, _, day in daily_keys],
+                        [daily[key] for key in daily_keys],
+                    )
+                    await connection.copy_records_to_table(
+                        "emote_stats_usages", records=self._batch_usages, columns=USAGE_COLUMNS
+                    )
                 except Exception:
                     await tr.rollback()
                     raise
@@ -156,7 +177,7 @@ class EmoteStats(AluCog):
                     await tr.commit()
 
             self._batch_total.clear()
-            self._batch_last_year.clear()
+            self._batch_usages.clear()
 
     emotestats_group = app_commands.Group(
         name="emote-stats",
@@ -216,21 +237,18 @@ class EmoteStats(AluCog):
             """
             rows: list[tuple[int, int]] = list(await self.bot.pool.fetch(query, interaction.guild.id, emote_ids))
         else:
-            now = datetime.datetime.now(datetime.UTC)
-            if timeframe == "month":
-                track_point = now - datetime.timedelta(days=30)
-                clause = f"AND used > '{track_point.isoformat()}'::date"
-            elif timeframe == "year":
-                clause = ""
-
-            query = f"""
-                SELECT emote_id, COUNT(*) as "total"
-                FROM emote_stats_last_year
-                WHERE guild_id = $1 AND emote_id = ANY($2::bigint[]) {clause}
+            period = datetime.timedelta(days=30) if timeframe == "month" else RETENTION
+            track_point = (datetime.datetime.now(datetime.UTC) - period).date()
+            query = """
+                SELECT emote_id, SUM(total)::int AS "total"
+                FROM emote_stats_daily
+                WHERE guild_id = $1 AND emote_id = ANY($2::bigint[]) AND day > $3
                 GROUP BY emote_id
                 ORDER BY total DESC;
             """
-            rows: list[tuple[int, int]] = list(await self.bot.pool.fetch(query, interaction.guild.id, emote_ids))
+            rows: list[tuple[int, int]] = list(
+                await self.bot.pool.fetch(query, interaction.guild.id, emote_ids, track_point)
+            )
 
         rows.extend([(emote_id, 0) for emote_id in emote_ids if emote_id not in [row[0] for row in rows]])
 
@@ -317,22 +335,41 @@ class EmoteStats(AluCog):
 
     @aluloop(time=datetime.time(hour=12, minute=11, second=45))
     async def clean_up_old_records(self) -> None:
-        """Clean up "way too old" records from the Last Year emote usage database.
+        """Clean up "way too old" records from the raw emote usages and daily rollups.
 
         I'm kinda afraid of running out of memory so I'm just keeping a one year records max.
         If I'm proven wrong and we can hold much more data than this - I will consider extending the database.
         But for now - we clean up the database from 1 year+ records.
 
+        Raw usages are partitioned by month so instead of a huge `DELETE` (and the vacuum after it)
+        we simply drop partitions that are fully out of the retention window.
+        This loop also makes sure the partitions for this and the next month exist.
+
         Note that this doesn't affect `emote_stats_total` in any way. Everything is correct there.
         """
         async with self._batch_lock:
-            clean_up_dt = datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=365)
+            today = datetime.datetime.now(datetime.UTC).date()
+            await self.ensure_partitions({month_start(today), next_month_start(today)})
 
+            clean_up_date = today - RETENTION
             query = """
-                    DELETE FROM emote_stats_last_year
-                    WHERE used < $1::date
-                """
-            await self.bot.pool.execute(query, clean_up_dt)
+                SELECT child.relname AS name
+                FROM pg_inherits
+                JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+                JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+                WHERE parent.relname = 'emote_stats_usages';
+            """
+            rows: list[PartitionRow] = await self.bot.pool.fetch(query)
+            for row in rows:
+                # partitions are named `emote_stats_usages_YYYY_MM` by `emote_stats_create_partition`
+                year, month_number = row["name"].removeprefix("emote_stats_usages_").split("_")
+                month = datetime.date(int(year), int(month_number), 1)
+                if next_month_start(month) <= clean_up_date:
+                    await self.bot.pool.execute(f'DROP TABLE IF EXISTS "{row["name"]}"')
+                    self._partitions.discard(month)
+
+            query = "DELETE FROM emote_stats_daily WHERE day < $1"
+            await self.bot.pool.execute(query, clean_up_date)
 
     @emotestats_group.command(name="specific")
     async def emotestats_specific(self, interaction: AluInteraction, emote: str) -> None:
@@ -388,28 +425,32 @@ class EmoteStats(AluCog):
                 self.usage_per_day(emoji.created_at, emote_usage_total),
             ]
 
+            track_point = (datetime.datetime.now(datetime.UTC) - RETENTION).date()
+
             # last year total
             query = """
-                SELECT COUNT(*) as "total"
-                FROM emote_stats_last_year
-                WHERE guild_id = $1;
+                SELECT COALESCE(SUM(total), 0)::int AS "total"
+                FROM emote_stats_daily
+                WHERE guild_id = $1 AND day > $2;
             """
-            all_emotes_last_year: int = await self.bot.pool.fetchval(query, interaction.guild.id)
+            all_emotes_last_year: int = await self.bot.pool.fetchval(query, interaction.guild.id, track_point)
 
             # last year this emote
             query = """
-                SELECT COUNT(*) as "total"
-                FROM emote_stats_last_year
-                WHERE emote_id = $1 AND guild_id = $2;
+                SELECT COALESCE(SUM(total), 0)::int AS "total"
+                FROM emote_stats_daily
+                WHERE emote_id = $1 AND guild_id = $2 AND day > $3;
             """
-            emote_usage_last_year: int = await self.bot.pool.fetchval(query, emoji.id, interaction.guild.id)
+            emote_usage_last_year: int = await self.bot.pool.fetchval(
+                query, emoji.id, interaction.guild.id, track_point
+            )
 
             last_year_period = [
                 "Last Year",
                 emote_usage_last_year,
-                f"{emote_usage_last_year / all_emotes_last_year:.1%}",
+                f"{emote_usage_last_year / (all_emotes_last_year or 1):.1%}",
                 self.usage_per_day(
-                    max(emoji.created_at, datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=365)),
+                    max(emoji.created_at, datetime.datetime.now(datetime.UTC) - RETENTION),
                     emote_usage_last_year,
                 ),
             ]
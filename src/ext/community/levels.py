@@ -3,19 +3,26 @@ from __future__ import annotations
 import asyncio
 import datetime
 import itertools
-from typing import TYPE_CHECKING, Literal, TypedDict, override
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple, TypedDict, override
 
+import asyncpg
 import discord
+import orjson
 from discord import app_commands
-from discord.ext import commands
-from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from lru import LRU
+from PIL import Image, ImageDraw
 from tabulate import tabulate
 
-from bot import AluCog, aluloop
-from utils import const, errors, fmt, pages
+from bot import AluCog, aluloop, message_handler
+from utils import const, errors, fmt, fonts, pages, profile_cards
 
 if TYPE_CHECKING:
-    from bot import AluBot, AluInteraction
+    from collections.abc import Iterable
+
+    from bot import AluBot, AluInteraction, MessageContext
 
     class RemoveLongGoneRow(TypedDict):
         id: int
@@ -32,12 +39,49 @@ if TYPE_CHECKING:
         exp: int
         rep: int
 
+    class MemberActivityQueryRow(TypedDict):
+        id: int
+        exp: int
+        rep: int
+        last_seen: datetime.datetime
+
+    class FlushActivityQueryRow(TypedDict):
+        id: int
+        exp: int
+        rep: int
+
+    class ActivityDelta(TypedDict):
+        id: int
+        msg_count: int
+        exp: int
+        rep: int
+        last_seen: str
+
+    type RankCardKey = tuple[int, int, int, int, str, tuple[int, int, int], str]
+    """`(member_id, exp, rep, place, avatar_hash, color, display_name)`"""
+
 
 __all__ = ("Levels",)
 
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
 
 LAST_SEEN_TIMEOUT = 60
 
+FLUSH_INTERVAL = 60.0
+"""Seconds between write-behind flushes into the database."""
+
+JOURNAL_PATH = Path(".alubot/levels_journal.json")
+"""Local journal of deltas that are not confirmed by the database yet, replayed on the cog load."""
+JOURNAL_INTERVAL = 1.0
+"""Seconds between journal writes. This is how much counting a crash (or a kill) can lose at most."""
+
+ACTIVITY_IDLE_TIMEOUT = datetime.timedelta(minutes=15)
+"""Members with nothing to flush who haven't been active for this long are evicted from `Levels.activity`."""
+
+RANK_CARD_CACHE_SIZE = 64
+"""Maximum amount of rendered `/rank` cards to keep in memory."""
+
 # fmt: off
 exp_lvl_table = [
         5, 230, 600, 1080, 1660,  # 1-5
@@ -62,22 +106,275 @@ def get_exp_for_next_level(lvl: int) -> int:
     return exp_lvl_table[lvl]
 
 
+class RankImageSpec(NamedTuple):
+    avatar: Image.Image
+    display_name: str
+    color: tuple[int, int, int]
+    exp: int
+    prev_lvl_exp: int
+    next_lvl_exp: int
+    lvl: int
+    place: int
+    rep: int
+
+
+def build_rank_image(spec: RankImageSpec) -> Image.Image:
+    """Build Rank Image."""
+    canvas = profile_cards.background().copy()
+    canvas_w, canvas_h = canvas.size
+    avatar_side = profile_cards.avatar_size()
+
+    left = canvas_w - avatar_side
+    top = int((canvas_h - avatar_side) / 2)
+    profile_cards.paste_circle_avatar(canvas, spec.avatar, left, top)
+
+    d = ImageDraw.Draw(canvas)
+    d.rectangle((0, canvas_h * 6 / 7, canvas_w, canvas_h), fill=(98, 98, 98))
+    d.rectangle(
+        (0, canvas_h * 6 / 7, (spec.exp - spec.prev_lvl_exp) / (spec.next_lvl_exp - spec.prev_lvl_exp) * canvas_w, canvas_h),
+        fill=spec.color,
+    )
+
+    font = fonts.get(fonts.INTER_BLACK, 60)
+    d.text((canvas_w / 4, 0), spec.display_name, fill=(255, 255, 255), font=font)
+    d.text((canvas_w / 4, canvas_h * 2 / 6), f"{fmt.ordinal(spec.place)} rank", fill=(255, 255, 255), font=font)
+    d.text((canvas_w / 4, canvas_h * 3 / 6), f"{fmt.ordinal(spec.lvl)} level", fill=(255, 255, 255), font=font)
+    d.text((canvas_w / 4, canvas_h * 4 / 6), f"{spec.rep} rep", fill=(255, 255, 255), font=font)
+
+    msg = f"{spec.exp}/{spec.next_lvl_exp} EXP"
+    w4, _h4 = fonts.get_text_wh(msg, font)
+    d.text((canvas_w - w4, canvas_h * 5 / 6), msg, fill=(255, 255, 255), font=font)
+    return canvas
+
+
+@dataclass(slots=True)
+class MemberActivity:
+    """Current experience/reputation state of a community member together with not yet flushed deltas."""
+
+    exp: int
+    rep: int
+    last_seen: datetime.datetime
+    msg_count_delta: int = 0
+    exp_delta: int = 0
+    rep_delta: int = 0
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.msg_count_delta or self.exp_delta or self.rep_delta)
+
+    def delta(self, member_id: int) -> ActivityDelta:
+        """Not yet flushed deltas in the form of the bulk update (and the journal) entry."""
+        return {
+            "id": member_id,
+            "msg_count": self.msg_count_delta,
+            "exp": self.exp_delta,
+            "rep": self.rep_delta,
+            "last_seen": self.last_seen.isoformat(),
+        }
+
+
+def merge_deltas(deltas: Iterable[ActivityDelta]) -> list[ActivityDelta]:
+    """Merge deltas of the same member, the bulk update only applies one entry per row."""
+    merged: dict[int, ActivityDelta] = {}
+    for delta in deltas:
+        if (entry := merged.get(delta["id"])) is None:
+            merged[delta["id"]] = delta.copy()
+            continue
+        entry["msg_count"] += delta["msg_count"]
+        entry["exp"] += delta["exp"]
+        entry["rep"] += delta["rep"]
+        entry["last_seen"] = max(entry["last_seen"], delta["last_seen"], key=datetime.datetime.fromisoformat)
+    return list(merged.values())
+
+
 class Levels(AluCog):
     """Experience and Levels System.
 
     Just a lame XP per Message system with some fancy images and tables.
+
+    Counting is write-behind: messages only touch the in-memory `MemberActivity` state and
+    the accumulated deltas are flushed into `community_members` with a single bulk update
+    every `FLUSH_INTERVAL` (and on unload). Otherwise every community message meant 1-2 `UPDATE` queries.
+
+    To be safe under crashes, deltas not confirmed by the database yet are also written to a local `JOURNAL_PATH`
+    every `JOURNAL_INTERVAL` second. The journal is replayed on the cog load and truncated after every flush.
     """
 
+    def __init__(self, bot: AluBot, *args: Any, **kwargs: Any) -> None:
+        super().__init__(bot, *args, **kwargs)
+        self.activity: dict[int, MemberActivity] = {}
+        """Mapping `member_id -> MemberActivity` for recently active members."""
+        self.rank_cards: LRU[RankCardKey, bytes] = LRU(RANK_CARD_CACHE_SIZE)
+        """Rendered `/rank` cards, so repeated calls with nothing changed don't render again."""
+        self.unconfirmed: list[ActivityDelta] = []
+        """Deltas without a `MemberActivity` to return to, i.e. replayed from the journal or of evicted members."""
+        self.in_flight: list[ActivityDelta] = []
+        """Deltas of the bulk update that is being executed right now."""
+        self.journal_lock: asyncio.Lock = asyncio.Lock()
+        self.journal_data: bytes = b"[]"
+        """What the journal on the disk currently holds."""
+
+        self.flush_activity.add_exception_type(asyncpg.PostgresConnectionError)
+
     @override
     async def cog_load(self) -> None:
+        # replayed with the first flush which happens right away
+        self.unconfirmed = await asyncio.to_thread(self.read_journal)
         self.remove_long_gone_members.start()
+        self.journal_activity.start()
+        self.flush_activity.start()
         await super().cog_load()
 
     @override
     async def cog_unload(self) -> None:
         self.remove_long_gone_members.cancel()
+        self.flush_activity.cancel()
+        self.journal_activity.cancel()
+        try:
+            await self.flush()
+        finally:
+            # whatever failed to flush is left for the next load
+            await self.write_journal()
         await super().cog_unload()
 
+    def read_journal(self) -> list[ActivityDelta]:
+        """Read deltas that didn't make it into the database last time. This is blocking."""
+        try:
+            self.journal_data = JOURNAL_PATH.read_bytes()
+            deltas: list[ActivityDelta] = orjson.loads(self.journal_data)
+        except FileNotFoundError:
+            return []
+        except orjson.JSONDecodeError as exc:
+            # the crash happened mid-write, we can't do much about it
+            log.warning("Ignoring corrupted levels journal: %r", exc)
+            return []
+        if deltas:
+            log.info("Replaying %s member deltas from the levels journal.", len(deltas))
+        return merge_deltas(deltas)
+
+    async def write_journal(self) -> None:
+        """Write all deltas that are not confirmed by the database yet into the journal."""
+        async with self.journal_lock:
+            deltas = [
+                *self.unconfirmed,
+                *self.in_flight,
+                *(activity.delta(member_id) for member_id, activity in self.activity.items() if activity.dirty),
+            ]
+            data = orjson.dumps(deltas)
+            if data == self.journal_data:
+                return
+
+            def write() -> None:
+                if not deltas:
+                    JOURNAL_PATH.unlink(missing_ok=True)
+                    return
+                JOURNAL_PATH.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = JOURNAL_PATH.with_suffix(".tmp")
+                temp_path.write_bytes(data)
+                temp_path.replace(JOURNAL_PATH)
+
+            await asyncio.to_thread(write)
+            self.journal_data = data
+
+    @aluloop(seconds=JOURNAL_INTERVAL)
+    async def journal_activity(self) -> None:
+        """Journal deltas gathered since the last journal write."""
+        await self.write_journal()
+
+    async def get_activity(self, member_id: int) -> MemberActivity | None:
+        """Get the member's activity state, loading it from the database on the first access."""
+        if (activity := self.activity.get(member_id)) is not None:
+            return activity
+
+        query = "SELECT id, exp, rep, last_seen FROM community_members WHERE id=$1"
+        row: MemberActivityQueryRow | None = await self.bot.pool.fetchrow(query, member_id, prepared=True)
+        if row is None:
+            return None
+        # some other coroutine could have loaded it while we were waiting for the database
+        return self.activity.setdefault(member_id, MemberActivity(row["exp"], row["rep"], row["last_seen"]))
+
+    async def flush(self) -> None:
+        """Flush accumulated deltas into the database with a single bulk update.
+
+        Deltas are taken out of the state before the query (so new messages during it are not lost or counted twice)
+        and are put back if the query fails so a database hiccup doesn't eat experience.
+        The totals are refreshed from the database result, and idle members are evicted afterwards.
+        The journal is rewritten right after the query so flushed deltas can't be replayed twice.
+        """
+        deltas = list(self.unconfirmed)
+        for member_id, activity in self.activity.items():
+            if activity.dirty:
+                deltas.append(activity.delta(member_id))
+                activity.msg_count_delta = activity.exp_delta = activity.rep_delta = 0
+        if not deltas:
+            return
+
+        batch = merge_deltas(deltas)
+        self.unconfirmed = []
+        self.in_flight = batch
+
+        query = """
+            UPDATE community_members AS c
+            SET msg_count = c.msg_count + x.msg_count,
+                exp = c.exp + x.exp,
+                rep = c.rep + x.rep,
+                last_seen = GREATEST(c.last_seen, x.last_seen)
+            FROM jsonb_to_recordset($1::jsonb) AS
+            x(
+                id BIGINT,
+                msg_count INT,
+                exp INT,
+                rep INT,
+                last_seen TIMESTAMPTZ
+            )
+            WHERE c.id = x.id
+            RETURNING c.id, c.exp, c.rep;
+        """
+        try:
+            rows: list[FlushActivityQueryRow] = await self.bot.pool.fetch(query, batch)
+        except BaseException:
+            for entry in batch:
+                if activity := self.activity.get(entry["id"]):
+                    activity.msg_count_delta += entry["msg_count"]
+                    activity.exp_delta += entry["exp"]
+                    activity.rep_delta += entry["rep"]
+                else:
+                    self.unconfirmed.append(entry)
+            raise
+        finally:
+            self.in_flight = []
+        await self.write_journal()
+
+        totals = {row["id"]: row for row in rows}
+        for entry in batch:
+            if (activity := self.activity.get(entry["id"])) is None:
+                continue
+            if (row := totals.get(entry["id"])) is None:
+                # the row is gone (i.e. removed as long gone), it will be read again if the member comes back
+                del self.activity[entry["id"]]
+            else:
+                # other writers could have changed the totals, keep the deltas counted during the query on top
+                activity.exp = row["exp"] + activity.exp_delta
+                activity.rep = row["rep"] + activity.rep_delta
+        log.debug("Flushed activity of %s members", len(batch))
+        self.evict_idle()
+
+    def evict_idle(self) -> None:
+        """Forget members with nothing to flush who haven't been active for `ACTIVITY_IDLE_TIMEOUT`."""
+        now = datetime.datetime.now(datetime.UTC)
+        idle = [
+            member_id
+            for member_id, activity in self.activity.items()
+            if not activity.dirty and now - activity.last_seen > ACTIVITY_IDLE_TIMEOUT
+        ]
+        for member_id in idle:
+            del self.activity[member_id]
+
+    @aluloop(seconds=FLUSH_INTERVAL)
+    async def flush_activity(self) -> None:
+        """Flush gathered experience/reputation since the last flush."""
+        await self.flush()
+
     @app_commands.guilds(*const.MY_GUILDS)
     @app_commands.command(name="rank")
     @app_commands.rename(member_="member")
@@ -95,6 +392,8 @@ class Levels(AluCog):
             msg = "Sorry! our system does not count experience for bots."
             raise errors.ErroneousUsage(msg)
 
+        # make the database catch up with the counting so the rank and the place are up-to-date
+        await self.flush()
         query = "SELECT in_lvl, exp, rep FROM community_members WHERE id=$1"
         row: RankQueryRow = await interaction.client.pool.fetchrow(query, member.id)
         if not row["in_lvl"]:
@@ -107,49 +406,24 @@ class Levels(AluCog):
         query = "SELECT COUNT(*) FROM community_members WHERE exp > $1"
         place: int = 1 + await interaction.client.pool.fetchval(query, row["exp"])
 
-        member_avatar = await interaction.client.transposer.url_to_image(member.display_avatar.url)
-
-        def build_image() -> Image.Image:
-            """Build Rank Image."""
-            canvas = Image.open("./assets/images/profile/welcome.png", mode="r")
-            avatar = member_avatar.resize((round(canvas.size[1] * 1.00), round(canvas.size[1] * 1.00)))
-
-            canvas_w, canvas_h = canvas.size
-            avatar_w, avatar_h = avatar.size
-
-            left = int(canvas_w - avatar_w)
-            top = int((canvas_h - avatar_h) / 2)
-
-            mask_im = Image.new("L", avatar.size, 0)
-            draw = ImageDraw.Draw(mask_im)
-            draw.ellipse((0, 0, avatar_w, avatar_h), fill=255)
-            mask_im.save("./assets/images/profile/mask_circle.jpg", quality=95)
-
-            mask_im_blur = mask_im.filter(ImageFilter.GaussianBlur(5))
-            mask_im_blur.save("./assets/images/profile/mask_circle_blur.jpg", quality=95)
-
-            canvas.paste(avatar, (left, top), mask_im)
-
-            d = ImageDraw.Draw(canvas)
-            d.rectangle((0, canvas_h * 6 / 7, canvas_w, canvas_h), fill=(98, 98, 98))
-            d.rectangle(
-                (0, canvas_h * 6 / 7, (row["exp"] - prev_lvl_exp) / (next_lvl_exp - prev_lvl_exp) * canvas_w, canvas_h),
-                fill=member.color.to_rgb(),
+        color = member.color.to_rgb()
+        # level and exp bounds are derived from exp, so they are not a part of the key
+        key = (member.id, row["exp"], row["rep"], place, member.display_avatar.key, color, member.display_name)
+        if (rank_image := self.rank_cards.get(key)) is None:
+            transposer = interaction.client.transposer
+            spec = RankImageSpec(
+                avatar=await transposer.avatar_to_image(member.display_avatar, profile_cards.avatar_size()),
+                display_name=member.display_name,
+                color=color,
+                exp=row["exp"],
+                prev_lvl_exp=prev_lvl_exp,
+                next_lvl_exp=next_lvl_exp,
+                lvl=lvl,
+                place=place,
+                rep=row["rep"],
             )
-
-            font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 60)
-            d.text((canvas_w / 4, 0), member.display_name, fill=(255, 255, 255), font=font)
-            d.text((canvas_w / 4, canvas_h * 2 / 6), f"{fmt.ordinal(place)} rank", fill=(255, 255, 255), font=font)
-            d.text((canvas_w / 4, canvas_h * 3 / 6), f"{fmt.ordinal(lvl)} level", fill=(255, 255, 255), font=font)
-            d.text((canvas_w / 4, canvas_h * 4 / 6), f"{row['rep']} rep", fill=(255, 255, 255), font=font)
-
-            msg = f"{row['exp']}/{next_lvl_exp} EXP"
-            w4, _h4 = interaction.client.transposer.get_text_wh(msg, font)
-            d.text((canvas_w - w4, canvas_h * 5 / 6), msg, fill=(255, 255, 255), font=font)
-            return canvas
-
-        rank_image = await asyncio.to_thread(build_image)
-        file = interaction.client.transposer.image_to_file(rank_image, filename="rank.png")
+            rank_image = self.rank_cards[key] = await interaction.client.renderer.render(build_rank_image, spec)
+        file = interaction.client.transposer.bytes_to_file(rank_image, filename="rank.png")
         await interaction.response.send_message(file=file)
 
     @app_commands.guilds(*const.MY_GUILDS)
@@ -164,6 +438,7 @@ class Levels(AluCog):
         """
         guild = self.community.guild
 
+        await self.flush()
         query = f"""
             SELECT id, exp, rep
             FROM community_members
@@ -222,29 +497,24 @@ class Levels(AluCog):
         )
         await paginator.start()
 
-    @commands.Cog.listener(name="on_message")
-    async def experience_counting(self, message: discord.Message) -> None:
-        """Message listener that counts experience points."""
-        if message.author.bot:
-            return
-
-        if not message.guild or message.guild.id != const.Guild.community:
+    @message_handler(guilds=(const.Guild.community,), humans_only=True)
+    async def experience_counting(self, ctx: MessageContext) -> None:
+        """Message handler that counts experience points."""
+        message = ctx.message
+        assert message.guild  # guild only filter
+        activity = await self.get_activity(message.author.id)
+        if activity is None:
             return
 
-        query = """
-            WITH m AS (SELECT last_seen FROM community_members WHERE id=$1)
-            UPDATE community_members
-            SET msg_count = msg_count+1, last_seen = (now() at time zone 'utc')
-            WHERE id = $1
-            RETURNING (SELECT last_seen from m)
-        """
-        last_seen: datetime.datetime = await self.bot.pool.fetchval(query, message.author.id)
-
         author: discord.Member = message.author  # type: ignore[reportAssignmentType]
         now = datetime.datetime.now(datetime.UTC)
+        last_seen, activity.last_seen = activity.last_seen, now
+        activity.msg_count_delta += 1
+
         if now - last_seen > datetime.timedelta(seconds=LAST_SEEN_TIMEOUT):
-            query = "UPDATE community_members SET exp = exp+1 WHERE id = $1 RETURNING exp"
-            exp = await self.bot.pool.fetchval(query, message.author.id)
+            activity.exp += 1
+            activity.exp_delta += 1
+            exp = activity.exp
             level = get_level(exp)
 
             if exp == get_exp_for_next_level(get_level(exp) - 1):
@@ -271,29 +541,29 @@ class Levels(AluCog):
         if member == interaction.user or member.bot:
             msg = "You can't give reputation to yourself or bots."
             raise errors.ErroneousUsage(msg)
-        query = "UPDATE community_members SET rep=rep+1 WHERE id=$1 RETURNING rep"
-        reputation: int = await self.bot.pool.fetchval(query, member.id)
+        activity = await self.get_activity(member.id)
+        if activity is None:
+            msg = "This member is not in the database."
+            raise errors.ErroneousUsage(msg)
+        activity.rep += 1
+        activity.rep_delta += 1
+        reputation = activity.rep
         embed = discord.Embed(
             color=discord.Color.green(),
             description=f"Added +1 reputation to **{member.display_name}**: now {reputation} reputation",
         )
         await interaction.response.send_message(embed=embed)
 
-    @commands.Cog.listener(name="on_message")
-    async def reputation_counting(self, message: discord.Message) -> None:
-        """Message listener that counts experience points."""
-        if message.author.bot:
-            return
-
-        if not message.guild or message.guild.id != const.Guild.community:
-            return
-
+    @message_handler(guilds=(const.Guild.community,), humans_only=True, has_mentions=True, contains=thanks_words)
+    async def reputation_counting(self, ctx: MessageContext) -> None:
+        """Message handler that counts reputation points."""
+        message = ctx.message
         for item in self.thanks_words:  # reputation part
-            if item in message.content.lower():
+            if item in ctx.content_lower:
                 for member in message.mentions:
-                    if member != message.author:
-                        query = "UPDATE community_members SET rep=rep+1 WHERE id=$1"
-                        await self.bot.pool.execute(query, member.id)
+                    if member != message.author and (activity := await self.get_activity(member.id)):
+                        activity.rep += 1
+                        activity.rep_delta += 1
 
     @aluloop(time=datetime.time(hour=13, minute=13, tzinfo=datetime.UTC))
     async def remove_long_gone_members(self) -> None:
@@ -316,6 +586,7 @@ class Levels(AluCog):
             if person is None and discord.utils.utcnow() - row["last_seen"] > datetime.timedelta(days=365):
                 query = "DELETE FROM community_members WHERE id=$1"
                 await self.bot.pool.execute(query, row["id"])
+                self.activity.pop(row["id"], None)
                 embed = discord.Embed(color=0xE6D690, description=f"id = {row['id']}").set_author(
                     name=f"{row['name']} was removed from the database"
                 )
@@ -55,6 +55,10 @@ class TwitchNotifications(AluCog):
     async def twitch_tv_live_notifications(self, payload: twitchio.StreamOnline) -> None:
         """Receive notifications for my stream via eventsub."""
         # I only have notifications for myself
+        # while the bot is subscribed to FPC streamers for `LiveStreamRegistry` too
+        if payload.broadcaster.id != const.TwitchID.Me:
+            return
+
         irene = payload.broadcaster
         irene_user = await irene.user()
         channel_info = await irene.fetch_channel_info()
@@ -139,8 +143,11 @@ class TwitchNotifications(AluCog):
             # like get all folks with streaming status and clear the role
 
     @commands.Cog.listener("on_twitchio_stream_offline")
-    async def twitch_tv_offline_edit_notification(self, _: twitchio.StreamOffline) -> None:
+    async def twitch_tv_offline_edit_notification(self, payload: twitchio.StreamOffline) -> None:
         """Starts the task to edit the notification message."""
+        if payload.broadcaster.id != const.TwitchID.Me:
+            return
+
         await asyncio.sleep(11 * 60)
         message = self.last_notification_message
         if message is None:
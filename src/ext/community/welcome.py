@@ -1,14 +1,13 @@
 from __future__ import annotations
 
-import asyncio
-from typing import TYPE_CHECKING, TypedDict
+from typing import TYPE_CHECKING, NamedTuple, TypedDict
 
 import discord
 from discord.ext import commands
-from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from PIL import Image, ImageDraw
 
 from bot import AluCog
-from utils import const
+from utils import const, fonts, profile_cards
 
 if TYPE_CHECKING:
     from bot import AluBot, AluContext
@@ -23,43 +22,39 @@ if TYPE_CHECKING:
         name: str
 
 
-class Welcome(AluCog):
-    async def welcome_image(self, member: discord.User | discord.Member) -> Image.Image:
-        avatar_asset = await self.bot.transposer.url_to_image(member.display_avatar.url)
-
-        def build_image() -> Image.Image:
-            canvas = Image.open("./assets/images/profile/welcome.png", mode="r")
-            avatar = avatar_asset.resize((round(canvas.size[1] * 1.00), round(canvas.size[1] * 1.00)))
+class WelcomeImageSpec(NamedTuple):
+    avatar: Image.Image
+    display_name: str
 
-            canvas_w, canvas_h = canvas.size
-            avatar_w, avatar_h = avatar.size
 
-            left = int((canvas_w - avatar_w) / 2)
-            top = int((canvas_h - avatar_h) / 2)
+def build_welcome_image(spec: WelcomeImageSpec) -> Image.Image:
+    """Build Welcome Image."""
+    canvas = profile_cards.background().copy()
+    canvas_w, canvas_h = canvas.size
+    avatar_side = profile_cards.avatar_size()
 
-            mask_im = Image.new("L", avatar.size, 0)
-            draw = ImageDraw.Draw(mask_im)
-            draw.ellipse((0, 0, avatar_w, avatar_h), fill=255)
-            mask_im.save("./assets/images/profile/mask_circle.jpg", quality=95)
+    left = int((canvas_w - avatar_side) / 2)
+    top = int((canvas_h - avatar_side) / 2)
+    profile_cards.paste_circle_avatar(canvas, spec.avatar, left, top)
 
-            mask_im_blur = mask_im.filter(ImageFilter.GaussianBlur(5))
-            mask_im_blur.save("./assets/images/profile/mask_circle_blur.jpg", quality=95)
+    font = fonts.get(fonts.INTER_BLACK, 80)
+    d = ImageDraw.Draw(canvas)
+    msg = spec.display_name
+    w1, h1 = fonts.get_text_wh(msg, font)
+    d.text(((canvas_w - w1) / 1 - 10, (canvas_h - h1) / 1 - 10), msg, fill=(255, 255, 255), font=font)
 
-            canvas.paste(avatar, (left, top), mask_im)
+    font = fonts.get(fonts.MONSIEUR_LA_DOULAISE, 90)
+    msg = "Welcome !"
+    w2, h2 = fonts.get_text_wh(msg, font)
+    d.text(((canvas_w - w2) / 1 - 10, (canvas_h - h2) / 1 - 10 - h1 - 10), msg, fill=(255, 255, 255), font=font)
+    return canvas
 
-            font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 80)
-            d = ImageDraw.Draw(canvas)
-            msg = member.display_name
-            w1, h1 = self.bot.transposer.get_text_wh(msg, font)
-            d.text(((canvas_w - w1) / 1 - 10, (canvas_h - h1) / 1 - 10), msg, fill=(255, 255, 255), font=font)
 
-            font = ImageFont.truetype("./assets/fonts/MonsieurLaDoulaise-Regular.ttf", 90)
-            msg = "Welcome !"
-            w2, h2 = self.bot.transposer.get_text_wh(msg, font)
-            d.text(((canvas_w - w2) / 1 - 10, (canvas_h - h2) / 1 - 10 - h1 - 10), msg, fill=(255, 255, 255), font=font)
-            return canvas
-
-        return await asyncio.to_thread(build_image)
+class Welcome(AluCog):
+    async def welcome_image(self, member: discord.User | discord.Member) -> bytes:
+        avatar = await self.bot.transposer.avatar_to_image(member.display_avatar, profile_cards.avatar_size())
+        spec = WelcomeImageSpec(avatar=avatar, display_name=member.display_name)
+        return await self.bot.renderer.render(build_welcome_image, spec)
 
     async def get_send_welcome_kwargs(self, member: discord.Member, back: bool = False) -> SendWelcomeKwargs:
         image = await self.welcome_image(member)
@@ -86,7 +81,7 @@ class Welcome(AluCog):
             description = f"Chat, it's a new bot in our server. Use it wisely {const.Emote.peepoComfy}"
 
         embed = discord.Embed(color=const.Color.prpl, description=description)
-        return {"content": content_text, "embed": embed, "file": self.bot.transposer.image_to_file(image)}
+        return {"content": content_text, "embed": embed, "file": self.bot.transposer.bytes_to_file(image)}
 
     @commands.Cog.listener("on_member_join")
     async def welcome_new_member(self, member: discord.Member) -> None:
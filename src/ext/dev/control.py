@@ -8,18 +8,22 @@ import platform
 import socket
 import sys
 from pathlib import Path
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING, Literal, override
 
 import discord
 import psutil
 from discord import app_commands
 
-from utils import const
+from bot import aluloop
+from utils import const, fmt
 
 from ._base import BaseDevCog
 
 if TYPE_CHECKING:
-    from bot import AluBot, AluInteraction
+    from collections.abc import Callable
+
+    from bot import AluBot, AluInteraction, LoopStats
+    from bot.instrumented_pool import InstrumentedPool, QueryStats
 
 __all__ = ("Control",)
 
@@ -37,6 +41,34 @@ class Control(BaseDevCog):
         default_permissions=discord.Permissions(manage_guild=True),
     )
 
+    @override
+    async def cog_load(self) -> None:
+        self.task_telemetry_digest.start()
+        await super().cog_load()
+
+    @override
+    async def cog_unload(self) -> None:
+        self.task_telemetry_digest.cancel()
+        await super().cog_unload()
+
+    def task_telemetry_lines(self, n: int = 5, *, key: Callable[[LoopStats], float] | None = None) -> str:
+        """Format `aluloop` tasks telemetry: the heaviest tasks and the event loop lag."""
+        telemetry = self.bot.task_telemetry
+        lines = [
+            f"{stats.name}: {stats.durations.count} runs, {stats.durations.total:.1f}s total, "
+            f"p95<={stats.durations.percentile(0.95):g}s max={stats.durations.max:.1f}s"
+            + (f"\n  overruns={stats.overruns} skipped={stats.skipped}" if stats.overruns else "")
+            + (f"\n  failures={stats.failures}" if stats.failures else "")
+            + (f"\n  lag blamed={stats.lag_blamed:.1f}s" if stats.lag_blamed else "")
+            for stats in (telemetry.top(n, key=key) if key else telemetry.top(n))
+        ]
+        lag = telemetry.lag
+        lines.append(
+            f"Event loop lag: p50<={lag.percentile(0.5) * 1000:g}ms p99<={lag.percentile(0.99) * 1000:g}ms "
+            f"max={lag.max * 1000:.0f}ms ({lag.count} samples)"
+        )
+        return "\n".join(lines)
+
     @system_group.command(name="information")
     async def system_information(self, interaction: AluInteraction) -> None:
         """🔬 Get system info about machine hosting the bot."""
@@ -157,6 +189,18 @@ class Control(BaseDevCog):
         embed.add_field(name="Inner Tasks", value=f"Total: {len(inner_tasks)}\nFailed: {bad_inner_tasks or 'None'}")
         embed.add_field(name="Events Waiting", value=f"Total: {len(event_tasks)}", inline=False)
 
+        handlers_value = "\n".join(
+            f"{handler.name}: {handler.calls} calls, {handler.total_time:.1f}s total, {handler.max_time * 1000:.0f}ms max"
+            for handler in self.bot.message_router.top()
+        )
+        embed.add_field(name="Message Handlers", value=fmt.code(handlers_value or "None"), inline=False)
+
+        overrunning = sum(bool(stats.overruns) for stats in self.bot.task_telemetry.loops.values())
+        total_warnings += overrunning
+        embed.add_field(
+            name=f"Tasks (overrunning: {overrunning})", value=fmt.code(self.task_telemetry_lines()), inline=False
+        )
+
         process = psutil.Process()
         memory_usage = f"{process.memory_full_info().uss / 1024**2:.2f} MiB"
         cpu_usage = f"{process.cpu_percent() / cpu_count:.2f} % CPU" if (cpu_count := psutil.cpu_count()) else ""
@@ -172,6 +216,92 @@ class Control(BaseDevCog):
         embed.description = "\n".join(description)
         await interaction.followup.send(embed=embed)
 
+    @system_group.command(name="database")
+    @app_commands.choices(
+        sort_by=[
+            app_commands.Choice(name="Total time", value="total"),
+            app_commands.Choice(name="Calls", value="calls"),
+            app_commands.Choice(name="Mean time", value="mean"),
+            app_commands.Choice(name="Rows", value="rows"),
+        ]
+    )
+    async def system_database(
+        self,
+        interaction: AluInteraction,
+        sort_by: Literal["total", "calls", "mean", "rows"] = "total",
+        *,
+        reset: bool = False,
+    ) -> None:
+        """🔬 (#Hideout) Get stats of the database queries made via `bot.pool`.
+
+        Parameters
+        ----------
+        sort_by: Literal["total", "calls", "mean", "rows"] = "total"
+            What to sort the statements by.
+        reset: bool = False
+            Whether to reset the stats after showing them, i.e. to measure some change from scratch.
+        """
+        pool: InstrumentedPool = self.bot.pool  # pyright: ignore[reportAssignmentType]
+        keys: dict[str, Callable[[QueryStats], float]] = {
+            "total": lambda s: s.total_time,
+            "calls": lambda s: s.calls,
+            "mean": lambda s: s.mean_time,
+            "rows": lambda s: s.rows,
+        }
+
+        lines = [
+            f"{'P' if stats.prepared else ' '} {stats.call_site}\n"
+            f"  calls={stats.calls} rows={stats.rows} total={stats.total_time:.2f}s mean={stats.mean_time * 1000:.1f}ms "
+            f"p95<={stats.percentile(0.95) * 1000:.0f}ms max={stats.max_time * 1000:.0f}ms"
+            for stats in pool.top(10, key=keys[sort_by])
+        ]
+        embed = discord.Embed(
+            color=const.Color.prpl,
+            title="Database Query Stats",
+            description=fmt.code("\n".join(lines) or "No queries were made yet."),
+        ).set_footer(text=f"Since {pool.started_at:%Y-%m-%d %H:%M} UTC; P - prepared statement")
+
+        if pool.slow_queries:
+            embed.add_field(
+                name="Recent slow queries",
+                value="\n".join(
+                    f"{fmt.format_dt(sample.at, style='T')} `{sample.elapsed * 1000:.0f}ms` {sample.call_site}"
+                    for sample in list(pool.slow_queries)[-5:]
+                ),
+                inline=False,
+            )
+
+        if reset:
+            pool.reset_stats()
+        await interaction.response.send_message(embed=embed)
+
+    @aluloop(hours=6)
+    async def task_telemetry_digest(self) -> None:
+        """Send a digest of `aluloop` tasks telemetry for the last period and start a new one."""
+        telemetry = self.bot.task_telemetry
+        if self.task_telemetry_digest.current_loop == 0:
+            # the first iteration happens right on start-up, nothing to report yet
+            telemetry.reset()
+            return
+
+        embed = discord.Embed(
+            color=const.Color.prpl,
+            title="Tasks Telemetry Digest",
+            description=fmt.code(self.task_telemetry_lines(10)),
+        ).set_footer(text=f"Since {telemetry.started_at:%Y-%m-%d %H:%M} UTC")
+
+        if overrunning := [stats for stats in telemetry.loops.values() if stats.overruns]:
+            embed.color = const.Palette.yellow(shade=700)
+            embed.add_field(
+                name="Overrunning tasks",
+                value="\n".join(
+                    f"`{stats.name}`: {stats.overruns} overruns, {stats.skipped} skipped runs" for stats in overrunning
+                ),
+                inline=False,
+            )
+        telemetry.reset()
+        await self.bot.hideout.spam.send(embed=embed)
+
     async def send_logs_helper(self, interaction: AluInteraction, path: str) -> None:
         """Helper function to send project logs as a file with a command.
 
@@ -5,12 +5,13 @@ import datetime
 import logging
 import math
 import re
-from typing import TYPE_CHECKING, Literal, TypedDict, override
+from io import BytesIO
+from typing import TYPE_CHECKING, Literal, NamedTuple, TypedDict, override
 
 import discord
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from PIL import Image, ImageDraw, ImageOps
 
-from utils import const, fmt
+from utils import const, fmt, fonts
 from utils.base_fpc import BaseMatchToEdit, BaseMatchToSend
 from utils.dota import game_const
 
@@ -39,6 +40,224 @@ send_log = logging.getLogger("send_dota_fpc")
 edit_log = logging.getLogger("edit_dota_fpc")
 
 
+# Image builders below are module-level functions taking picklable specs
+# so `bot.renderer` can run them in a worker process as well as in a thread.
+
+
+class NotificationImageSpec(NamedTuple):
+    canvas: Image.Image
+    hero_images: list[Image.Image]
+    hero_size: tuple[int, int]
+    color: int
+    title: str
+    twitch_status: str
+
+
+def build_notification_image(spec: NotificationImageSpec) -> Image.Image:
+    """Build the image for FPC notification."""
+    send_log.debug("`build_notification_image` is starting")
+    canvas = spec.canvas
+
+    canvas_w, _canvas_h = canvas.size
+    draw = ImageDraw.Draw(canvas)
+
+    topbar_h = 70
+
+    def draw_picked_heroes() -> None:
+        """Draw picked heroes in the match."""
+        rectangle = Image.new("RGB", (canvas_w, topbar_h), fmt.color_to_str(spec.color))
+        ImageDraw.Draw(rectangle)
+        canvas.paste(rectangle)
+
+        hero_w, _hero_h = spec.hero_size  # (62, 35)
+        for count, hero_img in enumerate(spec.hero_images):
+            hero_img = ImageOps.expand(hero_img, border=(0, 3, 0, 0), fill=game_const.PLAYER_COLOR_MAP[count])
+            extra_space = 0 if count < 5 else 20  # math 640 - 62 * 10 = 20 where 640 is initial resolution.
+            canvas.paste(hero_img, (count * hero_w + extra_space, 0))
+
+    draw_picked_heroes()
+
+    def draw_player_hero_text() -> None:
+        """Draw "Player - Hero" text in the middle."""
+        font = fonts.get(fonts.INTER_BLACK, 33)
+        w, _h = fonts.get_text_wh(spec.title, font)
+        draw.text(((canvas_w - w) / 2, 35), spec.title, font=font, align="center")
+
+    draw_player_hero_text()
+
+    def draw_twitch_status() -> None:
+        """Write twitch status, like Live / Offline / NoTwitch."""
+        font = fonts.get(fonts.INTER_BLACK, 13)
+        text = spec.twitch_status
+        w, h = fonts.get_text_wh(text, font)
+        draw.text(xy=(canvas_w - w, topbar_h + 1 + h), text=text, font=font, fill=fmt.color_to_str(spec.color))
+
+    draw_twitch_status()
+
+    return canvas
+
+
+class StratzEditImageSpec(NamedTuple):
+    canvas: Image.Image
+    color: str
+    item_icon_images: list[Image.Image]
+    item_timings: list[str]
+    item_size: tuple[int, int]
+    neutral_item_image: Image.Image
+    ability_icon_images: list[Image.Image]
+    ability_size: tuple[int, int]
+    kda: str
+    outcome: str
+    talents: list[tuple[str, str]]
+    """`(display_name, fill_color)` pairs for the talent tree."""
+    facet_name: str
+    facet_color: str
+    facet_icon_image: Image.Image
+
+
+def build_stratz_edit_image(spec: StratzEditImageSpec) -> Image.Image:
+    """Build the edited image for FPC notification with the post-match data from Stratz."""
+    edit_log.debug("Building edited notification message.")
+    canvas = spec.canvas
+    canvas_w, canvas_h = canvas.size
+    draw = ImageDraw.Draw(canvas)
+
+    def draw_items_row() -> int:
+        """Draw items on a single row.
+
+        Returns height of the row to align other elements in the canvas.
+        """
+        # the height for items row, meaning items themselves are of this height.
+        # item_w, h is (69, 50) which matches 88/64 in proportion (original size).
+        item_w, h = spec.item_size
+        font = fonts.get(fonts.INTER_BLACK, 19)  # font for item timings
+
+        # rectangle for the row
+        rectangle = Image.new("RGB", (canvas_w, h), spec.color)
+        ImageDraw.Draw(rectangle)
+        canvas.paste(rectangle, (0, canvas_h - h))
+
+        # item images
+        for count, img in enumerate(spec.item_icon_images):
+            canvas.paste(img, (count * item_w, canvas_h - h))
+
+        # item timings
+        for count, item_timing in enumerate(spec.item_timings):
+            if item_timing:
+                _text_w, text_h = fonts.get_text_wh(item_timing, font)
+                draw.text((count * item_w, canvas_h - text_h), item_timing, font=font, align="left")
+
+        canvas.paste(im=spec.neutral_item_image, box=(canvas_w - item_w, canvas_h - h))
+        return h
+
+    items_h = draw_items_row()
+
+    def draw_abilities_row() -> int:
+        """Draw row representing the order of abilities in skill order of the player."""
+        _w, h = spec.ability_size  # (37, 37)
+
+        for count, img in enumerate(spec.ability_icon_images):
+            canvas.paste(img, (count * h, canvas_h - items_h - h))
+        return h
+
+    abilities_h = draw_abilities_row()
+
+    def draw_kda() -> float:
+        """Draw kda.
+
+        Returns height of the segment.
+        """
+        font = fonts.get(fonts.INTER_BLACK, 33)
+        _w, h = fonts.get_text_wh(spec.kda, font)
+        draw.text((0, canvas_h - items_h - abilities_h - h), spec.kda, font=font)
+        return h
+
+    kda_h = draw_kda()
+
+    def draw_outcome() -> float:
+        """Draw outcome of the game (Win or Loss).
+
+        Returns height of the segment.
+        """
+        font = fonts.get(fonts.INTER_BLACK, 33)
+        _w, h = fonts.get_text_wh(spec.outcome, font)
+        color_map = {
+            "Win": fmt.color_to_str(const.Palette.green(shade=800)),
+            "Loss": fmt.color_to_str(const.Palette.red(shade=900)),
+            "Not Scored": (255, 255, 255),
+        }
+        draw.text(
+            xy=(0, canvas_h - items_h - abilities_h - kda_h - h),
+            text=spec.outcome,
+            font=font,
+            fill=color_map[spec.outcome],
+        )
+        return h
+
+    outcome_h = draw_outcome()
+
+    def draw_talent_tree_choices() -> None:
+        """Draw talent tree choices.
+
+        Mirrors hero's talent tree. Chosen talents are marked with orange colour (otherwise black).
+        Draws mono-colour rectangles on the left/right side of the image.
+        """
+        font = fonts.get(fonts.INTER_BLACK, 15)
+        p = 6
+
+        for count, (talent_name, fill_color) in enumerate(spec.talents):
+            text_w, _text_h = fonts.get_text_wh(talent_name, font)
+
+            x = 0 if count % 2 else canvas_w - text_w
+            position = (x, canvas_h - items_h - abilities_h - kda_h - outcome_h - 20 - 26 * (count // 2))
+            x, y, u, v = draw.textbbox(position, talent_name, font=font)
+
+            draw.rectangle(xy=(x - p, y - p, u + p, v + p), fill=fill_color)
+            draw.text(xy=position, text=talent_name, font=font, align="right")
+
+    draw_talent_tree_choices()
+
+    def draw_facet() -> None:
+        """Draw facet icon+rectangle. Just a mono-colour rectangle with icon and title text."""
+        icon_h = 40
+        icon_p = 1
+        text_p = 8  # currently just left, right
+        font = fonts.get(fonts.INTER_BLACK, 22)
+
+        # text + rectangle
+        text_w, text_h = fonts.get_text_wh(spec.facet_name, font)
+        x, y, u, v = (
+            canvas_w - text_w - icon_h - 2 * text_p,
+            canvas_h - items_h - abilities_h - icon_h,
+            canvas_w,
+            canvas_h - items_h - abilities_h,
+        )
+        draw.rectangle(xy=(x, y, u, v), fill=spec.facet_color)
+        draw.text((x + icon_h + text_p, v - (icon_h + text_h) / 2), spec.facet_name, font=font)
+
+        # icon
+        resized_facet_image = spec.facet_icon_image.resize((icon_h - icon_p, icon_h - icon_p))
+        canvas.paste(resized_facet_image, (x + icon_p, y + icon_p), mask=resized_facet_image)
+
+    draw_facet()
+
+    return canvas
+
+
+def build_not_counted_edit_image(canvas: Image.Image) -> Image.Image:
+    """Build the edited image for FPC notification of a match that wasn't counted."""
+    edit_log.debug("Building edited notification message.")
+    _width, height = canvas.size
+
+    draw = ImageDraw.Draw(canvas)
+    font = fonts.get(fonts.INTER_BLACK, 45)
+    text = "Not Counted"
+    _text_w, text_h = fonts.get_text_wh(text, font)
+    draw.text(xy=(0, height - text_h), text=text, font=font, align="left", fill=str(discord.Color.dark_orange()))
+
+    return canvas
+
+
 class MatchToSend(BaseMatchToSend):
     def __init__(
         self,
@@ -78,7 +297,7 @@ class MatchToSend(BaseMatchToSend):
 
     async def get_twitch_data(self) -> TwitchData:
         send_log.debug("`get_twitch_data` is starting")
-        if self.twitch_id is None:
+        if self.twitch_id is None or (streamer := await self.bot.twitch.fetch_streamer(self.twitch_id)) is None:
             return {
                 "preview_url": game_const.FpcAsset.Placeholder640X360,
                 "display_name": self.player_name,
@@ -88,7 +307,6 @@ class MatchToSend(BaseMatchToSend):
                 "twitch_status": "NoTwitch",
                 "color": const.Palette.gray(),
             }
-        streamer = await self.bot.twitch.fetch_streamer(self.twitch_id)
         if streamer.live:
             twitch_status = "Live"
             vod_url = await streamer.vod_link(seconds_ago=self.long_ago)
@@ -109,59 +327,23 @@ class MatchToSend(BaseMatchToSend):
         }
 
     @override
-    async def notification_image(self, twitch_data: TwitchData, color: int) -> Image.Image:
+    async def notification_image(self, twitch_data: TwitchData, color: int) -> bytes:
         send_log.debug("`get_notification_image` is starting")
         # prepare stuff for the following PIL procedures
-        canvas = await self.bot.transposer.url_to_image(twitch_data["preview_url"])
         heroes = [await self.bot.dota.heroes.by_id(id_) for id_ in self.hero_ids]
-        hero_images = [await self.bot.transposer.url_to_image(hero.topbar_icon_url) for hero in heroes]
-
-        def build_notification_image() -> Image.Image:
-            """Image Builder."""
-            send_log.debug("`build_notification_image` is starting")
-
-            canvas_w, _canvas_h = canvas.size
-            draw = ImageDraw.Draw(canvas)
-
-            topbar_h = 70
-
-            def draw_picked_heroes() -> None:
-                """Draw picked heroes in the match."""
-                rectangle = Image.new("RGB", (canvas_w, topbar_h), fmt.color_to_str(color))
-                ImageDraw.Draw(rectangle)
-                canvas.paste(rectangle)
-
-                hero_w, hero_h = (62, 35)
-                for count, hero_img in enumerate(hero_images):
-                    hero_img = hero_img.resize((hero_w, hero_h))
-                    hero_img = ImageOps.expand(hero_img, border=(0, 3, 0, 0), fill=game_const.PLAYER_COLOR_MAP[count])
-                    extra_space = 0 if count < 5 else 20  # math 640 - 62 * 10 = 20 where 640 is initial resolution.
-                    canvas.paste(hero_img, (count * hero_w + extra_space, 0))
-
-            draw_picked_heroes()
-
-            def draw_player_hero_text() -> None:
-                """Draw "Player - Hero" text in the middle."""
-                font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 33)
-
-                text = f"{twitch_data['display_name']} - {self.player_hero.display_name}"
-                w, _h = self.bot.transposer.get_text_wh(text, font)
-                draw.text(((canvas_w - w) / 2, 35), text, font=font, align="center")
-
-            draw_player_hero_text()
-
-            def draw_twitch_status() -> None:
-                """Write twitch status, like Live / Offline / NoTwitch."""
-                font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 13)
-                text = twitch_data["twitch_status"]
-                w, h = self.bot.transposer.get_text_wh(text, font)
-                draw.text(xy=(canvas_w - w, topbar_h + 1 + h), text=text, font=font, fill=fmt.color_to_str(color))
-
-            draw_twitch_status()
-
-            return canvas
-
-        return await asyncio.to_thread(build_notification_image)
+        canvas, hero_images = await asyncio.gather(
+            self.bot.transposer.url_to_image(twitch_data["preview_url"]),
+            self.bot.dota.heroes.topbar_atlas.get_many([hero.topbar_icon_url for hero in heroes]),
+        )
+        spec = NotificationImageSpec(
+            canvas=canvas,
+            hero_images=hero_images,
+            hero_size=self.bot.dota.heroes.topbar_atlas.size,
+            color=color,
+            title=f"{twitch_data['display_name']} - {self.player_hero.display_name}",
+            twitch_status=twitch_data["twitch_status"],
+        )
+        return await self.bot.renderer.render(build_notification_image, spec)
 
     @override
     async def webhook_send_kwargs(self) -> RecipientKwargs:
@@ -172,7 +354,7 @@ class MatchToSend(BaseMatchToSend):
         notification_image = await self.notification_image(twitch_data, twitch_data["color"])
         title = f"{twitch_data['display_name']} - {self.player_hero.display_name}"
         filename = twitch_data["twitch_status"] + "-" + re.sub(r"[_' ]", "", title) + ".png"
-        image_file = self.bot.transposer.image_to_file(notification_image, filename=filename)
+        image_file = self.bot.transposer.bytes_to_file(notification_image, filename=filename)
         embed = (
             discord.Embed(
                 color=twitch_data["color"],
@@ -191,13 +373,17 @@ class MatchToSend(BaseMatchToSend):
         return {"embed": embed, "file": image_file, "username": title, "avatar_url": self.player_hero.topbar_icon_url}
 
     @override
-    async def insert_into_game_messages(self, message_id: int, channel_id: int) -> None:
+    async def insert_into_game_messages(self, messages: list[tuple[int, int]]) -> None:
         query = """
             INSERT INTO dota_messages (message_id, channel_id, match_id, friend_id, hero_id, player_name)
             VALUES ($1, $2, $3, $4, $5, $6)
         """
-        await self.bot.pool.execute(
-            query, message_id, channel_id, self.match_id, self.friend_id, self.player_hero.id, self.player_name
+        await self.bot.pool.executemany(
+            query,
+            [
+                (message_id, channel_id, self.match_id, self.friend_id, self.player_hero.id, self.player_name)
+                for message_id, channel_id in messages
+            ],
         )
 
 
@@ -258,16 +444,10 @@ class StratzMatchToEdit(BaseMatchToEdit):
         return f"<{self.__class__.__name__} {pairs}>"
 
     @override
-    async def edit_notification_image(self, embed_image_url: str, color: int) -> Image.Image:
-        canvas = await self.bot.transposer.url_to_image(embed_image_url)
+    async def edit_notification_image(self, embed_image_url: str, color: int) -> bytes:
         items = [await self.bot.dota.items.by_id(id_) for id_, _ in self.sorted_item_purchases]
-        item_icon_images = [await self.bot.transposer.url_to_cached_image(item.icon_url) for item in items]
-
         neutral_item = await self.bot.dota.items.by_id(self.neutral_item_id)
-        neutral_item_image = await self.bot.transposer.url_to_cached_image(neutral_item.icon_url)
-
         abilities = [await self.bot.dota.abilities.by_id(id_) for id_ in self.ability_upgrades_ids]
-        ability_icon_images = [await self.bot.transposer.url_to_cached_image(ability.icon_url) for ability in abilities]
 
         hero = self.hero or await self.bot.dota.heroes.by_id(self.hero_id)
         talents_order = [ability_id for ability_id in self.ability_upgrades_ids if ability_id in hero.talent_ids]
@@ -275,163 +455,54 @@ class StratzMatchToEdit(BaseMatchToEdit):
 
         facet_id = hero.facet_ids[self.facet_slot]
         facet = await self.bot.dota.facets.by_id(facet_id)
-        facet_icon_image = await self.bot.transposer.url_to_cached_image(facet.icon_url)
-
-        def build_notification_image() -> Image.Image:
-            edit_log.debug("Building edited notification message.")
-            canvas_w, canvas_h = canvas.size
-            draw = ImageDraw.Draw(canvas)
-
-            def draw_items_row() -> int:
-                """Draw items on a single row.
-
-                Returns height of the row to align other elements in the canvas.
-                """
-                h = 50  # the height for items row, meaning items themselves are of this height.
-                item_w = 69  # then item_w, item_h is (69, 50) which matches 88/64 in proportion (original size).
-                font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 19)  # font for item timings
-
-                # rectangle for the row
-                rectangle = Image.new("RGB", (canvas_w, h), str(color))
-                ImageDraw.Draw(rectangle)
-                canvas.paste(rectangle, (0, canvas_h - h))
-
-                # item images
-                for count, img in enumerate(item_icon_images):
-                    canvas.paste(img.resize((item_w, h)), (count * item_w, canvas_h - h))
-
-                # item timings
-                for count, (_item_id, item_timing) in enumerate(self.sorted_item_purchases):
-                    if item_timing:
-                        _text_w, text_h = self.bot.transposer.get_text_wh(item_timing, font)
-                        draw.text((count * item_w, canvas_h - text_h), item_timing, font=font, align="left")
-
-                canvas.paste(im=neutral_item_image.resize((item_w, h)), box=(canvas_w - item_w, canvas_h - h))
-                return h
-
-            items_h = draw_items_row()
-
-            def draw_abilities_row() -> int:
-                """Draw row representing the order of abilities in skill order of the player."""
-                h = 37
-
-                for count, img in enumerate(ability_icon_images):
-                    canvas.paste(img.resize((h, h)), (count * h, canvas_h - items_h - h))
-                return h
-
-            abilities_h = draw_abilities_row()
-
-            def draw_kda() -> float:
-                """Draw kda.
-
-                Returns height of the segment.
-                """
-                font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 33)
-                _w, h = self.bot.transposer.get_text_wh(self.kda, font)
-                draw.text((0, canvas_h - items_h - abilities_h - h), self.kda, font=font)
-                return h
-
-            kda_h = draw_kda()
-
-            def draw_outcome() -> float:
-                """Draw outcome of the game (Win or Loss).
-
-                Returns height of the segment.
-                """
-                font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 33)
-                _w, h = self.bot.transposer.get_text_wh(self.outcome, font)
-                color_map = {
-                    "Win": fmt.color_to_str(const.Palette.green(shade=800)),
-                    "Loss": fmt.color_to_str(const.Palette.red(shade=900)),
-                    "Not Scored": (255, 255, 255),
-                }
-                draw.text(
-                    xy=(0, canvas_h - items_h - abilities_h - kda_h - h),
-                    text=self.outcome,
-                    font=font,
-                    fill=color_map[self.outcome],
-                )
-                return h
-
-            outcome_h = draw_outcome()
-
-            def draw_talent_tree_choices() -> None:
-                """Draw talent tree choices.
-
-                Mirrors hero's talent tree. Chosen talents are marked with orange colour (otherwise black).
-                Draws mono-colour rectangles on the left/right side of the image.
-                """
-                font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 15)
-                p = 6
-
-                for count, (talent_id, talent) in enumerate(talents.items()):
-                    text_w, _text_h = self.bot.transposer.get_text_wh(talent.display_name, font)
-
-                    x = 0 if count % 2 else canvas_w - text_w
-                    position = (x, canvas_h - items_h - abilities_h - kda_h - outcome_h - 20 - 26 * (count // 2))
-                    x, y, u, v = draw.textbbox(position, talent.display_name, font=font)
-
-                    if talent_id in talents_order[:4]:
-                        fill_color = "darkorange"
-                    elif talent_id in talents_order[4:]:
-                        fill_color = "gray"
-                    else:
-                        fill_color = "black"
-
-                    draw.rectangle(xy=(x - p, y - p, u + p, v + p), fill=fill_color)
-                    draw.text(xy=position, text=talent.display_name, font=font, align="right")
-
-            draw_talent_tree_choices()
-
-            def draw_facet() -> None:
-                """Draw facet icon+rectangle. Just a mono-colour rectangle with icon and title text."""
-                icon_h = 40
-                icon_p = 1
-                text_p = 8  # currently just left, right
-                font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 22)
-
-                # text + rectangle
-                text_w, text_h = self.bot.transposer.get_text_wh(facet.display_name, font)
-                x, y, u, v = (
-                    canvas_w - text_w - icon_h - 2 * text_p,
-                    canvas_h - items_h - abilities_h - icon_h,
-                    canvas_w,
-                    canvas_h - items_h - abilities_h,
-                )
-                draw.rectangle(xy=(x, y, u, v), fill=facet.color)
-                draw.text((x + icon_h + text_p, v - (icon_h + text_h) / 2), facet.display_name, font=font)
-
-                # icon
-                resized_facet_image = facet_icon_image.resize((icon_h - icon_p, icon_h - icon_p))
-                canvas.paste(resized_facet_image, (x + icon_p, y + icon_p), mask=resized_facet_image)
-
-            draw_facet()
-
-            return canvas
-
-        return await asyncio.to_thread(build_notification_image)
+
+        # download everything at once
+        # item/ability icons come pre-resized from the sprite atlases
+        item_atlas = self.bot.dota.items.icon_atlas
+        ability_atlas = self.bot.dota.abilities.icon_atlas
+        canvas, (*item_icon_images, neutral_item_image), ability_icon_images, (facet_icon_image,) = await asyncio.gather(
+            self.bot.transposer.url_to_image(embed_image_url),
+            item_atlas.get_many([item.icon_url for item in items] + [neutral_item.icon_url]),
+            ability_atlas.get_many([ability.icon_url for ability in abilities]),
+            self.bot.transposer.urls_to_images([facet.icon_url], cached=True),
+        )
+
+        talent_fill_colors: list[tuple[str, str]] = []
+        for talent_id, talent in talents.items():
+            if talent_id in talents_order[:4]:
+                fill_color = "darkorange"
+            elif talent_id in talents_order[4:]:
+                fill_color = "gray"
+            else:
+                fill_color = "black"
+            talent_fill_colors.append((talent.display_name, fill_color))
+
+        spec = StratzEditImageSpec(
+            canvas=canvas,
+            color=str(color),
+            item_icon_images=item_icon_images,
+            item_timings=[item_timing for _item_id, item_timing in self.sorted_item_purchases],
+            item_size=item_atlas.size,
+            neutral_item_image=neutral_item_image,
+            ability_icon_images=ability_icon_images,
+            ability_size=ability_atlas.size,
+            kda=self.kda,
+            outcome=self.outcome,
+            talents=talent_fill_colors,
+            facet_name=facet.display_name,
+            facet_color=facet.color,
+            facet_icon_image=facet_icon_image,
+        )
+        return await self.bot.renderer.render(build_stratz_edit_image, spec)
 
 
 class NotCountedMatchToEdit(BaseMatchToEdit):
     """Class."""
 
     @override
-    async def edit_notification_image(self, embed_image_url: str, color: discord.Color) -> Image.Image:
-        img = await self.bot.transposer.url_to_image(embed_image_url)
-
-        def build_notification_image() -> Image.Image:
-            edit_log.debug("Building edited notification message.")
-            _width, height = img.size
-
-            draw = ImageDraw.Draw(img)
-            font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 45)
-            text = "Not Counted"
-            _text_w, text_h = self.bot.transposer.get_text_wh(text, font)
-            draw.text(xy=(0, height - text_h), text=text, font=font, align="left", fill=str(discord.Color.dark_orange()))
-
-            return img
-
-        return await asyncio.to_thread(build_notification_image)
+    async def edit_notification_image(self, embed_image_url: str, color: discord.Color) -> bytes:
+        canvas = await self.bot.transposer.url_to_image(embed_image_url)
+        return await self.bot.renderer.render(build_not_counted_edit_image, canvas)
 
 
 async def beta_test_stratz_edit(self: AluCog) -> None:
@@ -452,4 +523,4 @@ async def beta_test_stratz_edit(self: AluCog) -> None:
     data = await self.bot.dota.stratz.get_fpc_match_to_edit(match_id=match_id, friend_id=friend_id)
     match_to_edit = StratzMatchToEdit(self.bot, data)
     new_image = await match_to_edit.edit_notification_image(game_const.FpcAsset.Placeholder640X360, const.Color.prpl)
-    new_image.show()
+    Image.open(BytesIO(new_image)).show()
@@ -11,7 +11,8 @@ from discord.ext import commands
 
 from bot import aluloop
 from utils import const
-from utils.base_fpc import BaseNotifications, EditTuple, RecipientTuple
+from utils.base_fpc import BaseNotifications, EditBackoff, EditQueue, EditTuple, RecipientTuple
+from utils.dota.pulsefire_clients import STRATZ_BATCH_SIZE
 from utils.helpers import measure_time
 
 from .models import MatchToSend, StratzMatchToEdit
@@ -20,10 +21,23 @@ if TYPE_CHECKING:
     from steam.ext.dota2 import LiveMatch
 
     from bot import AluBot, AluContext
+    from utils.dota import Hero, PseudoHero
+    from utils.dota.schemas import stratz
 
-    class AnalyzeGetPlayerIDsQueryRow(TypedDict):
+    class SubscriptionQueryRow(TypedDict):
+        friend_id: int
+        character_id: int
+        player_id: int
+        display_name: str
+        twitch_id: str
+        channel_id: int
+        spoil: bool
         twitch_live_only: bool
-        player_ids: list[int]
+
+    class AlreadySentQueryRow(TypedDict):
+        match_id: int
+        friend_id: int
+        channel_id: int
 
     class FindMatchesToEditQueryRow(TypedDict):
         match_id: int
@@ -31,15 +45,7 @@ if TYPE_CHECKING:
         hero_id: int
         channel_message_tuples: list[tuple[int, int]]
         player_name: str
-
-    class AnalyzeTopSourceResponsePlayerQueryRow(TypedDict):
-        player_id: int
-        display_name: str
-        twitch_id: str
-
-    class GetRecipientsQueryRow(TypedDict):
-        channel_id: int
-        spoil: bool
+        attempts: int
 
 
 send_log = logging.getLogger("send_dota_fpc")
@@ -48,6 +54,9 @@ send_log.setLevel(logging.INFO)
 edit_log = logging.getLogger("edit_dota_fpc")
 edit_log.setLevel(logging.INFO)
 
+STRATZ_BACKOFF = EditBackoff(initial=5 * 60, factor=1.5, maximum=60 * 60, max_attempts=10)
+"""Stratz parses most matches within 10-20 minutes but sometimes lags behind for hours."""
+
 
 class DotaFPCNotifications(BaseNotifications):
     """Cog responsible for sending and editing Dota 2 FPC notifications."""
@@ -71,7 +80,7 @@ class DotaFPCNotifications(BaseNotifications):
         self.top_live_matches: list[LiveMatch] = []
 
         # Edit Matches related attrs
-        self.retry_mapping: dict[tuple[int, int], int] = {}
+        self.edit_queue: EditQueue = EditQueue(bot, "dota_messages", ("match_id", "friend_id"), STRATZ_BACKOFF)
 
     @override
     async def cog_load(self) -> None:
@@ -93,10 +102,63 @@ class DotaFPCNotifications(BaseNotifications):
         self.daily_ratelimit_report.stop()
         return await super().cog_unload()
 
-    async def convert_player_id_to_friend_id(self, player_ids: list[int]) -> list[int]:
-        """Get friend_id by player_id (a serial key in my own database)."""
-        query = "SELECT friend_id FROM dota_accounts WHERE player_id=ANY($1)"
-        return [f for (f,) in await self.bot.pool.fetch(query, player_ids)]
+    async def get_recipient_index(
+        self, live_matches: list[LiveMatch]
+    ) -> tuple[dict[tuple[int, int], list[SubscriptionQueryRow]], set[tuple[int, int, int]]]:
+        """Load the whole FPC subscription graph into memory.
+
+        Returns
+        -------
+        tuple[dict[tuple[int, int], list[SubscriptionQueryRow]], set[tuple[int, int, int]]]
+            * Mapping `(friend_id, hero_id) -> subscriptions` for all enabled guilds.
+                Subscriptions with `twitch_live_only` are already filtered down to currently live streamers.
+            * Set of `(match_id, friend_id, channel_id)` triplets that were already sent.
+
+        Notes
+        -----
+        * This way analyzing 100 live matches costs a constant amount of queries
+            instead of 2 queries per every favorite player found in those matches.
+        """
+        query = """
+            SELECT
+                a.friend_id,
+                c.character_id,
+                pl.player_id,
+                pl.display_name,
+                pl.twitch_id,
+                s.channel_id,
+                s.spoil,
+                s.twitch_live_only
+            FROM dota_favorite_characters c
+            JOIN dota_favorite_players p ON c.guild_id = p.guild_id
+            JOIN dota_settings s ON s.guild_id = c.guild_id
+            JOIN dota_players pl ON pl.player_id = p.player_id
+            JOIN dota_accounts a ON a.player_id = p.player_id
+            WHERE s.enabled = TRUE
+        """
+        subscription_rows: list[SubscriptionQueryRow] = await self.bot.pool.fetch(query, prepared=True)
+
+        live_only_player_ids = {row["player_id"] for row in subscription_rows if row["twitch_live_only"]}
+        if live_only_player_ids:
+            # need to check what streamers are live
+            live_player_streams = await self.get_player_streams(
+                const.Twitch.DOTA_GAME_CATEGORY_ID, list(live_only_player_ids)
+            )
+        else:
+            live_player_streams = {}
+
+        index: dict[tuple[int, int], list[SubscriptionQueryRow]] = {}
+        for row in subscription_rows:
+            if row["twitch_live_only"] and row["player_id"] not in live_player_streams:
+                continue
+            index.setdefault((row["friend_id"], row["character_id"]), []).append(row)
+
+        query = "SELECT match_id, friend_id, channel_id FROM dota_messages WHERE match_id=ANY($1)"
+        sent_rows: list[AlreadySentQueryRow] = await self.bot.pool.fetch(
+            query, [match.id for match in live_matches], prepared=True
+        )
+        already_sent = {(row["match_id"], row["friend_id"], row["channel_id"]) for row in sent_rows}
+        return index, already_sent
 
     async def analyze_top_source_response(self, live_matches: list[LiveMatch]) -> None:
         """Analyze FindTopSourceTVGames response from Dota 2 Coordinator and select matches to send notifications for.
@@ -105,79 +167,54 @@ class DotaFPCNotifications(BaseNotifications):
         in matches provided by FindTopSourceTVGames response.
         Also sends the message via MatchToSend class model.
         """
-        query = "SELECT DISTINCT character_id FROM dota_favorite_characters"
-        favorite_hero_ids: list[int] = [r for (r,) in await self.bot.pool.fetch(query)]
-
-        query = """
-            SELECT twitch_live_only, ARRAY_AGG(player_id) player_ids
-            FROM dota_favorite_players p
-            JOIN dota_settings s ON s.guild_id = p.guild_id
-            WHERE s.enabled = TRUE
-            GROUP by twitch_live_only
-        """
-        player_id_rows: list[AnalyzeGetPlayerIDsQueryRow] = await self.bot.pool.fetch(query)
-
-        friend_id_cache: dict[bool, list[int]] = {True: [], False: []}
-        for row in player_id_rows:
-            if row["twitch_live_only"]:
-                # need to check what streamers are live
-                twitch_live_player_ids = await self.get_player_streams(const.Twitch.DOTA_GAME_CATEGORY_ID, row["player_ids"])
-                friend_id_cache[True] = await self.convert_player_id_to_friend_id(list(twitch_live_player_ids.keys()))
-            else:
-                friend_id_cache[False] = await self.convert_player_id_to_friend_id(row["player_ids"])
+        index, already_sent = await self.get_recipient_index(live_matches)
+        if not index:
+            return
 
+        to_send: list[tuple[MatchToSend, list[RecipientTuple]]] = []
         for match in live_matches:
-            for twitch_live_only, friend_ids in friend_id_cache.items():
-                our_players = [p for p in match.players if p.id in friend_ids and p.hero.id in favorite_hero_ids]
-                for player in our_players:
-                    account_id = player.id
-                    hero_id = player.hero.id
-
-                    query = """
-                        SELECT player_id, display_name, twitch_id
-                        FROM dota_players
-                        WHERE player_id=(SELECT player_id FROM dota_accounts WHERE friend_id = $1);
-                    """
-                    user: AnalyzeTopSourceResponsePlayerQueryRow = await self.bot.pool.fetchrow(query, account_id)
-                    query = """
-                        SELECT s.channel_id, s.spoil
-                        FROM dota_favorite_characters c
-                        JOIN dota_favorite_players p on c.guild_id = p.guild_id
-                        JOIN dota_settings s on s.guild_id = c.guild_id
-                        WHERE character_id = $1
-                            AND p.player_id = $2
-                            AND NOT s.channel_id = ANY(
-                                SELECT channel_id
-                                FROM dota_messages
-                                WHERE match_id = $3 AND friend_id = $4
-                            )
-                            AND s.twitch_live_only = $5
-                            AND s.enabled = TRUE;
-                    """
-                    rows: list[GetRecipientsQueryRow] = await self.bot.pool.fetch(
-                        query, hero_id, user["player_id"], match.id, account_id, twitch_live_only
-                    )
+            for player in match.players:
+                subscriptions = index.get((player.id, player.hero.id))
+                if not subscriptions:
+                    continue
+
+                recipients = [
+                    RecipientTuple(channel_id=row["channel_id"], spoil=row["spoil"])
+                    for row in subscriptions
+                    if (match.id, player.id, row["channel_id"]) not in already_sent
+                ]
+                if not recipients:
+                    continue
+
+                user = subscriptions[0]
+                player_hero = await self.bot.dota.heroes.by_id(player.hero.id)
+                send_log.debug("%s - %s", user["display_name"], player_hero.display_name)
+                match_to_send = MatchToSend(
+                    self.bot,
+                    match_id=match.id,
+                    friend_id=player.id,
+                    start_time=match.start_time,
+                    player_name=user["display_name"],
+                    player_hero=player_hero,
+                    twitch_id=user["twitch_id"],
+                    hero_ids=[hero.id for hero in match.heroes],
+                    server_steam_id=match.server_steam_id,
+                )
+                to_send.append((match_to_send, recipients))
+
+        if not to_send:
+            return
+
+        # resolve all streamers of this tick at once instead of a few Helix requests per notification
+        await self.bot.twitch.streamers.prefetch(
+            match_to_send.twitch_id for match_to_send, _ in to_send if match_to_send.twitch_id is not None
+        )
 
-                    if rows:
-                        player_hero = await self.bot.dota.heroes.by_id(hero_id)
-                        send_log.debug("%s - %s", user["display_name"], player_hero.display_name)
-                        match_to_send = MatchToSend(
-                            self.bot,
-                            match_id=match.id,
-                            friend_id=account_id,
-                            start_time=match.start_time,
-                            player_name=user["display_name"],
-                            player_hero=player_hero,
-                            twitch_id=user["twitch_id"],
-                            hero_ids=[hero.id for hero in match.heroes],
-                            server_steam_id=match.server_steam_id,
-                        )
-                        # SENDING
-                        start_time = time.perf_counter()
-                        await self.send_match(
-                            match_to_send, [RecipientTuple(channel_id=row["channel_id"], spoil=row["spoil"]) for row in rows]
-                        )
-                        send_log.debug("Sending took %.5f secs", time.perf_counter() - start_time)
+        # SENDING
+        for match_to_send, recipients in to_send:
+            start_time = time.perf_counter()
+            await self.send_match(match_to_send, recipients)
+            send_log.debug("Sending took %.5f secs", time.perf_counter() - start_time)
 
     @aluloop(seconds=59)
     async def notification_sender(self) -> None:
@@ -233,109 +270,130 @@ class DotaFPCNotifications(BaseNotifications):
                 friend_id,
                 hero_id,
                 player_name,
+                MAX(attempts) attempts,
                 ARRAY_AGG ((channel_id, message_id)) channel_message_tuples
             FROM dota_messages
-            WHERE NOT match_id=ANY($1)
+            WHERE NOT match_id=ANY($1) AND next_attempt_at <= NOW()
             GROUP BY match_id, friend_id, hero_id, player_name
         """
         match_rows: list[FindMatchesToEditQueryRow] = await self.bot.pool.fetch(
             query, [match.id for match in self.top_live_matches]
         )
 
+        pending: list[tuple[FindMatchesToEditQueryRow, Hero | PseudoHero, str]] = []
         for match_row in match_rows:
-            # note to the following line: we could make retry database column instead of
-            # having local self.retry_mapping but idk.
-            tuple_uuid = match_id, friend_id = match_row["match_id"], match_row["friend_id"]
-            if tuple_uuid not in self.retry_mapping:
-                self.retry_mapping[tuple_uuid] = 0
-                # Stratz 99% will not have data in the first 5 minutes so it's just a wasted call
-                # Thus lets skip the very first loop #0
+            key = match_id, friend_id = match_row["match_id"], match_row["friend_id"]
+            attempts = match_row["attempts"]
+            if attempts == 0:
+                # Stratz 99% will not have data in the first 5 minutes after the match so it's just a wasted call
+                # Thus lets skip the very first sighting and schedule the actual attempt for later
+                await self.edit_queue.postpone(key, attempts, "Waiting for Stratz to parse the match")
                 continue
-            self.retry_mapping[tuple_uuid] += 1
 
             player_hero = await self.bot.dota.heroes.by_id(match_row["hero_id"])
             # discord-markdown friendly strings for my #logger channel.
             # put it into the beginning of every consequent edit_log.info / edit_log.debug call
             log_str = (
-                f"`r={self.retry_mapping[tuple_uuid]}` "
+                f"`r={attempts}` "
                 f"[`{match_id}`](<https://stratz.com/matches/{match_id}>) "
                 f"[`{match_row['player_name']}`](<https://stratz.com/players/{friend_id}>) "
                 f"{player_hero.emote}"
             )
 
             edit_log.debug("%s Start editing attempt.", log_str)
-            if self.retry_mapping[tuple_uuid] > 9:
+            if self.edit_queue.is_exhausted(attempts):
                 edit_log.info("%s It's been too long - giving up on editing.", log_str)
-                await self.delete_match_from_editing_queue(match_id, friend_id)
+                await self.edit_queue.complete(key)
                 # TODO: maybe edit the match with opendota instead? to have at least some data
+                continue
+
+            pending.append((match_row, player_hero, log_str))
 
+        # query Stratz for a bunch of matches at once so we spend one request of the daily quota instead of N
+        for start in range(0, len(pending), STRATZ_BATCH_SIZE):
+            batch = pending[start : start + STRATZ_BATCH_SIZE]
             try:
-                stratz_data = await self.bot.dota.stratz.get_fpc_match_to_edit(match_id=match_id, friend_id=friend_id)
+                batch_data = await self.bot.dota.stratz.get_fpc_matches_to_edit(
+                    [(match_row["match_id"], match_row["friend_id"]) for match_row, _, _ in batch]
+                )
             except aiohttp.ClientResponseError as exc:
-                edit_log.warning("%s Stratz API Resp: Not OK, Status `%s` \N{CROSS MARK}", log_str, exc.status)
+                for match_row, _, log_str in batch:
+                    edit_log.warning("%s Stratz API Resp: Not OK, Status `%s` \N{CROSS MARK}", log_str, exc.status)
+                    await self.edit_queue.postpone(
+                        (match_row["match_id"], match_row["friend_id"]),
+                        match_row["attempts"],
+                        f"Stratz API Resp: Not OK, Status {exc.status}",
+                    )
                 continue
 
-            if not stratz_data["data"]["match"]:
-                # This is None when either:
-                # * Game did not count
-                # * Game was less than 10 minutes
-                # * Game was less than 15 minutes and Stratz considered it as a suspicious game
-                # * Game is still live
-                # * Steam Web API / Dota 2 Game Coordinator is dying
-
-                edit_log.warning("%s GetMatchDetails does not work \N{CROSS MARK}", log_str)
-                continue  # idk fuck my life, GetMatchDetails does not work.
-                # # This is None when conditions under "*" below happen
-                # # which we have to separate
-                # try:
-                #     match_details = await self.bot.dota.steam_web_api.get_match_details(match_id)
-                # except aiohttp.ClientResponseError as exc:
-                #     edit_log.warning("SteamWebAPI: it's down? status `%s`", exc.status)  # exc_info = true
-                #     # we can't confirm if any of "*" conditions are true
-                #     # so we will have to rely on other elif/else in future loops
-                #     continue
-
-                # try:
-                #     duration = match_details["result"]["duration"]
-                # except KeyError:
-                #     edit_log.warning("%s SteamWebAPI: KeyError - match is not ready (still live?).", log_str)
-                #     edit_log.warning("%s", match_details)
-                #     continue
-
-                # if duration < 900:  # 15 minutes (stratz excluded some 11 minutes games too)
-
-                #     edit_log.info("%s SteamWebAPI: match did not count. Deleting the match.", log_str)
-                #     match_to_edit = NotCountedMatchToEdit(self.bot)
-                # else:
-
-                #     edit_log.warning("%s SteamWebAPI: match is not ready (still live or GC dying).", log_str)
-                #     continue
-
-            if not stratz_data["data"]["match"]["statsDateTime"]:
-                edit_log.warning("%s Parsing was not finished \N{CROSS MARK}", log_str)
-                continue
-            match_to_edit = StratzMatchToEdit(self.bot, stratz_data, player_hero)
-
-            # now we know how exactly to edit the match with a specific `match_to_edit`
-            await self.edit_match(
-                match_to_edit,
-                [
-                    EditTuple(channel_id=channel_id, message_id=message_id)
-                    for channel_id, message_id in match_row["channel_message_tuples"]
-                ],
-            )
-            edit_log.info("%s Edited message \N{WHITE HEAVY CHECK MARK}", log_str)
-            await self.delete_match_from_editing_queue(match_id, friend_id)
+            for match_row, player_hero, log_str in batch:
+                stratz_data = batch_data[match_row["match_id"], match_row["friend_id"]]
+                await self.edit_match_with_stratz_data(match_row, player_hero, log_str, stratz_data)
         edit_log.debug("*** Finished Task to Edit Dota FPC Messages ***")
 
-    async def delete_match_from_editing_queue(self, match_id: int, friend_id: int) -> None:
-        """Delete the match to edit from database and retry_mapping.
-
-        Meaning the editing is either finished or given up on.
-        """
-        query = "DELETE FROM dota_messages WHERE match_id=$1 AND friend_id=$2"
-        await self.bot.pool.execute(query, match_id, friend_id)
-        self.retry_mapping.pop((match_id, friend_id), None)
+    async def edit_match_with_stratz_data(
+        self,
+        match_row: FindMatchesToEditQueryRow,
+        player_hero: Hero | PseudoHero,
+        log_str: str,
+        stratz_data: stratz.FPCMatchesResponse,
+    ) -> None:
+        """Edit FPC messages for a single `match_row` if Stratz already has the post-match data for it."""
+        key = match_row["match_id"], match_row["friend_id"]
+
+        if not stratz_data["data"]["match"]:
+            # This is None when either:
+            # * Game did not count
+            # * Game was less than 10 minutes
+            # * Game was less than 15 minutes and Stratz considered it as a suspicious game
+            # * Game is still live
+            # * Steam Web API / Dota 2 Game Coordinator is dying
+
+            edit_log.warning("%s GetMatchDetails does not work \N{CROSS MARK}", log_str)
+            await self.edit_queue.postpone(key, match_row["attempts"], "Stratz: match is null")
+            return  # idk fuck my life, GetMatchDetails does not work.
+            # # This is None when conditions under "*" below happen
+            # # which we have to separate
+            # try:
+            #     match_details = await self.bot.dota.steam_web_api.get_match_details(match_id)
+            # except aiohttp.ClientResponseError as exc:
+            #     edit_log.warning("SteamWebAPI: it's down? status `%s`", exc.status)  # exc_info = true
+            #     # we can't confirm if any of "*" conditions are true
+            #     # so we will have to rely on other elif/else in future loops
+            #     continue
+
+            # try:
+            #     duration = match_details["result"]["duration"]
+            # except KeyError:
+            #     edit_log.warning("%s SteamWebAPI: KeyError - match is not ready (still live?).", log_str)
+            #     edit_log.warning("%s", match_details)
+            #     continue
+
+            # if duration < 900:  # 15 minutes (stratz excluded some 11 minutes games too)
+
+            #     edit_log.info("%s SteamWebAPI: match did not count. Deleting the match.", log_str)
+            #     match_to_edit = NotCountedMatchToEdit(self.bot)
+            # else:
+
+            #     edit_log.warning("%s SteamWebAPI: match is not ready (still live or GC dying).", log_str)
+            #     continue
+
+        if not stratz_data["data"]["match"]["statsDateTime"]:
+            edit_log.warning("%s Parsing was not finished \N{CROSS MARK}", log_str)
+            await self.edit_queue.postpone(key, match_row["attempts"], "Stratz: parsing was not finished")
+            return
+        match_to_edit = StratzMatchToEdit(self.bot, stratz_data, player_hero)
+
+        # now we know how exactly to edit the match with a specific `match_to_edit`
+        await self.edit_match(
+            match_to_edit,
+            [
+                EditTuple(channel_id=channel_id, message_id=message_id)
+                for channel_id, message_id in match_row["channel_message_tuples"]
+            ],
+        )
+        edit_log.info("%s Edited message \N{WHITE HEAVY CHECK MARK}", log_str)
+        await self.edit_queue.complete(key)
 
     # STRATZ RATE LIMITS
 
@@ -3,14 +3,13 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 import discord
-from discord.ext import commands
 
-from bot import AluCog
+from bot import AluCog, message_handler
 from config import config
 from utils import const
 
 if TYPE_CHECKING:
-    from bot import AluBot
+    from bot import AluBot, MessageContext
 
 
 class SteamDB(AluCog):
@@ -38,14 +37,14 @@ class SteamDB(AluCog):
         webhook_url = config["WEBHOOKS"]["DOTA_NEWS"] if not self.bot.test else config["WEBHOOKS"]["YEN_SPAM"]
         return self.bot.webhook_from_url(webhook_url)
 
-    @commands.Cog.listener("on_message")
-    async def filter_steam_db_messages(self, message: discord.Message) -> None:
+    @message_handler(channels=(const.Channel.dota_updates,), has_urls=True)
+    async def filter_steam_db_messages(self, ctx: MessageContext) -> None:
         """Filter SteamDB messages from uninteresting ones.
 
         That channel contains all kind of updates, but we are only interested in blogpost ones.
         """
-        if message.channel.id == const.Channel.dota_updates and "https://steamcommunity.com" in message.content:
-            new_content = f"# {message.content}"
+        if "https://steamcommunity.com" in ctx.message.content:
+            new_content = f"# {ctx.message.content}"
             msg = await self.news_webhook.send(content=new_content, wait=True)
             await msg.publish()
 
@@ -7,13 +7,12 @@ from typing import TYPE_CHECKING
 
 import discord
 from discord import app_commands
-from discord.ext import commands
 
-from bot import AluCog
+from bot import AluCog, message_handler
 from utils import const, mimics
 
 if TYPE_CHECKING:
-    from bot import AluBot, AluInteraction
+    from bot import AluBot, AluInteraction, MessageContext
 
 
 class FunOther(AluCog):
@@ -24,19 +23,19 @@ class FunOther(AluCog):
         await interaction.response.send_message(content=word, file=discord.File(f"assets/images/coinflip/{word}.png"))
 
     # todo: this should be somewhere else
-    @commands.Cog.listener("on_message")
-    async def reply_non_command_mentions(self, message: discord.Message) -> None:
+    @message_handler(guild_only=True, mentions_me=True)
+    async def reply_non_command_mentions(self, ctx: MessageContext) -> None:
         """For now there is only blush and question marks."""
-        if message.guild and message.guild.me in message.mentions:
-            if any(item in message.content.lower() for item in ["😊", "blush"]):
-                await message.channel.send(f"{message.author.mention} {const.Emote.peepoBlushDank}")
-            else:
-                ctx = await self.bot.get_context(message)
-                if ctx.command:
-                    return
-                for r in ["❔", "❕", "🤔"]:
-                    with contextlib.suppress(discord.HTTPException):
-                        await message.add_reaction(r)
+        message = ctx.message
+        if any(item in ctx.content_lower for item in ["😊", "blush"]):
+            await message.channel.send(f"{message.author.mention} {const.Emote.peepoBlushDank}")
+        else:
+            command_ctx = await self.bot.get_context(message)
+            if command_ctx.command:
+                return
+            for r in ["❔", "❕", "🤔"]:
+                with contextlib.suppress(discord.HTTPException):
+                    await message.add_reaction(r)
 
     @app_commands.command()
     async def roll(self, interaction: AluInteraction, max_roll_number: app_commands.Range[int, 1]) -> None:
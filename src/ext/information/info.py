@@ -11,11 +11,11 @@ from discord.ext import commands
 from PIL import Image, ImageColor
 from wordcloud import WordCloud
 
-from bot import AluCog
+from bot import AluCog, message_handler
 from utils import const, converters, fmt
 
 if TYPE_CHECKING:
-    from bot import AluBot, AluInteraction
+    from bot import AluBot, AluInteraction, MessageContext
 
 # Ignore dateparser warnings regarding pytz
 warnings.filterwarnings(
@@ -27,10 +27,10 @@ warnings.filterwarnings(
 class Info(AluCog, name="Info"):
     """Commands to get some useful info."""
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        if message.author.bot:
-            return
+    @message_handler(humans_only=True)
+    async def convert_dates(self, ctx: MessageContext) -> None:
+        """Show dates with timezone information from the message in the reader's timezone."""
+        message = ctx.message
         parsed_dates = search_dates(message.content)
         if not parsed_dates:
             return
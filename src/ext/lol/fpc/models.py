@@ -4,12 +4,13 @@ import asyncio
 import datetime
 import logging
 import re
-from typing import TYPE_CHECKING, override
+from io import BytesIO
+from typing import TYPE_CHECKING, NamedTuple, override
 
 import discord
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 
-from utils import const, fmt
+from utils import const, errors, fmt, fonts
 from utils.base_fpc import BaseMatchToEdit, BaseMatchToSend
 from utils.lol import LiteralPlatform, Platform
 
@@ -39,6 +40,132 @@ def lol_links(platform: LiteralPlatform, game_name: str, tag_line: str) -> str:
     return f"/[Opgg]({opgg})/[Ugg]({ugg})"
 
 
+# Image builders below are module-level functions taking picklable specs
+# so `bot.renderer` can run them in a worker process as well as in a thread.
+
+
+class NotificationImageSpec(NamedTuple):
+    canvas: Image.Image
+    champion_images: list[Image.Image]
+    rune_images: list[Image.Image]
+    summoner_spell_images: list[Image.Image]
+    title: str
+
+
+def build_notification_image(spec: NotificationImageSpec) -> Image.Image:
+    """Build the image for FPC notification."""
+    img = spec.canvas
+    width, height = img.size
+    rectangle = Image.new("RGB", (width, 100), f"#{const.Color.league:0>6x}")
+    ImageDraw.Draw(rectangle)
+    img.paste(rectangle)
+    img.paste(rectangle, (0, height - CELL_SIZE))
+
+    # champion icons
+    for count, champion_image in enumerate(spec.champion_images):
+        champion_image = champion_image.resize((62, 62))
+        extra_space = 0 if count < 5 else 20
+        img.paste(champion_image, (count * 62 + extra_space, 0))
+
+    # middle text "Streamer - Champion"
+    font = fonts.get(fonts.INTER_BLACK, 33)
+    draw = ImageDraw.Draw(img)
+    w2, _ = fonts.get_text_wh(spec.title, font)  # _ is `h2`
+    draw.text(xy=((width - w2) / 2, 65), text=spec.title, font=font, align="center")
+
+    # rune icons
+    left = 0
+    for count, rune_image in enumerate(spec.rune_images):
+        if count < 6:
+            # actual runes (as in non-stat modifiers)
+            rune_image = rune_image.resize((CELL_SIZE, CELL_SIZE))
+
+        try:
+            mask = rune_image.convert("RGBA")
+            img.paste(rune_image, (left, height - rune_image.height), mask)
+        except ValueError:
+            # Bad Transparency Mask ? Riot messed up the images ? Or me?
+            img.paste(rune_image, (left, height - rune_image.height))
+        left += rune_image.width
+
+    # summoner spell icons
+    left = width - 2 * CELL_SIZE
+    for count, spell_image in enumerate(spec.summoner_spell_images):
+        spell_image = spell_image.resize((CELL_SIZE, CELL_SIZE))
+        img.paste(spell_image, (left + count * spell_image.width, height - spell_image.height))
+    return img
+
+
+class EditImageSpec(NamedTuple):
+    canvas: Image.Image
+    item_images: list[Image.Image]
+    trinket_image: Image.Image
+    skill_build: list[int]
+    kda: str
+    outcome: str
+
+
+def build_edit_image(spec: EditImageSpec) -> Image.Image:
+    """Build the edited image for FPC notification with the post-match data."""
+    img = spec.canvas
+    width, height = img.size
+    font = fonts.get(fonts.INTER_BLACK, 34)
+    draw = ImageDraw.Draw(img)
+
+    # Item Icons
+    for count, item_image in enumerate(spec.item_images):
+        left = count * CELL_SIZE
+        item_image = item_image.resize((CELL_SIZE, CELL_SIZE))
+        img.paste(im=item_image, box=(left, height - CELL_SIZE - item_image.height))
+
+    # Trinket Icon
+    trinket_image = spec.trinket_image.resize((CELL_SIZE, CELL_SIZE))
+    img.paste(im=trinket_image, box=(width - trinket_image.width, height - CELL_SIZE - trinket_image.height))
+
+    # Skill Build
+    # I got these images by downloading .png from
+    # https://commons.wikimedia.org/wiki/Category:Emoji_One_BW
+    # and using Paint Bucket Tool to give it proper colors
+    # plus resized to 50x50 afterwards
+    skill_slot_mapping = {
+        1: "assets/images/local/Q.png",
+        2: "assets/images/local/W.png",
+        3: "assets/images/local/E.png",
+        4: "assets/images/local/R.png",
+    }
+    skill_slot_images = {
+        skill_slot: Image.open(path).resize((CELL_SIZE, CELL_SIZE)) for skill_slot, path in skill_slot_mapping.items()
+    }
+
+    for count, skill_slot in enumerate(reversed(spec.skill_build)):
+        skill_slot_image = skill_slot_images[skill_slot]
+        img.paste(
+            im=skill_slot_image,
+            box=(count * skill_slot_image.width, height - CELL_SIZE * 2 - skill_slot_image.height),
+        )
+
+    # KDA Text
+    _, kda_text_h = fonts.get_text_wh(spec.kda, font)  # _ is `kda_text_w`
+    draw.text((0, height - CELL_SIZE * 3 - kda_text_h), spec.kda, font=font, align="right")
+
+    # Outcome Text
+    _, outcome_text_h = fonts.get_text_wh(spec.outcome, font)  # _ is `outcome_text_w`
+    color_dict = {
+        "Win": fmt.color_to_str(const.Palette.green(shade=800)),
+        "Loss": fmt.color_to_str(const.Palette.red(shade=900)),
+        "No Scored": (255, 255, 255),
+    }
+    draw.text(
+        xy=(0, height - CELL_SIZE * 3 - kda_text_h - outcome_text_h - 5),
+        text=spec.outcome,
+        font=font,
+        align="center",
+        fill=color_dict[spec.outcome],
+    )
+
+    return img
+
+
 class MatchToSend(BaseMatchToSend):
     def __init__(
         self,
@@ -83,72 +210,41 @@ class MatchToSend(BaseMatchToSend):
         return int(datetime.datetime.now(datetime.UTC).timestamp() - timestamp_seconds)
 
     @override
-    async def notification_image(self, stream_preview_url: str, display_name: str) -> Image.Image:
+    async def notification_image(self, stream_preview_url: str, display_name: str) -> bytes:
         # prepare stuff for the following PIL procedures
-        img = await self.bot.transposer.url_to_image(stream_preview_url)
-
         sorted_champion_ids = await self.bot.lol.roles.sort_champions_by_roles(self.all_champion_ids)
         champion_icon_urls = [(await self.bot.lol.champions.by_id(id_)).icon_url for id_ in sorted_champion_ids]
-        champion_icon_images = [await self.bot.transposer.url_to_image(url) for url in champion_icon_urls]
-
         rune_icon_urls = [await self.bot.lol.rune_icons.by_id(id_) for id_ in self.rune_ids]
-        rune_icon_images = [await self.bot.transposer.url_to_image(url) for url in rune_icon_urls]
-
         summoner_icon_urls = [await self.bot.lol.summoner_spell_icons.by_id(id_) for id_ in self.summoner_spell_ids]
-        summoner_icon_images = [await self.bot.transposer.url_to_image(url) for url in summoner_icon_urls]
-
-        def build_notification_image() -> Image.Image:
-            width, height = img.size
-            rectangle = Image.new("RGB", (width, 100), f"#{const.Color.league:0>6x}")
-            ImageDraw.Draw(rectangle)
-            img.paste(rectangle)
-            img.paste(rectangle, (0, height - CELL_SIZE))
-
-            # champion icons
-            for count, champion_image in enumerate(champion_icon_images):
-                champion_image = champion_image.resize((62, 62))
-                extra_space = 0 if count < 5 else 20
-                img.paste(champion_image, (count * 62 + extra_space, 0))
-
-            # middle text "Streamer - Champion"
-            font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 33)
-            draw = ImageDraw.Draw(img)
-            text = f"{display_name} - {self.champion.display_name}"
-            w2, _ = self.bot.transposer.get_text_wh(text, font)  # _ is `h2`
-            draw.text(xy=((width - w2) / 2, 65), text=text, font=font, align="center")
-
-            # rune icons
-            left = 0
-            for count, rune_image in enumerate(rune_icon_images):
-                if count < 6:
-                    # actual runes (as in non-stat modifiers)
-                    rune_image = rune_image.resize((CELL_SIZE, CELL_SIZE))
-
-                try:
-                    mask = rune_image.convert("RGBA")
-                    img.paste(rune_image, (left, height - rune_image.height), mask)
-                except ValueError:
-                    # Bad Transparency Mask ? Riot messed up the images ? Or me?
-                    img.paste(rune_image, (left, height - rune_image.height))
-                left += rune_image.width
-
-            # summoner spell icons
-            left = width - 2 * CELL_SIZE
-            for count, spell_image in enumerate(summoner_icon_images):
-                spell_image = spell_image.resize((CELL_SIZE, CELL_SIZE))
-                img.paste(spell_image, (left + count * spell_image.width, height - spell_image.height))
-            return img
-
-        return await asyncio.to_thread(build_notification_image)
+
+        # download everything at once
+        img, champion_icon_images, rune_icon_images, summoner_icon_images = await asyncio.gather(
+            self.bot.transposer.url_to_image(stream_preview_url),
+            self.bot.transposer.urls_to_images(champion_icon_urls, cached=True),
+            self.bot.transposer.urls_to_images(rune_icon_urls, cached=True),
+            self.bot.transposer.urls_to_images(summoner_icon_urls, cached=True),
+        )
+
+        spec = NotificationImageSpec(
+            canvas=img,
+            champion_images=champion_icon_images,
+            rune_images=rune_icon_images,
+            summoner_spell_images=summoner_icon_images,
+            title=f"{display_name} - {self.champion.display_name}",
+        )
+        return await self.bot.renderer.render(build_notification_image, spec)
 
     @override
     async def webhook_send_kwargs(self) -> RecipientKwargs:
         streamer = await self.bot.twitch.fetch_streamer(self.twitch_id)
+        if streamer is None:
+            msg = f"Twitch user `{self.twitch_id}` is not known to Helix."
+            raise errors.SomethingWentWrong(msg)
 
         notification_image = await self.notification_image(streamer.preview_url, streamer.display_name)
         title = f"{streamer.display_name} - {self.champion.display_name}"
         filename = re.sub(r"[_' ]", "", title) + ".png"
-        image_file = self.bot.transposer.image_to_file(notification_image, filename=filename)
+        image_file = self.bot.transposer.bytes_to_file(notification_image, filename=filename)
         embed = (
             discord.Embed(
                 color=const.Color.league,
@@ -168,13 +264,19 @@ class MatchToSend(BaseMatchToSend):
         return {"embed": embed, "file": image_file, "username": title, "avatar_url": self.champion.icon_url}
 
     @override
-    async def insert_into_game_messages(self, message_id: int, channel_id: int) -> None:
+    async def insert_into_game_messages(self, messages: list[tuple[int, int]]) -> None:
         query = """
             INSERT INTO lol_messages
             (message_id, channel_id, match_id, platform, champion_id)
             VALUES ($1, $2, $3, $4, $5)
         """
-        await self.bot.pool.execute(query, message_id, channel_id, self.match_id, self.platform, self.champion.id)
+        await self.bot.pool.executemany(
+            query,
+            [
+                (message_id, channel_id, self.match_id, self.platform, self.champion.id)
+                for message_id, channel_id in messages
+            ],
+        )
 
         query = "UPDATE lol_accounts SET last_edited=$1 WHERE summoner_id=$2"
         await self.bot.pool.execute(query, self.match_id, self.summoner_id)
@@ -225,74 +327,26 @@ class MatchToEdit(BaseMatchToEdit):
                         continue
 
     @override
-    async def edit_notification_image(self, embed_image_url: str, _color: int) -> Image.Image:
-        img = await self.bot.transposer.url_to_image(embed_image_url)
+    async def edit_notification_image(self, embed_image_url: str, _color: int) -> bytes:
         item_icon_urls = [await self.bot.lol.item_icons.by_id(id_) for id_ in reversed(self.sorted_item_ids) if id_]
-        item_icon_images = [await self.bot.transposer.url_to_image(url) for url in item_icon_urls]
-
         trinket_icon_url = await self.bot.lol.item_icons.by_id(self.trinket_item_id)
-        trinket_icon_img = await self.bot.transposer.url_to_image(trinket_icon_url)
-
-        def build_notification_image() -> Image.Image:
-            width, height = img.size
-            font = ImageFont.truetype("./assets/fonts/Inter-Black-slnt=0.ttf", 34)
-            draw = ImageDraw.Draw(img)
-
-            # Item Icons
-            for count, item_image in enumerate(item_icon_images):
-                left = count * CELL_SIZE
-                item_image = item_image.resize((CELL_SIZE, CELL_SIZE))
-                img.paste(im=item_image, box=(left, height - CELL_SIZE - item_image.height))
-
-            # Trinket Icon
-            trinket_image = trinket_icon_img.resize((CELL_SIZE, CELL_SIZE))
-            img.paste(im=trinket_image, box=(width - trinket_image.width, height - CELL_SIZE - trinket_image.height))
-
-            # Skill Build
-            # I got these images by downloading .png from
-            # https://commons.wikimedia.org/wiki/Category:Emoji_One_BW
-            # and using Paint Bucket Tool to give it proper colors
-            # plus resized to 50x50 afterwards
-            skill_slot_mapping = {
-                1: "assets/images/local/Q.png",
-                2: "assets/images/local/W.png",
-                3: "assets/images/local/E.png",
-                4: "assets/images/local/R.png",
-            }
-            skill_slot_images = {
-                skill_slot: Image.open(path).resize((CELL_SIZE, CELL_SIZE))
-                for skill_slot, path in skill_slot_mapping.items()
-            }
-
-            for count, skill_slot in enumerate(reversed(self.skill_build)):
-                skill_slot_image = skill_slot_images[skill_slot]
-                img.paste(
-                    im=skill_slot_image,
-                    box=(count * skill_slot_image.width, height - CELL_SIZE * 2 - skill_slot_image.height),
-                )
-
-            # KDA Text
-            _, kda_text_h = self.bot.transposer.get_text_wh(self.kda, font)  # _ is `kda_text_w`
-            draw.text((0, height - CELL_SIZE * 3 - kda_text_h), self.kda, font=font, align="right")
-
-            # Outcome Text
-            _, outcome_text_h = self.bot.transposer.get_text_wh(self.outcome, font)  # _ is `outcome_text_w`
-            color_dict = {
-                "Win": fmt.color_to_str(const.Palette.green(shade=800)),
-                "Loss": fmt.color_to_str(const.Palette.red(shade=900)),
-                "No Scored": (255, 255, 255),
-            }
-            draw.text(
-                xy=(0, height - CELL_SIZE * 3 - kda_text_h - outcome_text_h - 5),
-                text=self.outcome,
-                font=font,
-                align="center",
-                fill=color_dict[self.outcome],
-            )
 
-            return img
+        # download everything at once
+        img, item_icon_images, (trinket_icon_img,) = await asyncio.gather(
+            self.bot.transposer.url_to_image(embed_image_url),
+            self.bot.transposer.urls_to_images(item_icon_urls, cached=True),
+            self.bot.transposer.urls_to_images([trinket_icon_url], cached=True),
+        )
 
-        return await asyncio.to_thread(build_notification_image)
+        spec = EditImageSpec(
+            canvas=img,
+            item_images=item_icon_images,
+            trinket_image=trinket_icon_img,
+            skill_build=self.skill_build,
+            kda=self.kda,
+            outcome=self.outcome,
+        )
+        return await self.bot.renderer.render(build_edit_image, spec)
 
 
 if TYPE_CHECKING:
@@ -323,7 +377,7 @@ async def beta_test_edit_image(self: AluCog) -> None:
     post_match_player = MatchToEdit(self.bot, participant=match["info"]["participants"][0], timeline=timeline)
 
     new_image = await post_match_player.edit_notification_image("assets/images/dota/Lavender640x360.png", 0x000000)
-    new_image.show()
+    Image.open(BytesIO(new_image)).show()
 
 
 async def beta_test_send_image(self: AluCog) -> None:
@@ -362,4 +416,4 @@ async def beta_test_send_image(self: AluCog) -> None:
     )
 
     new_image = await post_match_player.notification_image("assets/images/dota/Lavender640x360.png", "gosu")
-    new_image.show()
+    Image.open(BytesIO(new_image)).show()
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from typing import TYPE_CHECKING, Any, TypedDict, override
 
 import aiohttp
@@ -8,12 +10,14 @@ import asyncpg
 
 from bot import aluloop
 from utils import const
-from utils.base_fpc import BaseNotifications, EditTuple, RecipientTuple
+from utils.base_fpc import BaseNotifications, EditBackoff, EditQueue, EditTuple, RecipientTuple
 from utils.lol import game_const, regions
 
 from .models import MatchToEdit, MatchToSend
 
 if TYPE_CHECKING:
+    from pulsefire.schemas import RiotAPISchema
+
     from bot import AluBot
 
     class LivePlayerAccountRow(TypedDict):
@@ -30,6 +34,7 @@ if TYPE_CHECKING:
         match_id: int
         champion_id: int
         platform: regions.LiteralPlatform
+        attempts: int
         channel_message_tuples: list[tuple[int, int]]
 
     class GetRecipientsQueryRow(TypedDict):
@@ -42,12 +47,30 @@ __all__ = ("Notifications",)
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
 
+POLL_CONCURRENCY = 10
+"""How many Spectator API requests can be in flight at once."""
+IN_GAME_POLL_INTERVAL = 2 * 60
+"""Seconds between polls for accounts that are in the game."""
+LEFT_GAME_POLL_INTERVAL = 4 * 60
+"""Seconds to wait before polling accounts that just left the game."""
+
+RIOT_BACKOFF = EditBackoff(initial=2 * 60, factor=2.0, maximum=30 * 60, max_attempts=12)
+"""Riot Match-V5 answers 404 until the match data is processed which usually takes a few minutes after the game."""
+
 
 class Notifications(BaseNotifications):
     def __init__(self, bot: AluBot, *args: Any, **kwargs: Any) -> None:
         super().__init__(bot, "lol", *args, **kwargs)
         self.live_match_ids: list[int] = []
 
+        # Spectator polling related attrs
+        self.poll_semaphore: asyncio.Semaphore = asyncio.Semaphore(POLL_CONCURRENCY)
+        self.next_poll_at: dict[str, float] = {}
+        """Mapping `puuid -> time.monotonic()` when the account should be polled next."""
+        self.active_games: dict[str, RiotAPISchema.LolSpectatorV5Game] = {}
+        """Mapping `puuid -> game` for accounts that are in the game."""
+        self.edit_queue: EditQueue = EditQueue(bot, "lol_messages", ("match_id",), RIOT_BACKOFF)
+
     @override
     async def cog_load(self) -> None:
         self.notification_worker.add_exception_type(asyncpg.InternalServerError)
@@ -60,30 +83,17 @@ class Notifications(BaseNotifications):
         self.notification_worker.stop()  # .cancel()
         return await super().cog_unload()
 
-    async def send_notifications(self) -> None:
-        self.live_match_ids = []
+    async def poll_active_game(self, player_account_row: LivePlayerAccountRow) -> RiotAPISchema.LolSpectatorV5Game | None:
+        """Get the active game for the account or `None` if the account is not in the game.
 
-        query = "SELECT DISTINCT character_id FROM lol_favorite_characters"
-        favorite_champion_ids = [r for (r,) in await self.bot.pool.fetch(query)]  # row.unnest
-
-        query = "SELECT DISTINCT player_id FROM lol_favorite_players"
-        favorite_player_ids = [r for (r,) in await self.bot.pool.fetch(query)]
-        player_streams = await self.get_player_streams(const.Twitch.LOL_GAME_CATEGORY_ID, favorite_player_ids)
-
-        query = """
-            SELECT a.puuid, a.player_id, in_game_name, tag_line, platform, display_name, twitch_id, last_edited
-            FROM lol_accounts a
-            JOIN lol_players p ON a.player_id = p.player_id
-            WHERE p.player_id=ANY($1)
+        Raises
+        ------
+        aiohttp.ClientResponseError
+            Riot API failed with anything but 404, i.e. 429 or 5xx. We don't know whether the account is in the game.
         """
-        player_account_rows: list[LivePlayerAccountRow] = await self.bot.pool.fetch(query, player_streams.keys())
-
-        # todo: bring pulsefire TaskGroup here
-        # I'm not sure how to combine `player_account_rows` with results from Semaphore though.
-        # https://pulsefire.iann838.com/usage/advanced/concurrent-requests/
-        for player_account_row in player_account_rows:
+        async with self.poll_semaphore:
             try:
-                game = await self.bot.lol.get_lol_spectator_v5_active_game_by_summoner(
+                return await self.bot.lol.get_lol_spectator_v5_active_game_by_summoner(
                     puuid=player_account_row["puuid"], region=player_account_row["platform"]
                 )
             except aiohttp.ClientResponseError as exc:
@@ -91,28 +101,99 @@ class Notifications(BaseNotifications):
                 # _valid_exceptions which means it just restarts the loop instead of raising the error
                 # and pulsefire unfortunately raises aiohttp errors.
                 # I do not to remove them from valid_exceptions.
-                if exc.status == 404:
-                    log.debug(
-                        "%s is not in the active game on account %s#%s",
-                        player_account_row["display_name"],
-                        player_account_row["in_game_name"],
-                        player_account_row["tag_line"],
-                    )
-                else:
+                if exc.status != 404:
                     log.warning(
-                        "`lol_spectator_v4_active_game_by_summoner` failed with %s for %s#%s",
+                        "`lol_spectator_v5_active_game_by_summoner` failed with %s for %s#%s",
                         exc.status,
                         player_account_row["in_game_name"],
                         player_account_row["tag_line"],
                     )
+                    raise
+                log.debug(
+                    "%s is not in the active game on account %s#%s",
+                    player_account_row["display_name"],
+                    player_account_row["in_game_name"],
+                    player_account_row["tag_line"],
+                )
+                return None
+
+    async def poll_active_games(
+        self, player_account_rows: list[LivePlayerAccountRow]
+    ) -> list[tuple[LivePlayerAccountRow, RiotAPISchema.LolSpectatorV5Game]]:
+        """Concurrently poll Riot Spectator API for accounts that are due.
+
+        Each account has its own cadence:
+        * accounts of players whose streams just went live have no state yet so they are polled right away;
+        * accounts in the game are re-checked every `IN_GAME_POLL_INTERVAL` - we only need to notice the game end;
+        * accounts that just left the game cool down for `LEFT_GAME_POLL_INTERVAL` -
+            the next game can't start before queue and champion select are over;
+        * other accounts are polled every tick;
+        * accounts whose poll failed (429, 5xx) keep their previous state and are polled again next tick.
+
+        Requests go through `RiotAPIRateLimiter` anyway, `POLL_CONCURRENCY` only bounds how many are in flight.
+
+        Returns
+        -------
+        list[tuple[LivePlayerAccountRow, RiotAPISchema.LolSpectatorV5Game]]
+            Freshly polled accounts that are in the game.
+            All known active games (including ones of accounts skipped this tick) are in `self.active_games`.
+        """
+        # forget accounts of players who went offline
+        live_puuids = {row["puuid"] for row in player_account_rows}
+        for state in (self.next_poll_at, self.active_games):
+            for puuid in state.keys() - live_puuids:
+                del state[puuid]
+
+        now = time.monotonic()
+        due_rows = [row for row in player_account_rows if self.next_poll_at.get(row["puuid"], 0.0) <= now]
+        games = await asyncio.gather(*(self.poll_active_game(row) for row in due_rows), return_exceptions=True)
+
+        now = time.monotonic()
+        polled_games: list[tuple[LivePlayerAccountRow, RiotAPISchema.LolSpectatorV5Game]] = []
+        for row, game in zip(due_rows, games, strict=True):
+            puuid = row["puuid"]
+            if isinstance(game, aiohttp.ClientResponseError):
+                # unknown - an in-game account must not be mistaken for the one that left the game
                 continue
+            if isinstance(game, BaseException):
+                raise game
+            if game is not None:
+                self.active_games[puuid] = game
+                self.next_poll_at[puuid] = now + IN_GAME_POLL_INTERVAL
+                polled_games.append((row, game))
+            elif self.active_games.pop(puuid, None) is not None:
+                self.next_poll_at[puuid] = now + LEFT_GAME_POLL_INTERVAL
+            else:
+                self.next_poll_at.pop(puuid, None)
+
+        log.debug("Polled %s/%s accounts, %s in game", len(due_rows), len(player_account_rows), len(polled_games))
+        return polled_games
+
+    async def send_notifications(self) -> None:
+        query = "SELECT DISTINCT character_id FROM lol_favorite_characters"
+        favorite_champion_ids = [r for (r,) in await self.bot.pool.fetch(query)]  # row.unnest
+
+        query = "SELECT DISTINCT player_id FROM lol_favorite_players"
+        favorite_player_ids = [r for (r,) in await self.bot.pool.fetch(query)]
+        player_streams = await self.get_player_streams(const.Twitch.LOL_GAME_CATEGORY_ID, favorite_player_ids)
+
+        query = """
+            SELECT a.puuid, a.player_id, in_game_name, tag_line, platform, display_name, twitch_id, last_edited
+            FROM lol_accounts a
+            JOIN lol_players p ON a.player_id = p.player_id
+            WHERE p.player_id=ANY($1)
+        """
+        player_account_rows: list[LivePlayerAccountRow] = await self.bot.pool.fetch(query, player_streams.keys())
+
+        polled_games = await self.poll_active_games(player_account_rows)
+        self.live_match_ids = [game["gameId"] for game in self.active_games.values()]
 
+        to_send: list[tuple[MatchToSend, list[RecipientTuple]]] = []
+        for player_account_row, game in polled_games:
             # continue game analysis
             if game["gameQueueConfigId"] != game_const.SOLO_RANKED_5v5_QUEUE_ENUM:
                 continue
 
-            self.live_match_ids.append(game["gameId"])
-
             participant = next((p for p in game["participants"] if p["puuid"] == player_account_row["puuid"]), None)
 
             if (
@@ -131,7 +212,7 @@ class Notifications(BaseNotifications):
                         AND s.enabled = TRUE;
                 """
                 rows: list[GetRecipientsQueryRow] = await self.bot.pool.fetch(
-                    query, participant["championId"], player_account_row["player_id"], game["gameId"]
+                    query, participant["championId"], player_account_row["player_id"], game["gameId"], prepared=True
                 )
 
                 if rows:
@@ -148,10 +229,21 @@ class Notifications(BaseNotifications):
                         champion.emote,
                     )
                     match_to_send = MatchToSend(self.bot, game, participant, player_account_row, champion)
-                    await self.send_match(
-                        match_to_send, [RecipientTuple(channel_id=row["channel_id"], spoil=row["spoil"]) for row in rows]
+                    to_send.append(
+                        (match_to_send, [RecipientTuple(channel_id=row["channel_id"], spoil=row["spoil"]) for row in rows])
                     )
 
+        if not to_send:
+            return
+
+        # resolve all streamers of this tick at once instead of a few Helix requests per notification
+        await self.bot.twitch.streamers.prefetch(match_to_send.twitch_id for match_to_send, _ in to_send)
+        for match_to_send, recipients in to_send:
+            if await self.bot.twitch.streamers.get(match_to_send.twitch_id) is None:
+                # banned or deleted twitch account, the resolver already warned about it
+                continue
+            await self.send_match(match_to_send, recipients)
+
     @aluloop(seconds=59)
     async def notification_worker(self) -> None:
         log.debug("--- League FPC Notifications Task is starting now ---")
@@ -163,23 +255,37 @@ class Notifications(BaseNotifications):
 
     async def edit_notifications(self) -> None:
         query = """
-            SELECT match_id, champion_id, platform, ARRAY_AGG ((channel_id, message_id)) channel_message_tuples
+            SELECT
+                match_id,
+                champion_id,
+                platform,
+                MAX(attempts) attempts,
+                ARRAY_AGG ((channel_id, message_id)) channel_message_tuples
             FROM lol_messages
-            WHERE NOT match_id=ANY($1)
+            WHERE NOT match_id=ANY($1) AND next_attempt_at <= NOW()
             GROUP BY match_id, champion_id, platform
         """
         match_rows: list[FindMatchesToEditQueryRow] = await self.bot.pool.fetch(query, self.live_match_ids)
 
         for match_row in match_rows:
+            key = (match_row["match_id"],)
+            match_id = f"{match_row['platform'].upper()}_{match_row['match_id']}"
+            if self.edit_queue.is_exhausted(match_row["attempts"]):
+                log.info("`%s` It's been too long - giving up on editing.", match_id)
+                await self.edit_queue.complete(key)
+                continue
+
             try:
-                match_id = f"{match_row['platform'].upper()}_{match_row['match_id']}"
                 continent = regions.Platform(match_row["platform"]).continent
 
+                # timeline is only requested once the match itself is available
                 match = await self.bot.lol.get_lol_match_v5_match(id=match_id, region=continent)
                 timeline = await self.bot.lol.get_lol_match_v5_match_timeline(id=match_id, region=continent)
 
             except aiohttp.ClientResponseError as exc:
                 if exc.status == 404:
+                    # match is not processed by Riot yet
+                    await self.edit_queue.postpone(key, match_row["attempts"], "Riot API: 404 Not Found")
                     continue
                 raise
 
@@ -194,8 +300,7 @@ class Notifications(BaseNotifications):
                             for channel_id, message_id in match_row["channel_message_tuples"]
                         ],
                     )
-            query = "DELETE FROM lol_messages WHERE match_id=$1"
-            await self.bot.pool.fetch(query, match_row["match_id"])
+            await self.edit_queue.complete(key)
 
 
 async def setup(bot: AluBot) -> None:
@@ -2,18 +2,17 @@ from __future__ import annotations
 
 import asyncio
 import logging
-import re
 from typing import TYPE_CHECKING, Any, override
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
-from bot import AluCog
-from utils import const, mimics
+from bot import AluCog, message_handler
+from utils import const, mimics, scanner
 
 if TYPE_CHECKING:
-    from bot import AluBot, AluInteraction
+    from bot import AluBot, AluInteraction, MessageContext
 
 
 __all__ = ("FixSocialLinks",)
@@ -42,30 +41,8 @@ FIX_DICT: dict[str, str] = {
 # * https://github.com/seriaati/embed-fixer
 # So, check it out, they might find something better.
 
-COMPILED_REGEX = re.compile(
-    r"""
-        http[s]?
-        ://
-        (?:www\.)?
-        (# group 1 - the actual site
-        x\.com|
-        twitter\.com|
-        reddit\.com|
-        instagram\.com|
-        tiktok\.com|
-        deviantart\.com|
-        tumblr\.com|
-        pixiv\.net|
-        bsky\.app|
-        twitch\.tv/(?:[a-zA-Z]|[0-9]|[_])+/clip | clips\.twitch\.tv
-        )
-        (/ (?: [a-zA-Z] | [0-9] | [$-_@.&+] | [!*(),] | (?:% [0-9a-fA-F][0-9a-fA-F]) )+ )  # group 2 - the rest of url
-    """,
-    flags=re.VERBOSE | re.IGNORECASE,  # X = VERBOSE, I = IGNORECASE
-)
 
-
-def fix_social_links(text: str, *, omit_rest: bool = False) -> str | None:
+def fix_social_links(text: str, *, omit_rest: bool = False, scanned: scanner.ScanResult | None = None) -> str | None:
     """Fix common social links by replacing them with links that provide better meta-embeds for Discord UI.
 
     Parameters
@@ -74,6 +51,8 @@ def fix_social_links(text: str, *, omit_rest: bool = False) -> str | None:
         Text to search social links in.
     omit_rest: bool = False
         Whether the final result should only include "better" links and exclude the rest of the text.
+    scanned: scanner.ScanResult | None = None
+        Already made scan of the `text`, i.e. `MessageContext.scan`, so it isn't scanned again.
 
     Returns
     -------
@@ -94,13 +73,23 @@ def fix_social_links(text: str, *, omit_rest: bool = False) -> str | None:
     ------
     * https://stackoverflow.com/a/15175239/19217368
     """
-    if found := COMPILED_REGEX.findall(text):
-        if omit_rest:
-            # found is list[tuple[str, ...]], where tuple has 2 strings (because we have 2 matching groups in regex)
-            #  i.e. [('instagram.com', '/p/DBg0L6foRNW/'), ('x.com', '/IceFrog/status/1718834746300719265')]
-            return "\n".join([f"{FIX_DICT[group[0].lower().split('.')[0]]}{group[1]}" for group in found])
-        return COMPILED_REGEX.sub(lambda mo: rf"{FIX_DICT[mo.group(1).lower().split('.')[0]]}{mo.group(2)}", text)
-    return None
+    if scanned is None:
+        scanned = scanner.scan(text)
+    if not (links := scanned.social_links):
+        return None
+
+    # span key is the site name like `instagram` and detail is the rest of url like `/p/DBg0L6foRNW/`
+    fixed = [f"{FIX_DICT[link.key]}{link.detail}" for link in links]
+    if omit_rest:
+        return "\n".join(fixed)
+
+    parts: list[str] = []
+    last_end = 0
+    for link, fixed_link in zip(links, fixed, strict=True):
+        parts += (text[last_end : link.start], fixed_link)
+        last_end = link.end
+    parts.append(text[last_end:])
+    return "".join(parts)
 
 
 async def get_metadata_embed_links(message: discord.Message) -> None:
@@ -116,7 +105,7 @@ async def get_metadata_embed_links(message: discord.Message) -> None:
     links: list[str] = []
     color = discord.Color.pink()
     for embed in message.embeds:
-        links += re.findall(const.Regex.URL, str(embed.description))
+        links += scanner.scan(str(embed.description)).urls
         color = embed.color
 
     if not links:
@@ -184,18 +173,14 @@ class FixSocialLinks(AluCog):
         content = self.fix_links_helper(link)
         await interaction.response.send_message(content)
 
-    @commands.Cog.listener("on_message")
-    async def community_fix_links(self, message: discord.Message) -> None:
+    @message_handler(guilds=const.MY_GUILDS, humans_only=True, has_urls=True)
+    async def community_fix_links(self, ctx: MessageContext) -> None:
         """(#Community Only!) Immediately fix messages with "wrong" social links with "better" ones.
 
         Currently only enabled in the community server.
         """
-        if not message.guild or message.guild.id not in const.MY_GUILDS:
-            return
-        if message.author.bot:
-            return
-
-        fixed_links = fix_social_links(message.content)
+        message = ctx.message
+        fixed_links = fix_social_links(message.content, scanned=ctx.scan)
         if fixed_links is None:
             return
 
@@ -39,15 +39,25 @@ class WebhookMaintenance(AluCog):
     @commands.Cog.listener(name="on_guild_channel_delete")
     async def deleted_channels(self, channel: discord.abc.GuildChannel) -> None:
         """Delete webhooks associated with a channel from the database when the channel gets deleted."""
+        self.bot.webhook_registry.invalidate(channel.id)
         query = "DELETE FROM webhooks WHERE channel_id = $1"
         await self.bot.pool.execute(query, channel.id)
 
     @commands.Cog.listener(name="on_guild_remove")
     async def removed_guilds(self, guild: discord.Guild) -> None:
         """Delete webhooks associated with a guild from the database when the bot leaves it."""
+        self.bot.webhook_registry.invalidate_many(channel.id for channel in guild.channels)
         query = "DELETE FROM webhooks WHERE guild_id = $1"
         await self.bot.pool.execute(query, guild.id)
 
+    @commands.Cog.listener(name="on_webhooks_update")
+    async def updated_webhooks(self, channel: discord.abc.GuildChannel) -> None:
+        """Invalidate the registry entry when webhooks of the channel get created/updated/deleted.
+
+        The gateway event doesn't tell what exactly happened, so the next send simply re-resolves the webhook.
+        """
+        self.bot.webhook_registry.invalidate(channel.id)
+
     @aluloop(hours=30 * 24)  # 30 days
     async def check_valid_webhooks(self) -> None:
         """Monthly task to double check webhooks in the database."""
@@ -64,8 +74,7 @@ class WebhookMaintenance(AluCog):
                 webhook = await webhook.fetch()
             except discord.NotFound:
                 # webhook is no longer valid
-                query = "DELETE FROM webhooks WHERE id = $1"
-                await self.bot.pool.execute(query, row["id"])
+                await self.bot.webhook_registry.discard(row["channel_id"], webhook)
             else:
                 # check if channel is still correct.
                 if not webhook.channel:
@@ -75,6 +84,7 @@ class WebhookMaintenance(AluCog):
                 if webhook.channel.id != row["channel_id"]:
                     query = "UPDATE webhooks SET channel_id = $1 WHERE id=$2"
                     await self.bot.pool.execute(query, webhook.channel.id, row["id"])
+                    self.bot.webhook_registry.invalidate(row["channel_id"])
 
             await asyncio.sleep(30)
 
@@ -34,8 +34,14 @@ else:
     asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 
-async def create_pool() -> asyncpg.Pool[asyncpg.Record]:
-    """Create a database connection pool."""
+async def create_pool(
+    *, min_size: int = 20, max_size: int = 20, statement_cache_size: int = 0
+) -> asyncpg.Pool[asyncpg.Record]:
+    """Create a database connection pool.
+
+    The main pool doesn't cache statements. A small pool with the statement cache enabled is created separately
+    for the hottest queries that opt into prepared statements, see `bot.instrumented_pool`.
+    """
 
     def _encode_jsonb(value: Any) -> str:
         return orjson.dumps(value).decode("utf-8")
@@ -48,7 +54,12 @@ async def create_pool() -> asyncpg.Pool[asyncpg.Record]:
 
     postgres_url = config["POSTGRES"]["VPS"] if platform.system() == "Linux" else config["POSTGRES"]["HOME"]
     return await asyncpg.create_pool(
-        postgres_url, init=init, command_timeout=60, min_size=20, max_size=20, statement_cache_size=0
+        postgres_url,
+        init=init,
+        command_timeout=60,
+        min_size=min_size,
+        max_size=max_size,
+        statement_cache_size=statement_cache_size,
     )
 
 
@@ -57,6 +68,7 @@ async def start_the_bot(*, test: bool, token: str) -> None:
     log = logging.getLogger()
     try:
         pool = await create_pool()
+        prepared_pool = await create_pool(min_size=2, max_size=4, statement_cache_size=64)
     except Exception:
         msg = "Could not set up PostgreSQL. Exiting."
         # error message to terminal
@@ -75,7 +87,7 @@ async def start_the_bot(*, test: bool, token: str) -> None:
         async with (
             aiohttp.ClientSession() as session,
             pool as pool,
-            AluBot(test=test, token=token, session=session, pool=pool) as alubot,
+            AluBot(test=test, token=token, session=session, pool=pool, prepared_pool=prepared_pool) as alubot,
         ):
             await alubot.start()
 
@@ -1,4 +1,4 @@
-from typing import TypedDict
+from typing import Literal, NotRequired, TypedDict
 
 __all__ = ("Config",)
 
@@ -46,6 +46,11 @@ class Tokens(TypedDict):
     STEAM: str
 
 
+class Renderer(TypedDict):
+    BACKEND: Literal["thread", "process"]
+    WORKERS: NotRequired[int]
+
+
 class Config(TypedDict):
     """Type-hints for dictionary created from loading `config.toml` file."""
 
@@ -55,3 +60,4 @@ class Config(TypedDict):
     TWITCH: Twitch
     WEBHOOKS: Webhooks
     TOKENS: Tokens
+    RENDERER: NotRequired[Renderer]
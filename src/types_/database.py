@@ -46,9 +46,20 @@ class PoolTypedWithAny(asyncpg.Pool[asyncpg.Record]):
     """
 
     # all methods below were changed from "asyncpg.Record" to "Any"
+    # and got `prepared` keyword from `bot.instrumented_pool.InstrumentedPool` wrapper
 
     @override
-    async def fetch(self, query: str, *args: Any, timeout: float | None = None) -> list[Any]: ...
+    async def fetch(
+        self, query: str, *args: Any, timeout: float | None = None, prepared: bool = False
+    ) -> list[Any]: ...
 
     @override
-    async def fetchrow(self, query: str, *args: Any, timeout: float | None = None) -> Any: ...
+    async def fetchrow(self, query: str, *args: Any, timeout: float | None = None, prepared: bool = False) -> Any: ...
+
+    @override
+    async def fetchval(
+        self, query: str, *args: Any, column: int = 0, timeout: float | None = None, prepared: bool = False
+    ) -> Any: ...
+
+    @override
+    async def execute(self, query: str, *args: Any, timeout: float | None = None, prepared: bool = False) -> str: ...
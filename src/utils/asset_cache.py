@@ -0,0 +1,256 @@
+"""Persistent on-disk cache for game asset images.
+
+Hero/item/ability/champion/rune icons almost never change, but FPC notifications request them over and over.
+The in-memory LRU in `TransposeClient.url_to_cached_image` is lost on every restart, so this cache keeps
+the downloaded bytes under `.alubot/assets/` between restarts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import mmap
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, TypedDict
+
+import aiohttp
+import orjson
+from PIL import Image
+
+from . import errors
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from aiohttp import ClientSession
+
+__all__ = ("AssetCache",)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+class AssetEntry(TypedDict):
+    url: str
+    size: int
+    etag: str | None
+    last_modified: str | None
+    validated_at: float
+    accessed_at: float
+
+
+class AssetCache:
+    """Persistent content cache for asset images keyed by the hash of their URL.
+
+    * Files are stored as `.alubot/assets/{sha256(url)}` with a small `index.json` next to them;
+    * Entries older than `revalidate_after` are revalidated with `If-None-Match`/`If-Modified-Since`,
+        so an unchanged icon costs a `304 Not Modified` instead of a full download;
+    * The total size is bounded by `max_bytes`, least recently accessed files are evicted first;
+    * Files are read through `mmap` in a thread so decoding doesn't block the event loop.
+
+    Attributes
+    ----------
+    directory: Path
+        Where the cached files live.
+    max_bytes: int
+        Size bound for all cached files together.
+    revalidate_after: float
+        How many seconds a cached file is considered fresh without asking the CDN.
+
+    """
+
+    def __init__(
+        self,
+        session: ClientSession,
+        *,
+        directory: Path = Path(".alubot/assets"),
+        max_bytes: int = 256 * 1024 * 1024,
+        revalidate_after: float = 24 * 60 * 60,
+    ) -> None:
+        self.session: ClientSession = session
+        self.directory: Path = directory
+        self.max_bytes: int = max_bytes
+        self.revalidate_after: float = revalidate_after
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path: Path = self.directory / "index.json"
+        self.index: dict[str, AssetEntry] = self.load_index()
+        self.total_bytes: int = sum(entry["size"] for entry in self.index.values())
+        self._save_task: asyncio.Task[None] | None = None
+        self._downloads: dict[str, asyncio.Task[Path]] = {}
+
+    def load_index(self) -> dict[str, AssetEntry]:
+        """Load the index from the disk, dropping entries whose files went missing."""
+        try:
+            data: dict[str, AssetEntry] = orjson.loads(self.index_path.read_bytes())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return {}
+        return {key: entry for key, entry in data.items() if (self.directory / key).exists()}
+
+    @staticmethod
+    def get_key(url: str) -> str:
+        """Get the file name for the asset `url`."""
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def get_path(self, key: str) -> Path:
+        """Get the file path for the asset `key`."""
+        return self.directory / key
+
+    def schedule_index_save(self) -> None:
+        """Save the index a bit later.
+
+        A single notification or a pre-warm writes many assets at once so let's not rewrite the index for each one.
+        """
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self.save_index())
+
+    async def save_index(self) -> None:
+        """Write the index to the disk."""
+        await asyncio.sleep(5.0)
+
+        def write(data: bytes) -> None:
+            temp_path = self.index_path.with_suffix(".tmp")
+            temp_path.write_bytes(data)
+            temp_path.replace(self.index_path)
+
+        await asyncio.to_thread(write, orjson.dumps(self.index))
+
+    def evict(self) -> None:
+        """Evict the least recently accessed assets until the cache fits into `max_bytes`."""
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        # evict a bit more than necessary so we don't have to evict on every following write
+        target = int(self.max_bytes * 0.9)
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]["accessed_at"]):
+            if self.total_bytes <= target:
+                break
+            self.get_path(key).unlink(missing_ok=True)
+            self.total_bytes -= entry["size"]
+            del self.index[key]
+        log.debug("Evicted assets down to %s bytes.", self.total_bytes)
+
+    async def fetch(self, url: str) -> Path:
+        """Make sure the asset for `url` is on the disk and fresh enough. Returns the path to the file.
+
+        Concurrent fetches of the same `url` (i.e. pre-warm, sprite atlases and notifications at startup)
+        share a single download instead of racing to write the same file.
+        """
+        key = self.get_key(url)
+        path = self.get_path(key)
+        entry = self.index.get(key)
+        now = time.time()
+
+        if entry and now - entry["validated_at"] < self.revalidate_after:
+            entry["accessed_at"] = now
+            return path
+
+        try:
+            task = self._downloads[key]
+        except KeyError:
+            task = self._downloads[key] = asyncio.create_task(self.download(url, key, path, entry, now))
+            task.add_done_callback(lambda _: self._downloads.pop(key, None))
+        # shield so a cancelled caller doesn't cancel the download for everybody else waiting on it
+        return await asyncio.shield(task)
+
+    async def download(self, url: str, key: str, path: Path, entry: AssetEntry | None, now: float) -> Path:
+        """Download or revalidate the asset and write it to the disk. Use `fetch` instead of this."""
+        headers: dict[str, str] = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        async with self.session.get(url, headers=headers) as response:
+            if entry and response.status == 304:
+                entry["validated_at"] = entry["accessed_at"] = now
+                self.schedule_index_save()
+                return path
+            if not response.ok:
+                if entry:
+                    # CDN hiccup - a stale icon is better than no icon at all
+                    log.debug("Revalidation failed with status %s for %s, serving stale asset.", response.status, url)
+                    return path
+                msg = f"`AssetCache.fetch`: Status {response.status} - Could not download file from {url}"
+                raise errors.ResponseNotOK(msg)
+
+            content = await response.read()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        if not content:
+            msg = f"`AssetCache.fetch`: Got empty response from {url}"
+            raise errors.ResponseNotOK(msg)
+
+        def write() -> None:
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_bytes(content)
+            temp_path.replace(path)
+
+        await asyncio.to_thread(write)
+
+        if old_entry := self.index.get(key):
+            self.total_bytes -= old_entry["size"]
+        self.index[key] = {
+            "url": url,
+            "size": len(content),
+            "etag": etag,
+            "last_modified": last_modified,
+            "validated_at": now,
+            "accessed_at": now,
+        }
+        self.total_bytes += len(content)
+        self.evict()
+        self.schedule_index_save()
+        return path
+
+    @staticmethod
+    def read_image(path: Path) -> Image.Image:
+        """Read and decode the image file via memory-map. This is blocking."""
+        with path.open("rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            image = Image.open(mm)
+            image.load()
+        return image
+
+    async def get_image(self, url: str) -> Image.Image:
+        """Get decoded image for the asset `url`, downloading it only if necessary."""
+        path = await self.fetch(url)
+        try:
+            return await asyncio.to_thread(self.read_image, path)
+        except FileNotFoundError:
+            # got evicted (or deleted by hand) in between
+            if entry := self.index.pop(self.get_key(url), None):
+                self.total_bytes -= entry["size"]
+            path = await self.fetch(url)
+            return await asyncio.to_thread(self.read_image, path)
+
+    async def prewarm(self, urls: Iterable[str], semaphore: asyncio.Semaphore) -> None:
+        """Download assets that are not cached yet so the first notifications after a restart don't wait for the CDN.
+
+        Parameters
+        ----------
+        urls: Iterable[str]
+            URLs to pre-warm. Local file paths and already cached URLs are skipped.
+        semaphore: asyncio.Semaphore
+            Semaphore to limit the amount of simultaneous downloads.
+
+        """
+        missing = {
+            url for url in urls if url.startswith(("http://", "https://")) and self.get_key(url) not in self.index
+        }
+        if not missing:
+            return
+
+        async def fetch_quietly(url: str) -> None:
+            async with semaphore:
+                try:
+                    await self.fetch(url)
+                except (errors.ResponseNotOK, aiohttp.ClientError) as exc:
+                    log.debug("Failed to pre-warm asset %s: %s", url, exc)
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*(fetch_quietly(url) for url in missing))
+        log.debug("Pre-warmed %s assets in %.3fs", len(missing), time.perf_counter() - start_time)
@@ -6,6 +6,7 @@ Currently supported games:
 * League of Legends:    ext.lol.fpc
 """
 
+from .edit_queue import *
 from .models import *
 from .notifications import *
 from .settings import *
@@ -0,0 +1,126 @@
+"""Edit Queue.
+
+Durable queue of FPC notifications waiting for the post-match edit.
+
+The queue lives right in `{prefix}_messages` tables: besides the message info every row has
+`attempts`, `next_attempt_at` and `last_error` columns. So the retry state survives restarts and
+the editors only pick rows that are due instead of asking the game APIs about every pending match every loop.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import random
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from bot import AluBot
+
+__all__ = (
+    "EditBackoff",
+    "EditQueue",
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+class EditBackoff(NamedTuple):
+    """Exponential backoff policy for a post-match data source.
+
+    Attributes
+    ----------
+    initial: float
+        Delay (in seconds) after the first failed attempt.
+    factor: float
+        Multiplier for every consequent delay.
+    maximum: float
+        Upper bound for a single delay.
+    max_attempts: int
+        Amount of attempts after which the editor should give up on the match.
+    jitter: float
+        Relative random spread of the delay so a burst of matches doesn't come due at the exact same loop.
+    """
+
+    initial: float
+    factor: float
+    maximum: float
+    max_attempts: int
+    jitter: float = 0.1
+
+    def delay(self, attempts: int) -> datetime.timedelta:
+        """Get the delay before the next attempt given the amount of `attempts` already made."""
+        seconds = min(self.initial * self.factor ** max(attempts - 1, 0), self.maximum)
+        seconds *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return datetime.timedelta(seconds=seconds)
+
+
+class EditQueue:
+    """Edit queue on top of `{prefix}_messages` table.
+
+    A queue entry is a group of rows sharing the same `key_columns` values,
+    i.e. all messages about the same match (and player) that need the same edit.
+
+    Attributes
+    ----------
+    bot: AluBot
+        The bot instance.
+    table: str
+        Name of the table with messages to edit.
+    key_columns: tuple[str, ...]
+        Columns that identify a queue entry.
+    backoff: EditBackoff
+        Backoff policy tuned for the data source the editor waits for.
+
+    Notes
+    -----
+    * Editors select due entries themselves with `next_attempt_at <= NOW()` in their `WHERE` clause
+        since they group rows in their own way.
+    """
+
+    def __init__(self, bot: AluBot, table: str, key_columns: tuple[str, ...], backoff: EditBackoff) -> None:
+        self.bot: AluBot = bot
+        self.table: str = table
+        self.key_columns: tuple[str, ...] = key_columns
+        self.backoff: EditBackoff = backoff
+
+    def key_condition(self, offset: int = 0) -> str:
+        """Get `WHERE` condition for the entry key with parameters numbered after `offset`."""
+        return " AND ".join(f"{column}=${offset + i}" for i, column in enumerate(self.key_columns, start=1))
+
+    def is_exhausted(self, attempts: int) -> bool:
+        """Whether the editor should give up on the entry that has already had `attempts`."""
+        return attempts >= self.backoff.max_attempts
+
+    async def postpone(self, key: tuple[int, ...], attempts: int, error: str) -> datetime.timedelta:
+        """Record a failed attempt and schedule the next one.
+
+        Parameters
+        ----------
+        key: tuple[int, ...]
+            Values for `key_columns`.
+        attempts: int
+            Amount of attempts the entry had before this one.
+        error: str
+            Short description why the attempt failed, stored into `last_error` for debugging.
+
+        Returns
+        -------
+        datetime.timedelta
+            Delay before the next attempt.
+        """
+        delay = self.backoff.delay(attempts + 1)
+        offset = len(key)
+        query = f"""
+            UPDATE {self.table}
+            SET attempts = ${offset + 1}, next_attempt_at = NOW() + ${offset + 2}::interval, last_error = ${offset + 3}
+            WHERE {self.key_condition()}
+        """
+        await self.bot.pool.execute(query, *key, attempts + 1, delay, error)
+        return delay
+
+    async def complete(self, key: tuple[int, ...]) -> None:
+        """Remove the entry from the queue, meaning the editing is either finished or given up on."""
+        query = f"DELETE FROM {self.table} WHERE {self.key_condition()}"
+        await self.bot.pool.execute(query, *key)
@@ -5,7 +5,6 @@ from typing import TYPE_CHECKING, NotRequired, TypedDict
 
 if TYPE_CHECKING:
     import discord
-    from PIL import Image
 
     from bot import AluBot
 
@@ -41,12 +40,18 @@ class BaseMatchToSend(abc.ABC):
         # self.preview_url: str = preview_url
 
     @abc.abstractmethod
-    async def notification_image(self) -> Image.Image:
-        """Get notification image that will be `set_image` into embed."""
+    async def notification_image(self) -> bytes:
+        """Get PNG bytes of the notification image that will be `set_image` into embed."""
 
     @abc.abstractmethod
-    async def insert_into_game_messages(self, message_id: int, channel_id: int) -> None:
-        """Insert the match to messages table so we can edit it later."""
+    async def insert_into_game_messages(self, messages: list[tuple[int, int]]) -> None:
+        """Insert the match to messages table so we can edit it later.
+
+        Parameters
+        ----------
+        messages: list[tuple[int, int]]
+            `(message_id, channel_id)` pairs of the sent notifications. Implementations should write them in one go.
+        """
 
     @abc.abstractmethod
     async def webhook_send_kwargs(self) -> RecipientKwargs:
@@ -62,5 +67,5 @@ class BaseMatchToEdit(abc.ABC):
         self.bot: AluBot = bot
 
     @abc.abstractmethod
-    async def edit_notification_image(self, embed_image_url: str, color: discord.Color) -> Image.Image:
-        """Edit the notification image."""
+    async def edit_notification_image(self, embed_image_url: str, color: discord.Color) -> bytes:
+        """Get PNG bytes of the edited notification image."""
@@ -1,17 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from io import BytesIO
 from typing import TYPE_CHECKING, Any, NamedTuple, TypedDict
 
 import discord
 
 from bot import AluCog
-from utils import errors, mimics
+from utils import MISSING, errors, mimics
 
 if TYPE_CHECKING:
     from bot import AluBot
+    from utils.twitch import LiveStream
 
-    from .models import BaseMatchToEdit, BaseMatchToSend
+    from .models import BaseMatchToEdit, BaseMatchToSend, RecipientKwargs
 
     class GetTwitchLivePlayerRow(TypedDict):
         twitch_id: str
@@ -21,8 +24,6 @@ if TYPE_CHECKING:
         channel_id: int
         spoil: bool
 
-    import twitchio
-
 __all__ = (
     "BaseNotifications",
     "EditTuple",
@@ -43,6 +44,14 @@ class EditTuple(NamedTuple):
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
 
+FANOUT_CONCURRENCY = 10
+"""How many webhook sends a single FPC notification is allowed to have in flight at once.
+
+Every recipient is a separate channel thus a separate webhook (and a separate Discord rate-limit bucket
+that discord.py's webhook adapter already tracks for us), so the only limit we need to respect ourselves
+is the global 50 requests/second one. 10 concurrent sends keep us well below it.
+"""
+
 
 class BaseNotifications(AluCog):
     def __init__(self, bot: AluBot, prefix: str, *args: Any, **kwargs: Any) -> None:
@@ -50,9 +59,13 @@ class BaseNotifications(AluCog):
         self.prefix: str = prefix
 
         self.message_cache: dict[int, discord.WebhookMessage] = {}
+        self.fanout_semaphore: asyncio.Semaphore = asyncio.Semaphore(FANOUT_CONCURRENCY)
+
+    async def get_player_streams(self, twitch_category_id: str, player_ids: list[int]) -> dict[int, LiveStream]:
+        """Get `player_id` for favorite FPC streams that are currently live on Twitch.
 
-    async def get_player_streams(self, twitch_category_id: str, player_ids: list[int]) -> dict[int, twitchio.Stream]:
-        """Get `player_id` for favorite FPC streams that are currently live on Twitch."""
+        This is a local lookup in `bot.twitch.live_streams` registry that is kept up-to-date by EventSub.
+        """
         query = f"""
             SELECT twitch_id, player_id
             FROM {self.prefix}_players
@@ -60,43 +73,86 @@ class BaseNotifications(AluCog):
         """
         rows: list[GetTwitchLivePlayerRow] = await self.bot.pool.fetch(query, player_ids)
         twitch_id_to_player_id = {row["twitch_id"]: row["player_id"] for row in rows}
-        if not twitch_id_to_player_id:
-            # otherwise fetch_streams fetches top100 streams and we dont want that.
-            return {}
+        live_streams = await self.bot.twitch.live_streams.get_live(twitch_id_to_player_id.keys(), twitch_category_id)
+        return {twitch_id_to_player_id[twitch_id]: stream for twitch_id, stream in live_streams.items()}
+
+    async def send_to_recipient(
+        self, recipient: RecipientTuple, send_kwargs: RecipientKwargs, image_bytes: bytes
+    ) -> discord.WebhookMessage:
+        """Send the notification to a single recipient channel."""
+        async with self.fanout_semaphore:
+            channel = self.bot.get_channel(recipient.channel_id) or await self.bot.fetch_channel(recipient.channel_id)
 
-        return {
-            twitch_id_to_player_id[stream.user.id]: stream
-            for stream in await self.bot.twitch.fetch_streams(user_ids=list(twitch_id_to_player_id.keys()))
-            if stream.game_id == twitch_category_id
-        }
+            assert isinstance(channel, discord.TextChannel)
+            mimic = mimics.Mimic.from_channel(self.bot, channel)
+            # `discord.File` is a stateful file pointer so every concurrent send needs its own copy
+            file = discord.File(BytesIO(image_bytes), filename=send_kwargs["file"].filename)
+            return await mimic.send(
+                wait=True,
+                report=True,
+                embed=send_kwargs["embed"],
+                file=file,
+                username=send_kwargs.get("username", MISSING),
+                avatar_url=send_kwargs.get("avatar_url", MISSING),
+            )
 
     async def send_match(self, match: BaseMatchToSend, recipients: list[RecipientTuple]) -> None:
-        send_kwargs = await match.webhook_send_kwargs()
+        """Send the match notification to all recipients concurrently.
 
-        for recipient in recipients:
-            channel = self.bot.get_channel(recipient.channel_id) or await self.bot.fetch_channel(recipient.channel_id)
+        Messages that need post-match edits are remembered in the database with a single batched insert at the end.
+        """
+        send_kwargs = await match.webhook_send_kwargs()
+        image_fp = send_kwargs["file"].fp
+        image_fp.seek(0)
+        image_bytes = image_fp.read()
+
+        results = await asyncio.gather(
+            *(self.send_to_recipient(recipient, send_kwargs, image_bytes) for recipient in recipients),
+            return_exceptions=True,
+        )
+
+        to_edit: list[tuple[int, int]] = []
+        for recipient, result in zip(recipients, results, strict=True):
+            if isinstance(result, BaseException):
+                embed = discord.Embed(
+                    description=f"Failed to send {self.prefix} FPC notification to channel `{recipient.channel_id}`."
+                ).set_footer(text=f"{self.__class__.__name__}.send_match")
+                await self.bot.exc_manager.register_error(result, embed)
+                continue
 
-            assert isinstance(channel, discord.TextChannel)
-            mimic = mimics.Mimic.from_channel(self.bot, channel)
-            message = await mimic.send(wait=True, report=True, **send_kwargs)
             if recipient.spoil:
-                self.message_cache[message.id] = message
-                await match.insert_into_game_messages(message.id, channel.id)
+                self.message_cache[result.id] = result
+                to_edit.append((result.id, recipient.channel_id))
+
+        if to_edit:
+            await match.insert_into_game_messages(to_edit)
+
+    async def fetch_message_to_edit(self, edit: EditTuple) -> discord.Message:
+        """Get the notification message from the cache or fetch it via the channel's webhook."""
+        try:
+            return self.message_cache[edit.message_id]
+        except KeyError:
+            pass
+
+        webhook = await self.bot.webhook_from_database(edit.channel_id)
+        try:
+            return await webhook.fetch_message(edit.message_id)
+        except discord.NotFound as exc:
+            # Unknown Webhook - it should be re-resolved next time; a deleted message says nothing about the webhook
+            if exc.code == 10015:
+                self.bot.webhook_registry.invalidate(edit.channel_id)
+            raise
 
     async def edit_match(self, match: BaseMatchToEdit, edits: list[EditTuple]) -> None:
-        new_image_file: discord.File | None = None
+        new_image: bytes | None = None
+        new_filename = "edited.png"
 
-        for edit in edits:
-            try:
-                # try to find in cache
-                message = self.message_cache[edit.message_id]
-            except KeyError:
-                # we have to fetch it
-                webhook = await self.bot.webhook_from_database(edit.channel_id)
-                message = await webhook.fetch_message(edit.message_id)
+        # fetch all messages concurrently instead of one by one
+        messages = await asyncio.gather(*(self.fetch_message_to_edit(edit) for edit in edits))
 
+        for message in messages:
             embed = message.embeds[0]
-            if new_image_file is None:
+            if new_image is None:
                 embed_image_url = embed.image.url
                 color = embed.color
                 if not embed_image_url:
@@ -111,13 +167,13 @@ class BaseNotifications(AluCog):
                 new_filename = f"edited-{old_filename}.png"
                 log.debug(new_filename)
                 new_image = await match.edit_notification_image(embed_image_url, color)
-
-                new_image_file = self.bot.transposer.image_to_file(new_image, filename=new_filename)
             else:
-                # already have the file object from some other channel message editing
+                # already have the image from some other channel message editing
                 # since the image should be same everywhere
                 pass
 
+            # `discord.File` is a stateful file pointer so every message needs its own
+            new_image_file = self.bot.transposer.bytes_to_file(new_image, filename=new_filename)
             embed.set_image(url=f"attachment://{new_image_file.filename}")
             await message.edit(embed=embed, attachments=[new_image_file])
             self.message_cache.pop(message.id, None)
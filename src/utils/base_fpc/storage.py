@@ -2,18 +2,22 @@ from __future__ import annotations
 
 import abc
 import asyncio
+import hashlib
 import logging
 import random
 import re
 import time
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, TypeVar, override
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypedDict, TypeVar, override
 
+import aiohttp
 import discord
+import orjson
 from discord import app_commands
 
 from bot import aluloop
-from utils import const, fuzzy
+from utils import const, errors, fuzzy
 
 if TYPE_CHECKING:
     from bot import AluBot, AluInteraction
@@ -28,10 +32,25 @@ __all__ = (
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
 
+SNAPSHOT_DIRECTORY = Path(".alubot/storages")
+"""Where storages keep their on-disk snapshots for instant warm start."""
+SNAPSHOT_FORMAT = 1
+"""Bump this when the snapshot layout changes so old snapshots get ignored."""
+
+NEGATIVE_CACHE_TTL = 60 * 60
+"""Seconds to remember that some ID is unknown even after the refresh so we don't refresh for it on every lookup."""
+
 VT = TypeVar("VT")
 PseudoVT = TypeVar("PseudoVT")
 
 
+class Snapshot(TypedDict):
+    format: int
+    version: str | None
+    saved_at: float
+    data: dict[str, Any]
+
+
 @dataclass
 class Character:
     id: int
@@ -68,14 +87,9 @@ class CharacterTransformer[CharacterT: Character, PseudoCharacterT: Character](a
     @override
     async def autocomplete(self, interaction: AluInteraction, current: str) -> list[app_commands.Choice[int]]:
         storage = self.get_character_storage(interaction)
-        characters = await storage.walk_characters()
+        index = await storage.get_autocomplete_index()
 
-        options = fuzzy.finder(current, characters, key=lambda x: x.display_name)
-        if not options:
-            characters.sort(key=lambda x: x.display_name)
-            options = characters[:5]
-        else:
-            options = options[:5]
+        options = index.search(current, limit=5) or index.first(5)
 
         return [app_commands.Choice(name=character.display_name, value=character.id) for character in options]
 
@@ -89,6 +103,20 @@ class GameDataStorage[VT, PseudoVT](abc.ABC):
     if KeyError arises - there is an attempt to refresh the data, otherwise it's assumed that the data is fine enough
     (yes, it can backfire with an update where, for example, some item icon changes,
     but we still update storage once per day, so whatever).
+
+    Refreshes are incremental:
+    * if the upstream exposes a version stamp (`fetch_version`) and it didn't change - the start-up revalidation
+        of the snapshot doesn't re-fetch anything. Misses and the daily update always re-fetch since upstreams
+        add constants (i.e. event items) without bumping their version stamp;
+    * otherwise the new data is diffed against the old one entity by entity (by hashes of their serialized payloads)
+        and unchanged entities keep their old objects;
+    * `cached_data` is swapped in one go (copy-on-write), so readers keep using the old snapshot during a refresh
+        and never wait for it unless the storage isn't filled at all yet;
+    * IDs that are still unknown after a refresh are negative-cached for `NEGATIVE_CACHE_TTL` seconds
+        so the same unknown ID doesn't trigger a refresh on every lookup.
+
+    The data is also persisted to a snapshot file in `SNAPSHOT_DIRECTORY` after every change,
+    so on start-up the storage is filled from the disk right away and gets revalidated in the background.
     """
 
     if TYPE_CHECKING:
@@ -104,9 +132,19 @@ class GameDataStorage[VT, PseudoVT](abc.ABC):
         """
         self.bot: AluBot = bot
         self.lock: asyncio.Lock = asyncio.Lock()
+        self.prewarm_task: asyncio.Task[None] | None = None
+
+        self.version: str | None = None
+        """Upstream version stamp of the current `cached_data`, if the upstream provides one."""
+        self.fingerprints: dict[int, bytes] = {}
+        """Mapping `object_id -> hash of the serialized object` to diff the refreshed data against."""
+        self.negative_cache: dict[int, float] = {}
+        """Mapping `object_id -> time.monotonic()` until which the ID is known to be missing."""
+        self.snapshot_path: Path = SNAPSHOT_DIRECTORY / f"{self.__class__.__name__}.json"
 
     def start(self) -> None:
         """Start the storage tasks."""
+        self.load_snapshot()
         # self.update_data.add_exception_type(errors.ResponseNotOK)
         # random times just so we don't have a possibility of all cache being updated at the same time
         self.update_data.change_interval(hours=24, minutes=random.randint(1, 59))
@@ -124,26 +162,169 @@ class GameDataStorage[VT, PseudoVT](abc.ABC):
         We get the data and sort it out into a convenient dictionary to cache.
         """
 
+    async def fetch_version(self) -> str | None:
+        """Get a cheap version stamp of the upstream data, i.e. game patch.
+
+        Subclasses can override it if the upstream provides one.
+        By default, it's `None` meaning "unknown" so the data is always re-fetched and diffed.
+        """
+        return None
+
+    def asset_urls(self) -> list[str]:
+        """Static asset URLs (icons) that image builders are going to request from this storage's objects.
+
+        These get pre-downloaded into the on-disk asset cache after every update.
+        Subclasses can override it, by default nothing is pre-warmed.
+        """
+        return []
+
+    def load_object(self, raw: Any) -> VT:
+        """Convert a deserialized snapshot entry back into a storage object.
+
+        By default, it's returned as is which is fine for plain strings and dicts.
+        Storages with dataclass objects need to override it.
+        """
+        return raw
+
+    def load_snapshot(self) -> None:
+        """Fill the storage from the on-disk snapshot if there is a valid one. This is blocking but fast."""
+        start_time = time.perf_counter()
+        try:
+            snapshot: Snapshot = orjson.loads(self.snapshot_path.read_bytes())
+            if snapshot["format"] != SNAPSHOT_FORMAT:
+                return
+            data = {int(object_id): self.load_object(raw) for object_id, raw in snapshot["data"].items()}
+        except FileNotFoundError:
+            return
+        except (orjson.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+            # most likely, the objects changed their schema between versions of the bot
+            log.warning("Storage %s: ignoring invalid snapshot: %r", self.__class__.__name__, exc)
+            return
+
+        self.cached_data = data
+        self.fingerprints = {object_id: self.fingerprint(value) for object_id, value in data.items()}
+        self.version = snapshot["version"]
+        log.debug(
+            "Storage %s is loaded from snapshot (version %s) in %.3fs",
+            self.__class__.__name__,
+            self.version,
+            time.perf_counter() - start_time,
+        )
+        self.after_update()
+
+    async def save_snapshot(self) -> None:
+        """Write the current data into the on-disk snapshot."""
+        snapshot: Snapshot = {
+            "format": SNAPSHOT_FORMAT,
+            "version": self.version,
+            "saved_at": time.time(),
+            "data": self.cached_data,  # pyright: ignore[reportAssignmentType] # orjson handles dataclasses and int keys
+        }
+
+        def write() -> None:
+            data = orjson.dumps(snapshot, option=orjson.OPT_NON_STR_KEYS)
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.snapshot_path.with_suffix(".tmp")
+            temp_path.write_bytes(data)
+            temp_path.replace(self.snapshot_path)
+
+        await asyncio.to_thread(write)
+
+    @staticmethod
+    def fingerprint(value: VT) -> bytes:
+        """Hash of the serialized storage object to detect whether it changed."""
+        return hashlib.blake2b(orjson.dumps(value, option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
+
     @aluloop()
     async def update_data(self) -> None:
         """The task responsible for keeping the data up-to-date."""
-        log.debug("Updating Storage %s.", self.__class__.__name__)
+        # the first iteration only revalidates the snapshot loaded on start-up, so the version stamp is enough for it
+        await self.refresh(check_version=self.update_data.current_loop == 0)
+
+    async def refresh(self, *, check_version: bool = True) -> None:
+        """Refresh the data and swap it in if anything changed.
+
+        Concurrent callers share the same refresh: whoever comes while it's running just waits for it.
+
+        Parameters
+        ----------
+        check_version: bool = True
+            Whether to skip the re-fetch if the upstream version stamp didn't change.
+        """
+        if self.lock.locked():
+            # somebody is already refreshing, just wait for the result
+            async with self.lock:
+                return
+
         async with self.lock:
+            log.debug("Updating Storage %s.", self.__class__.__name__)
             start_time = time.perf_counter()
-            self.cached_data = await self.fill_data()
+
+            try:
+                version = await self.fetch_version()
+            except (aiohttp.ClientError, errors.ResponseNotOK) as exc:
+                log.warning("Storage %s: failed to fetch the upstream version: %s", self.__class__.__name__, exc)
+                version = None
+            if check_version and version is not None and version == self.version and hasattr(self, "cached_data"):
+                log.debug("Storage %s: version %s is up-to-date.", self.__class__.__name__, version)
+                return
+
+            new_data = await self.fill_data()
+            old_data: dict[int, VT] = getattr(self, "cached_data", {})
+
+            def diff() -> tuple[dict[int, VT], dict[int, bytes], int]:
+                merged: dict[int, VT] = {}
+                fingerprints: dict[int, bytes] = {}
+                changed = 0
+                for object_id, value in new_data.items():
+                    fingerprint = self.fingerprint(value)
+                    if object_id in old_data and self.fingerprints.get(object_id) == fingerprint:
+                        # keep the old object so anything derived from it stays valid
+                        merged[object_id] = old_data[object_id]
+                    else:
+                        merged[object_id] = value
+                        changed += 1
+                    fingerprints[object_id] = fingerprint
+                return merged, fingerprints, changed + len(old_data.keys() - new_data.keys())
+
+            merged, fingerprints, changed = await asyncio.to_thread(diff)
+            version_changed = version != self.version
+            self.version = version
+            self.fingerprints = fingerprints
+            if changed:
+                # copy-on-write swap: readers holding the old dict keep using it
+                self.cached_data = merged
+                self.negative_cache = {
+                    object_id: until for object_id, until in self.negative_cache.items() if object_id not in merged
+                }
+            if changed or version_changed:
+                await self.save_snapshot()
+
             log.debug(
-                "Storage %s %s is updated in %.3fs",
+                "Storage %s %s is updated in %.3fs: %s changed entities.",
                 __package__.split(".")[-1].capitalize() if __package__ else "",
                 self.__class__.__name__,
                 time.perf_counter() - start_time,
+                changed,
             )
+        if changed:
+            self.after_update()
+
+    def after_update(self) -> None:
+        """Hook that is called every time `cached_data` gets refreshed with some changes.
+
+        By default, it pre-warms the on-disk asset cache with `asset_urls`.
+        Subclasses can extend it to rebuild anything derived from the data.
+        """
+        if (urls := self.asset_urls()) and (self.prewarm_task is None or self.prewarm_task.done()):
+            self.prewarm_task = asyncio.create_task(self.bot.transposer.prewarm_assets(urls))
 
     async def get_cached_data(self) -> dict[int, VT]:
         """Get the whole cached data."""
         try:
             return self.cached_data
         except AttributeError:
-            await self.update_data()
+            await self.refresh()
             return self.cached_data
 
     async def get_value(self, object_id: int) -> VT:
@@ -154,8 +335,17 @@ class GameDataStorage[VT, PseudoVT](abc.ABC):
             # let's try to update the cache in case it's a KeyError due to
             # * new patch or something
             # * the data is not initialized then we will get stuck in self.lock waiting for the data.
-            await self.update_data()
-            return self.cached_data[object_id]
+            if (until := self.negative_cache.get(object_id)) and until > time.monotonic():
+                raise KeyError(object_id) from None
+
+            # not gated by the version stamp: upstreams add constants mid-version,
+            # the negative cache already limits this to one refresh per unknown ID per `NEGATIVE_CACHE_TTL`
+            await self.refresh(check_version=False)
+            try:
+                return self.cached_data[object_id]
+            except KeyError:
+                self.negative_cache[object_id] = time.monotonic() + NEGATIVE_CACHE_TTL
+                raise
 
     async def send_unknown_value_report(self, object_id: int) -> None:
         embed = discord.Embed(
@@ -182,6 +372,22 @@ class GameDataStorage[VT, PseudoVT](abc.ABC):
 
 
 class CharacterStorage(GameDataStorage[CharacterT, PseudoCharacterT]):
+    if TYPE_CHECKING:
+        autocomplete_index: fuzzy.AutocompleteIndex[CharacterT]
+
+    @override
+    def after_update(self) -> None:
+        super().after_update()
+        self.autocomplete_index = fuzzy.AutocompleteIndex(self.cached_data.values(), key=lambda x: x.display_name)
+
+    async def get_autocomplete_index(self) -> fuzzy.AutocompleteIndex[CharacterT]:
+        """Get the prebuilt index for autocomplete of characters by their display names."""
+        try:
+            return self.autocomplete_index
+        except AttributeError:
+            await self.get_cached_data()
+            return self.autocomplete_index
+
     async def create_character_emote_helper(
         self,
         *,
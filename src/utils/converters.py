@@ -212,13 +212,14 @@ class MonthPicker(commands.Converter[int], app_commands.Transformer):
         "November": 11,
         "December": 12,
     }
+    index: fuzzy.AutocompleteIndex[str] = fuzzy.AutocompleteIndex(mapping.keys())
 
     def worker(self, argument: str) -> int:
         if argument in self.mapping:
             return self.mapping[argument]
 
         # fuzzy search
-        keys = fuzzy.finder(argument, self.mapping.keys())
+        keys = self.index.search(argument)
         if len(keys) == 1:
             return self.mapping[keys[0]]
         msg = f"Couldn't understand month spelling out of {argument!r}"
@@ -234,7 +235,7 @@ class MonthPicker(commands.Converter[int], app_commands.Transformer):
 
     @override
     async def autocomplete(self, interaction: AluInteraction, arg: str) -> list[app_commands.Choice[str]]:
-        month_names = self.mapping.keys() if not arg else fuzzy.finder(arg, self.mapping.keys())
+        month_names = self.mapping.keys() if not arg else self.index.search(arg)
         return [app_commands.Choice(name=name, value=name) for name in month_names]
 
 
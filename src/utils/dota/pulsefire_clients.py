@@ -30,6 +30,7 @@ if TYPE_CHECKING:
     from .schemas import odota_constants, opendota, steam_web_api, stratz
 
 __all__ = (
+    "STRATZ_BATCH_SIZE",
     "OpenDotaClient",
     "OpenDotaConstantsClient",
     "SteamWebAPIClient",
@@ -276,6 +277,43 @@ class StratzAPIRateLimiter(DotaAPIsRateLimiter):
         return header_limits, header_counts
 
 
+STRATZ_BATCH_SIZE = 10
+"""Maximum amount of matches packed into one `StratzClient.get_fpc_matches_to_edit` query."""
+
+FPC_MATCH_TO_EDIT_FIELDS = """
+        statsDateTime
+        players(steamAccountId: $friend_id) {
+            isVictory
+            heroId
+            variant
+            kills
+            deaths
+            assists
+            item0Id
+            item1Id
+            item2Id
+            item3Id
+            item4Id
+            item5Id
+            neutral0Id
+            playbackData {
+                abilityLearnEvents {
+                    abilityId
+                }
+                purchaseEvents {
+                    time
+                    itemId
+                }
+            }
+            stats {
+                matchPlayerBuffEvent {
+                    itemId
+                }
+            }
+        }"""
+"""Selection of `match` fields that FPC notification editing needs. `$friend_id` is a variable placeholder."""
+
+
 class StratzClient(BaseClient):
     """Pulsefire client to boilerplate work with Stratz GraphQL queries.
 
@@ -326,42 +364,67 @@ class StratzClient(BaseClient):
 
     async def get_fpc_match_to_edit(self, *, match_id: int, friend_id: int) -> stratz.FPCMatchesResponse:
         """Queries info that I need to know in order to edit Dota 2 FPC notification."""
+        pair = (match_id, friend_id)
+        return (await self.get_fpc_matches_to_edit([pair]))[pair]
+
+    async def get_fpc_matches_to_edit(
+        self, match_friend_ids: Sequence[tuple[int, int]]
+    ) -> dict[tuple[int, int], stratz.FPCMatchesResponse]:
+        """Batched version of `get_fpc_match_to_edit`.
+
+        Packs many `(match_id, friend_id)` pairs into a single GraphQL document using aliases
+        and splits the response back per pair. This costs one request against Stratz daily quota instead of N.
+
+        Parameters
+        ----------
+        match_friend_ids: Sequence[tuple[int, int]]
+            `(match_id, friend_id)` pairs. Keep it reasonably small, i.e. `STRATZ_BATCH_SIZE`,
+            so the query doesn't hit Stratz complexity limits.
+
+        Returns
+        -------
+        dict[tuple[int, int], stratz.FPCMatchesResponse]
+            Mapping `(match_id, friend_id) -> response` in the same format `get_fpc_match_to_edit` returns.
+        """
+        if not match_friend_ids:
+            return {}
+
+        variables: dict[str, int] = {}
+        definitions: list[str] = []
+        selections: list[str] = []
+        for i, (match_id, friend_id) in enumerate(match_friend_ids):
+            variables[f"match_id_{i}"] = match_id
+            variables[f"friend_id_{i}"] = friend_id
+            definitions.append(f"$match_id_{i}: Long!, $friend_id_{i}: Long!")
+            selections.append(
+                f"    match_{i}: match(id: $match_id_{i}) {{"
+                + FPC_MATCH_TO_EDIT_FIELDS.replace("$friend_id", f"$friend_id_{i}")
+                + "\n    }"
+            )
+
+        query = f"query GetFPCMatchesToEdit ({', '.join(definitions)}) {{\n" + "\n".join(selections) + "\n}"
+        json = {"query": query, "variables": variables}
+        response = await self.invoke_with_try(query, json)
+
+        # when some match errors out, Stratz still answers for others while the failed alias is `null`
+        data = response.get("data") or {}
+        return {
+            match_friend_id: {"data": {"match": data.get(f"match_{i}")}}  # pyright: ignore[reportReturnType]
+            for i, match_friend_id in enumerate(match_friend_ids)
+        }
+
+    async def get_game_versions(self) -> stratz.GameVersionsResponse:
+        """Queries Dota 2 Game Versions (patches) known to Stratz."""
         query = """
-query GetFPCMatchToEdit ($match_id: Long!, $friend_id: Long!) {
-    match(id: $match_id) {
-        statsDateTime
-        players(steamAccountId: $friend_id) {
-            isVictory
-            heroId
-            variant
-            kills
-            deaths
-            assists
-            item0Id
-            item1Id
-            item2Id
-            item3Id
-            item4Id
-            item5Id
-            neutral0Id
-            playbackData {
-                abilityLearnEvents {
-                    abilityId
-                }
-                purchaseEvents {
-                    time
-                    itemId
-                }
-            }
-            stats {
-                matchPlayerBuffEvent {
-                    itemId
-                }
-            }
+query GameVersions {
+    constants {
+        gameVersions {
+            id
+            name
         }
     }
 }"""
-        json = {"query": query, "variables": {"match_id": match_id, "friend_id": friend_id}}
+        json = {"query": query}
         return await self.invoke_with_try(query, json)
 
     async def get_heroes(self) -> stratz.HeroesResponse:
@@ -8,6 +8,7 @@ __all__ = (
     "AbilitiesResponse",
     "FPCMatchesResponse",
     "FacetsResponse",
+    "GameVersionsResponse",
     "HeroesResponse",
     "ItemsResponse",
 )
@@ -68,6 +69,26 @@ class BuffEvent(TypedDict):
     itemId: int | None
 
 
+# STRATZ: GET GAME VERSIONS
+
+
+class GameVersionsResponse(TypedDict):
+    data: GameVersionsData
+
+
+class GameVersionsData(TypedDict):
+    constants: GameVersionsConstants
+
+
+class GameVersionsConstants(TypedDict):
+    gameVersions: list[GameVersion]
+
+
+class GameVersion(TypedDict):
+    id: int
+    name: str
+
+
 # STRATZ: GET HEROES
 
 
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import re
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, TypedDict, override
+from typing import TYPE_CHECKING, Any, TypedDict, override
 
 import discord
 
@@ -12,7 +14,11 @@ from utils.base_fpc import Character, CharacterStorage, CharacterTransformer, Ga
 from . import game_const
 
 if TYPE_CHECKING:
-    from bot import AluInteraction
+    from collections.abc import Iterable, Sequence
+
+    from PIL import Image
+
+    from bot import AluBot, AluInteraction
 
     from .schemas import stratz
 
@@ -21,12 +27,135 @@ if TYPE_CHECKING:
         emote: str
 
 
-__all__ = ("Abilities", "Facets", "Hero", "HeroTransformer", "Heroes", "Items", "PseudoHero")
+__all__ = ("Abilities", "Facets", "Hero", "HeroTransformer", "Heroes", "Items", "PseudoHero", "SpriteAtlas")
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
 
 # old CDN was "https://cdn.cloudflare.steamstatic.com/apps/dota2/images/dota_react"
 # idk, dota2.com uses the following cdn for hero icons:
 CDN_REACT = "https://cdn.akamai.steamstatic.com/apps/dota2/images/dota_react/"
 
+ATLAS_BUILD_CONCURRENCY = 4
+"""Maximum amount of simultaneous downloads for an eager `SpriteAtlas.build`.
+
+Eager builds run in the background, so they don't take the transposer's `prefetch_semaphore`
+which is reserved for downloads that live notifications wait on.
+"""
+
+
+async def stratz_game_version(bot: AluBot) -> str:
+    """Get the latest Dota 2 game version known to Stratz.
+
+    Used as a version stamp for the storages so unknown IDs don't trigger re-fetching constants mid-patch.
+    """
+    game_versions = await bot.dota.stratz.get_game_versions()
+    return str(max(version["id"] for version in game_versions["data"]["constants"]["gameVersions"]))
+
+
+class SpriteAtlas:
+    """Versioned collection of pre-resized, pre-converted icons of a single size.
+
+    FPC image builders paste the same hero/item/ability icons at the very same sizes thousands of times a day.
+    This keeps already resized copies (keyed by icon url) so the builders only need to blit them.
+
+    Attributes
+    ----------
+    size: tuple[int, int]
+        The exact `(width, height)` the renderer uses for these icons.
+    version: int
+        Incremented every time the atlas is rebuilt due to the storage data change.
+        Sprites prepared for an older version are discarded.
+
+    """
+
+    def __init__(self, bot: AluBot, size: tuple[int, int], *, mode: str = "RGBA") -> None:
+        self.bot: AluBot = bot
+        self.size: tuple[int, int] = size
+        self.mode: str = mode
+        self.version: int = 0
+        self.fingerprint: int | None = None
+        self.sprites: dict[str, Image.Image] = {}
+        self.build_task: asyncio.Task[None] | None = None
+        self.build_semaphore: asyncio.Semaphore = asyncio.Semaphore(ATLAS_BUILD_CONCURRENCY)
+
+    @override
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} size={self.size} v{self.version} sprites={len(self.sprites)}>"
+
+    def prepare(self, image: Image.Image) -> Image.Image:
+        """Resize and convert the original icon. This is blocking."""
+        return image.convert(self.mode).resize(self.size)
+
+    async def fetch(self, url: str, semaphore: asyncio.Semaphore) -> Image.Image:
+        """Get the original icon without polluting the hot in-memory LRU of the transposer."""
+        transposer = self.bot.transposer
+        async with semaphore:
+            if url.startswith(("http://", "https://")):
+                return await transposer.asset_cache.get_image(url)
+            return await transposer.url_to_image(url)
+
+    async def build(self, urls: Iterable[str]) -> None:
+        """Prepare sprites for all `urls` that are not in the atlas yet. Failed downloads are skipped."""
+        version = self.version
+        missing = [url for url in dict.fromkeys(urls) if url not in self.sprites]
+        results = await asyncio.gather(*(self.fetch(url, self.build_semaphore) for url in missing), return_exceptions=True)
+        fetched = [(url, image) for url, image in zip(missing, results, strict=True) if not isinstance(image, BaseException)]
+
+        def prepare_all() -> list[Image.Image]:
+            return [self.prepare(image) for _url, image in fetched]
+
+        sprites = await asyncio.to_thread(prepare_all)
+        if version != self.version:
+            log.debug("%r changed while building v%s, dropping its sprites.", self, version)
+            return
+        self.sprites.update(zip([url for url, _image in fetched], sprites, strict=True))
+        log.debug("%r is built: %s/%s sprites.", self, len(fetched), len(missing))
+
+    def refresh(self, urls: Iterable[str], *, eager: bool) -> None:
+        """Rebuild the atlas if the set of icon urls changed since the last refresh.
+
+        Parameters
+        ----------
+        urls: Iterable[str]
+            All icon urls of the storage.
+        eager: bool
+            Whether to build all sprites right away in the background or lazily on demand.
+            Eager is only reasonable for small storages.
+
+        """
+        urls = set(urls)
+        fingerprint = hash(frozenset(urls))
+        if fingerprint == self.fingerprint:
+            return
+
+        self.fingerprint = fingerprint
+        self.version += 1
+        self.sprites = {url: sprite for url, sprite in self.sprites.items() if url in urls}
+        if eager:
+            if self.build_task is not None and not self.build_task.done():
+                # building for the outdated set of urls
+                self.build_task.cancel()
+            self.build_task = asyncio.create_task(self.build(urls))
+
+    async def get_many(self, urls: Sequence[str]) -> list[Image.Image]:
+        """Get ready-to-blit sprites for icon `urls`, preparing any missing ones."""
+        missing = [url for url in dict.fromkeys(urls) if url not in self.sprites]
+        if not missing:
+            return [self.sprites[url] for url in urls]
+
+        version = self.version
+        images = await asyncio.gather(*(self.fetch(url, self.bot.transposer.prefetch_semaphore) for url in missing))
+
+        def prepare_all() -> list[Image.Image]:
+            return [self.prepare(image) for image in images]
+
+        prepared = dict(zip(missing, await asyncio.to_thread(prepare_all), strict=True))
+        if version == self.version:
+            # otherwise the atlas was rebuilt meanwhile and these urls might not belong to it anymore
+            self.sprites.update(prepared)
+        return [self.sprites.get(url) or prepared[url] for url in urls]
+
 
 @dataclass(repr=False)
 class Hero(Character):
@@ -93,6 +222,19 @@ class PseudoHero(Character):
 class Heroes(CharacterStorage[Hero, PseudoHero]):  # CharacterCache
     """Dota 2 Heroes."""
 
+    def __init__(self, bot: AluBot) -> None:
+        super().__init__(bot)
+        self.topbar_atlas: SpriteAtlas = SpriteAtlas(bot, (62, 35))
+        """Topbar hero icons for `MatchToSend.notification_image`."""
+
+    @override
+    async def fetch_version(self) -> str | None:
+        return await stratz_game_version(self.bot)
+
+    @override
+    def load_object(self, raw: Any) -> Hero:
+        return Hero(**raw)
+
     @override
     async def fill_data(self) -> dict[int, Hero]:
         heroes = await self.bot.dota.stratz.get_heroes()
@@ -115,6 +257,15 @@ class Heroes(CharacterStorage[Hero, PseudoHero]):  # CharacterCache
             for hero in heroes["data"]["constants"]["heroes"]
         }
 
+    @override
+    def asset_urls(self) -> list[str]:
+        return [hero.topbar_icon_url for hero in self.cached_data.values()]
+
+    @override
+    def after_update(self) -> None:
+        super().after_update()
+        self.topbar_atlas.refresh(self.asset_urls(), eager=True)
+
     @override
     @staticmethod
     def generate_unknown_object(hero_id: int) -> PseudoHero:
@@ -197,6 +348,19 @@ class PseudoAbility:
 
 
 class Abilities(GameDataStorage[Ability, PseudoAbility]):
+    def __init__(self, bot: AluBot) -> None:
+        super().__init__(bot)
+        self.icon_atlas: SpriteAtlas = SpriteAtlas(bot, (37, 37))
+        """Ability icons for `StratzMatchToEdit.edit_notification_image` skill build row."""
+
+    @override
+    async def fetch_version(self) -> str | None:
+        return await stratz_game_version(self.bot)
+
+    @override
+    def load_object(self, raw: Any) -> Ability:
+        return Ability(**raw)
+
     @override
     async def fill_data(self) -> dict[int, Ability]:
         abilities = await self.bot.dota.stratz.get_abilities()
@@ -220,6 +384,12 @@ class Abilities(GameDataStorage[Ability, PseudoAbility]):
             for ability in abilities["data"]["constants"]["abilities"]
         }
 
+    @override
+    def after_update(self) -> None:
+        super().after_update()
+        # there are thousands of abilities (most never show up in FPC) so sprites are prepared lazily
+        self.icon_atlas.refresh([ability.icon_url for ability in self.cached_data.values()], eager=False)
+
     @override
     @staticmethod
     def generate_unknown_object(ability_id: int) -> PseudoAbility:
@@ -267,11 +437,33 @@ class PseudoItem:
 
 
 class Items(GameDataStorage[Item, PseudoItem]):
+    def __init__(self, bot: AluBot) -> None:
+        super().__init__(bot)
+        self.icon_atlas: SpriteAtlas = SpriteAtlas(bot, (69, 50))
+        """Item icons for `StratzMatchToEdit.edit_notification_image` items row."""
+
+    @override
+    async def fetch_version(self) -> str | None:
+        return await stratz_game_version(self.bot)
+
+    @override
+    def load_object(self, raw: Any) -> Item:
+        return Item(**raw)
+
     @override
     async def fill_data(self) -> dict[int, Item]:
         items = await self.bot.dota.stratz.get_items()
         return {item["id"]: Item(item["id"], item["shortName"]) for item in items["data"]["constants"]["items"]}
 
+    @override
+    def asset_urls(self) -> list[str]:
+        return [item.icon_url for item in self.cached_data.values()]
+
+    @override
+    def after_update(self) -> None:
+        super().after_update()
+        self.icon_atlas.refresh(self.asset_urls(), eager=True)
+
     @override
     @staticmethod
     def generate_unknown_object(item_id: int) -> PseudoItem:
@@ -324,6 +516,14 @@ class PseudoFacet:
 
 
 class Facets(GameDataStorage[Facet, PseudoFacet]):
+    @override
+    async def fetch_version(self) -> str | None:
+        return await stratz_game_version(self.bot)
+
+    @override
+    def load_object(self, raw: Any) -> Facet:
+        return Facet(**raw)
+
     @override
     async def fill_data(self) -> dict[int, Facet]:
         facets = await self.bot.dota.stratz.get_facets()
@@ -345,6 +545,10 @@ class Facets(GameDataStorage[Facet, PseudoFacet]):
             for facet in facets["data"]["constants"]["facets"]
         }
 
+    @override
+    def asset_urls(self) -> list[str]:
+        return [facet.icon_url for facet in self.cached_data.values()]
+
     @override
     @staticmethod
     def generate_unknown_object(facet_id: int) -> PseudoFacet:
@@ -0,0 +1,59 @@
+"""Fonts.
+
+Shared registry of PIL fonts and text metrics for image builders.
+
+Loading a `.ttf` from the disk is not free, and image builders used to do it for every sub-drawing of every image.
+Player names, talent names, KDA strings, etc. also repeat constantly, so their metrics are cached too.
+"""
+
+from __future__ import annotations
+
+import functools
+
+from PIL import ImageFont
+
+__all__ = (
+    "INTER_BLACK",
+    "MONSIEUR_LA_DOULAISE",
+    "get",
+    "get_text_wh",
+)
+
+INTER_BLACK = "./assets/fonts/Inter-Black-slnt=0.ttf"
+MONSIEUR_LA_DOULAISE = "./assets/fonts/MonsieurLaDoulaise-Regular.ttf"
+
+
+@functools.cache
+def get(path: str, size: int) -> ImageFont.FreeTypeFont:
+    """Get the font from `path` of the given `size`. Each `(path, size)` pair gets loaded only once.
+
+    Examples
+    --------
+    ```py
+    font = fonts.get(fonts.INTER_BLACK, 33)
+    ```
+    """
+    return ImageFont.truetype(path, size)
+
+
+@functools.lru_cache(maxsize=4096)
+def _text_wh(path: str, size: int, text: str) -> tuple[int, int]:
+    # https://stackoverflow.com/a/46220683/9263761
+    # https://levelup.gitconnected.com/how-to-properly-calculate-text-size-in-pil-images-17a2cc6f51fd
+    font = get(path, size)
+    _, descent = font.getmetrics()  # _ is `ascent`
+    _, _, right, bottom = font.getmask(text).getbbox()
+    return right, bottom + descent
+
+
+def get_text_wh(text: str, font: ImageFont.FreeTypeFont) -> tuple[int, int]:
+    """Get text wh-dimensions for selected font.
+
+    The result is cached by `(font, size, text)`.
+
+    Returns
+    -------
+        (width, height) - width and height of the text written in specified font
+
+    """
+    return _text_wh(str(font.path), font.size, text)
@@ -19,6 +19,7 @@ from __future__ import annotations
 import heapq
 import operator
 import re
+from collections import OrderedDict
 from difflib import SequenceMatcher
 from typing import TYPE_CHECKING, Literal, TypeVar, overload
 
@@ -28,6 +29,7 @@ if TYPE_CHECKING:
 T = TypeVar("T")
 
 __all__ = (
+    "AutocompleteIndex",  # prebuilt `finder`
     "extract",  # exact matches
     "extract_one",  # exact best match
     "extract_or_exact",  # exact match if present or matches
@@ -399,3 +401,109 @@ def find_one(text: str, collection: Iterable[str], *, key: Callable[[str], str]
         return finder(text, collection, key=key)[0]
     except IndexError:
         return None
+
+
+class AutocompleteIndex[T]:
+    """Prebuilt index for `finder`-like searches over a fixed collection.
+
+    Autocompletes run `finder` for every keystroke of every user. This does the heavy lifting once:
+
+    * keys are lower-cased in advance;
+    * every character has a posting list (a bitset of item indexes) so only the items containing
+        all characters of the query get checked;
+    * the match itself is a couple of `str.find` calls instead of compiling a new regex each time;
+    * only `limit` best results are selected with a heap instead of sorting all of them;
+    * recent queries are cached since the same prefixes get typed over and over.
+
+    The results and their order match `finder(text, collection, key=key)[:limit]`
+    (ignoring the exotic case-folding differences between `str.lower` and `re.IGNORECASE`).
+    The index is immutable: build a new one when the collection changes.
+    """
+
+    def __init__(self, collection: Iterable[T], *, key: Callable[[T], str] | None = None, cache_size: int = 256) -> None:
+        self.items: list[T] = list(collection)
+        self.names: list[str] = [key(item) if key else str(item) for item in self.items]
+        self.lowered: list[str] = [name.lower() for name in self.names]
+        self.cache_size: int = cache_size
+        self._cache: OrderedDict[tuple[str, int], list[T]] = OrderedDict()
+
+        self.postings: dict[str, int] = {}
+        for index, name in enumerate(self.lowered):
+            for char in set(name):
+                self.postings[char] = self.postings.get(char, 0) | (1 << index)
+
+        self.alphabetical: list[int] = sorted(range(len(self.items)), key=lambda index: self.names[index])
+        """Item indexes sorted by name. Used for empty queries and as a fallback."""
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def first(self, limit: int = 25) -> list[T]:
+        """Get first `limit` items in alphabetical order."""
+        return [self.items[index] for index in self.alphabetical[:limit]]
+
+    def candidates(self, query: str) -> Generator[int, None, None]:
+        """Yield indexes of items that contain every character of the lower-cased `query`."""
+        bitset = (1 << len(self.items)) - 1
+        for char in set(query):
+            bitset &= self.postings.get(char, 0)
+            if not bitset:
+                return
+        while bitset:
+            lowest = bitset & -bitset
+            yield lowest.bit_length() - 1
+            bitset ^= lowest
+
+    @staticmethod
+    def match(query: str, name: str) -> tuple[int, int] | None:
+        """Find the same match as `finder`'s `a.*?b.*?c` regex would.
+
+        Returns
+        -------
+        tuple[int, int] | None
+            `(length, start)` of the match or `None` if `query` is not a subsequence of `name`.
+        """
+        start = position = name.find(query[0])
+        if start == -1:
+            return None
+        for char in query[1:]:
+            position = name.find(char, position + 1)
+            if position == -1:
+                return None
+        return position - start + 1, start
+
+    def search(self, text: str, *, limit: int = 25) -> list[T]:
+        """Find best matches for `text`, same as `finder` would.
+
+        Parameters
+        ----------
+        text: str
+            The query, i.e. what the user typed so far.
+        limit: int = 25
+            Maximum amount of results. Discord autocomplete doesn't take more than 25 choices anyway.
+        """
+        query = text.lower()
+        if not query:
+            return self.first(limit)
+
+        cache_key = (query, limit)
+        try:
+            result = self._cache[cache_key]
+        except KeyError:
+            pass
+        else:
+            self._cache.move_to_end(cache_key)
+            return result
+
+        scored: list[tuple[int, int, str, int]] = [
+            (*found, self.names[index], index)
+            for index in self.candidates(query)
+            if (found := self.match(query, self.lowered[index]))
+        ]
+
+        result = [self.items[index] for *_, index in heapq.nsmallest(limit, scored)]
+
+        self._cache[cache_key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
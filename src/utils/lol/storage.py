@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Literal, TypedDict, override
+from typing import TYPE_CHECKING, Any, Literal, TypedDict, override
 
 import discord
+import orjson
 from roleidentification import get_roles
 
-from utils import const
+from utils import const, errors
 
 from ..base_fpc import Character, CharacterStorage, CharacterTransformer, GameDataStorage
 from . import game_const
@@ -36,6 +37,19 @@ __all__ = (
 BASE_URL = "https://raw.communitydragon.org/latest/plugins/rcp-be-lol-game-data/global/default/"
 
 
+async def cdragon_version(bot: AluBot) -> str:
+    """Get the version of the latest League of Legends game data at CDragon.
+
+    Used as a version stamp for the storages so unknown IDs don't trigger re-fetching constants mid-patch.
+    """
+    async with bot.session.get("https://raw.communitydragon.org/latest/content-metadata.json") as response:
+        if not response.ok:
+            msg = f"Status {response.status} - Could not get CDragon content metadata."
+            raise errors.ResponseNotOK(msg)
+        metadata = orjson.loads(await response.read())
+        return metadata["version"]
+
+
 def cdragon_asset_url(path: str) -> str:
     """Return the CDragon url for the given game asset path."""
     path = path.lower()
@@ -65,6 +79,14 @@ class PseudoChampion(Character):
 
 
 class Champions(CharacterStorage[Champion, PseudoChampion]):
+    @override
+    async def fetch_version(self) -> str | None:
+        return await cdragon_version(self.bot)
+
+    @override
+    def load_object(self, raw: Any) -> Champion:
+        return Champion(**raw)
+
     @override
     async def fill_data(self) -> dict[int, Champion]:
         """_summary_.
@@ -101,6 +123,10 @@ class Champions(CharacterStorage[Champion, PseudoChampion]):
         data.pop(-1, None)
         return data
 
+    @override
+    def asset_urls(self) -> list[str]:
+        return [champion.icon_url for champion in self.cached_data.values()]
+
     @override
     @staticmethod
     def generate_unknown_object(champion_id: int) -> PseudoChampion:
@@ -147,6 +173,10 @@ class ItemIcons(GameDataStorage[str, str]):
 
     """
 
+    @override
+    async def fetch_version(self) -> str | None:
+        return await cdragon_version(self.bot)
+
     @override
     async def fill_data(self) -> dict[int, str]:
         """_summary_.
@@ -156,6 +186,10 @@ class ItemIcons(GameDataStorage[str, str]):
         items = await self.bot.lol.cdragon.get_lol_v1_items()
         return {item["id"]: cdragon_asset_url(item["iconPath"]) for item in items}
 
+    @override
+    def asset_urls(self) -> list[str]:
+        return list(self.cached_data.values())
+
     @override
     @staticmethod
     def generate_unknown_object(_: int) -> str:
@@ -171,6 +205,10 @@ class RuneIcons(GameDataStorage[str, str]):
     https://raw.communitydragon.org/latest/plugins/rcp-be-lol-game-data/global/default/v1/perk-images/styles/sorcery/unflinching/unflinching.png
     """
 
+    @override
+    async def fetch_version(self) -> str | None:
+        return await cdragon_version(self.bot)
+
     @override
     async def fill_data(self) -> dict[int, str]:
         """_summary_.
@@ -180,6 +218,10 @@ class RuneIcons(GameDataStorage[str, str]):
         perks = await self.bot.lol.cdragon.get_lol_v1_perks()
         return {perk["id"]: cdragon_asset_url(perk["iconPath"]) for perk in perks}
 
+    @override
+    def asset_urls(self) -> list[str]:
+        return list(self.cached_data.values())
+
     @override
     @staticmethod
     def generate_unknown_object(_: int) -> str:
@@ -194,6 +236,10 @@ class SummonerSpellIcons(GameDataStorage[str, str]):
     https://raw.communitydragon.org/latest/plugins/rcp-be-lol-game-data/global/default/data/spells/icons2d/summoner_boost.png
     """
 
+    @override
+    async def fetch_version(self) -> str | None:
+        return await cdragon_version(self.bot)
+
     @override
     async def fill_data(self) -> dict[int, str]:
         """_summary_.
@@ -203,6 +249,10 @@ class SummonerSpellIcons(GameDataStorage[str, str]):
         summoner_spells = await self.bot.lol.cdragon.get_lol_v1_summoner_spells()
         return {spell["id"]: cdragon_asset_url(spell["iconPath"]) for spell in summoner_spells}
 
+    @override
+    def asset_urls(self) -> list[str]:
+        return list(self.cached_data.values())
+
     @override
     @staticmethod
     def generate_unknown_object(_: int) -> str:
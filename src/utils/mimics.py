@@ -106,12 +106,8 @@ class Mimic:
                 raise errors.SomethingWentWrong(msg)
 
     async def search_database(self) -> discord.Webhook | None:
-        log.debug("Step 1. Searching webhooks in the database for channel %r", self.channel)
-        query = "SELECT url FROM webhooks WHERE channel_id = $1"
-        webhook_url: str | None = await self.bot.pool.fetchval(query, self.channel.id)
-        if webhook_url:
-            return discord.Webhook.from_url(webhook_url, client=self.bot, bot_token=self.bot.http.token)
-        return None
+        log.debug("Step 1. Searching webhooks in the registry/database for channel %r", self.channel)
+        return await self.bot.webhook_registry.get(self.channel.id)
 
     async def search_owned(self) -> discord.Webhook | None:
         log.debug("Step 2. Searching for owned webhook in the channel %r", self.channel)
@@ -133,6 +129,7 @@ class Mimic:
                     guild_id=self.channel.guild.id,
                     url=webhook.url,
                 )
+            self.bot.webhook_registry.put(self.channel.id, owned_webhooks[0])
             return owned_webhooks[0]
         return None
 
@@ -174,6 +171,7 @@ class Mimic:
             guild_id=self.channel.guild.id,
             url=webhook.url,
         )
+        self.bot.webhook_registry.put(self.channel.id, webhook)
         return webhook
 
     async def insert_into_database(self, *, webhook_id: int, channel_id: int, guild_id: int, url: str) -> None:
@@ -307,8 +305,13 @@ class Mimic:
                             embeds=embeds,
                             thread=discord.Object(id=self.thread.id) if self.thread else discord.utils.MISSING,
                         )
-                except discord.NotFound:
-                    log.warning("Webhook %r for channel %r is not found", webhook, self.channel)
+                except discord.NotFound as exc:
+                    # Unknown Webhook, other 404s (i.e. Unknown Channel for the thread) don't mean the webhook is gone
+                    if exc.code == 10015:
+                        log.warning("Webhook %r for channel %r is not found", webhook, self.channel)
+                        await self.bot.webhook_registry.discard(self.channel.id, webhook)
+                    else:
+                        self.bot.webhook_registry.invalidate(self.channel.id)
                 else:
                     return message
 
@@ -0,0 +1,53 @@
+"""Profile Cards.
+
+Shared parts of the community profile images: `/rank` cards (`ext.community.levels`)
+and welcome banners (`ext.community.welcome`).
+
+The background is decoded once and circle masks are cached per avatar size.
+Builders can run in render worker processes, so these caches are simply per-process.
+"""
+
+from __future__ import annotations
+
+import functools
+
+from PIL import Image, ImageDraw
+
+__all__ = (
+    "avatar_size",
+    "background",
+    "circle_mask",
+    "paste_circle_avatar",
+)
+
+BACKGROUND_PATH = "./assets/images/profile/welcome.png"
+"""Background for both rank cards and welcome banners."""
+
+
+@functools.cache
+def background() -> Image.Image:
+    """Decoded background image. Shared between renders, so `.copy()` it before drawing."""
+    with Image.open(BACKGROUND_PATH, mode="r") as image:
+        return image.copy()
+
+
+def avatar_size() -> int:
+    """Side of the square avatar on profile cards, the avatar takes the whole height of the background."""
+    return background().height
+
+
+@functools.cache
+def circle_mask(size: tuple[int, int]) -> Image.Image:
+    """Circle mask for pasting an avatar of the given `size`."""
+    mask = Image.new("L", size, 0)
+    draw = ImageDraw.Draw(mask)
+    draw.ellipse((0, 0, *size), fill=255)
+    return mask
+
+
+def paste_circle_avatar(canvas: Image.Image, avatar: Image.Image, left: int, top: int) -> None:
+    """Paste the avatar cut into a circle onto the canvas. The avatar is resized if it isn't already."""
+    size = avatar_size()
+    if avatar.size != (size, size):
+        avatar = avatar.resize((size, size))
+    canvas.paste(avatar, (left, top), circle_mask(avatar.size))
@@ -0,0 +1,202 @@
+"""Render Executor.
+
+Pluggable backend for the CPU-heavy PIL image builders (FPC notifications, rank cards, welcome banners).
+
+* "thread" backend - builders run via `asyncio.to_thread`, just like it used to be.
+    Cheap to start, but the pure-Python parts of the drawing are still bound by the GIL
+    and compete with the event loop during match bursts.
+* "process" backend - builders run in a warm `ProcessPoolExecutor`. Workers preload fonts (and any modules
+    with builders) in the initializer so the first job doesn't pay for it. Only the encoded PNG bytes
+    travel back through the pipe, those are small compared to the raw image.
+
+Builders must be module-level functions that take a single picklable "draw spec" (a `NamedTuple`)
+and return `PIL.Image.Image`. The executor returns encoded image bytes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import TYPE_CHECKING, Literal
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from . import fonts
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+
+__all__ = (
+    "LiteralRenderBackend",
+    "RenderExecutor",
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+type LiteralRenderBackend = Literal["thread", "process"]
+
+PRELOAD_FONTS: tuple[tuple[str, int], ...] = (
+    (fonts.INTER_BLACK, 13),
+    (fonts.INTER_BLACK, 15),
+    (fonts.INTER_BLACK, 19),
+    (fonts.INTER_BLACK, 22),
+    (fonts.INTER_BLACK, 33),
+    (fonts.INTER_BLACK, 34),
+    (fonts.INTER_BLACK, 45),
+    (fonts.INTER_BLACK, 49),
+    (fonts.INTER_BLACK, 60),
+    (fonts.INTER_BLACK, 80),
+    (fonts.MONSIEUR_LA_DOULAISE, 90),
+)
+"""Fonts (path, size) that the image builders use. Workers load them once on start-up."""
+
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+"""`fork` in an asyncio application with running threads is asking for trouble. `forkserver` isn't available on Windows."""
+
+
+def encode(image: Image.Image, extension: str) -> bytes:
+    """Encode the image into bytes of the given format."""
+    image_binary = BytesIO()
+    image.save(image_binary, extension)
+    return image_binary.getvalue()
+
+
+def _render[S](builder: Callable[[S], Image.Image], spec: S, extension: str) -> bytes:
+    """Build and encode the image. Executed in a thread or in a worker process."""
+    return encode(builder(spec), extension)
+
+
+def _initialize_worker(preload: Sequence[str]) -> None:
+    """Warm up the worker process: load fonts and import modules with builders."""
+    for path, size in PRELOAD_FONTS:
+        fonts.get(path, size)
+    for module in preload:
+        importlib.import_module(module)
+
+
+def _no_op() -> int:
+    return os.getpid()
+
+
+class RenderExecutor:
+    """Executor for PIL image builders.
+
+    Attributes
+    ----------
+    backend: LiteralRenderBackend
+        Either "thread" or "process".
+    max_workers: int
+        Amount of worker processes for the "process" backend.
+    preload: Sequence[str]
+        Modules to import in every worker process on start-up, i.e. the ones containing the builders.
+
+    """
+
+    def __init__(
+        self,
+        backend: LiteralRenderBackend = "thread",
+        *,
+        max_workers: int | None = None,
+        preload: Sequence[str] = (),
+    ) -> None:
+        self.backend: LiteralRenderBackend = backend
+        self.max_workers: int = max_workers or min(4, os.cpu_count() or 1)
+        self.preload: Sequence[str] = preload
+        self._pool: ProcessPoolExecutor | None = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Process pool for the "process" backend. Started lazily."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(START_METHOD),
+                initializer=_initialize_worker,
+                initargs=(tuple(self.preload),),
+            )
+        return self._pool
+
+    async def warm_up(self) -> None:
+        """Spawn all worker processes in advance so the first notifications don't wait for them."""
+        if self.backend != "process":
+            return
+
+        start_time = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        # the pool only spawns a new worker when there is no idle one, so submit enough jobs to fill it up.
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _no_op) for _ in range(self.max_workers)))
+        log.info("Render workers (%s) are warm in %.3fs", self.max_workers, time.perf_counter() - start_time)
+
+    async def render[S](self, builder: Callable[[S], Image.Image], spec: S, *, extension: str = "PNG") -> bytes:
+        """Build the image with `builder(spec)` and encode it.
+
+        Parameters
+        ----------
+        builder: Callable[[S], Image.Image]
+            Module-level (for pickling) function that draws the image.
+        spec: S
+            Picklable draw spec with everything the builder needs.
+        extension: str = "PNG"
+            Image format to encode the result into.
+
+        Returns
+        -------
+        bytes
+            Encoded image.
+        """
+        if self.backend == "thread":
+            return await asyncio.to_thread(_render, builder, spec, extension)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, _render, builder, spec, extension)
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Benchmark: `python -m utils.renderer` with `src` in PYTHONPATH from the repository root (where `assets` are)
+# TODO: Rewrite this as pytest-benchmark
+
+
+def _benchmark_builder(spec: tuple[Image.Image, list[str]]) -> Image.Image:
+    """A builder that roughly resembles FPC notification workload."""
+    canvas, lines = spec
+    canvas = canvas.copy()
+    draw = ImageDraw.Draw(canvas)
+    font = fonts.get(fonts.INTER_BLACK, 33)
+    for count, line in enumerate(lines):
+        w, h = fonts.get_text_wh(line, font)
+        icon = Image.new("RGBA", (88, 64), (count * 20 % 255, 100, 200, 255)).resize((69, 50))
+        canvas.paste(icon, (count * 69 % canvas.width, h))
+        draw.text(((canvas.width - w) / 2, 35 + count * 5), line, font=font)
+    return canvas.filter(ImageFilter.SMOOTH)
+
+
+async def _benchmark(jobs: int = 64) -> None:
+    spec = (Image.new("RGB", (640, 360), (40, 40, 40)), [f"Player {i} - Hero {i}" for i in range(10)])
+
+    for backend in ("thread", "process"):
+        executor = RenderExecutor(backend)  # pyright: ignore[reportArgumentType]
+        await executor.warm_up()
+        start_time = time.perf_counter()
+        results = await asyncio.gather(*(executor.render(_benchmark_builder, spec) for _ in range(jobs)))
+        elapsed = time.perf_counter() - start_time
+        executor.close()
+        print(  # noqa: T201
+            f"{backend:>7}: {jobs} renders in {elapsed:.3f}s ({jobs / elapsed:.1f}/s), {len(results[0])} bytes each"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(_benchmark())
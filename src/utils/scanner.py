@@ -0,0 +1,289 @@
+"""Scanner.
+
+Single-pass multi-pattern scanner for chat messages.
+
+All token classes (custom emotes, social links, urls, watched words) are combined into one alternation regex,
+so the content is walked only once and the result is a list of typed spans that every consumer
+(`EmoteStats`, `FixSocialLinks`, `Levels`, etc.) can reuse.
+
+Note that a plain `re` literal search (i.e. for `<` or `http`) is already very fast in CPython,
+so the combined pattern is only run after a cheap literal prefilter, see `Scanner.might_match`.
+Run the module for a micro-benchmark against separate per-feature searches.
+"""
+
+from __future__ import annotations
+
+import enum
+import functools
+import re
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+__all__ = (
+    "THANKS_WORDS",
+    "ScanResult",
+    "Scanner",
+    "Span",
+    "TokenKind",
+    "scan",
+)
+
+THANKS_WORDS: tuple[str, ...] = ("thanks", "thank", "ty")
+"""Words that give reputation to mentioned members, see `ext.community.levels`."""
+
+SOCIAL_SITES_PATTERN = r"""
+    x\.com|
+    twitter\.com|
+    reddit\.com|
+    instagram\.com|
+    tiktok\.com|
+    deviantart\.com|
+    tumblr\.com|
+    pixiv\.net|
+    bsky\.app|
+    twitch\.tv/(?:[a-zA-Z]|[0-9]|[_])+/clip | clips\.twitch\.tv
+"""
+"""Sites from `ext.mimics.fix_social_links.FIX_DICT` that have better meta-embed alternatives."""
+
+URL_CHARS_PATTERN = r"[a-zA-Z0-9$-_@.&+!*(),]+"
+"""The rest of the link after `://`.
+
+Matches exactly the same as `(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*(),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+` from `const.Regex.URL`
+(`%` and most of the listed characters are already inside `$-_` range) but as a single charset
+instead of trying five alternatives per character.
+"""
+
+
+class TokenKind(enum.Enum):
+    EMOTE = "emote"
+    SOCIAL_LINK = "social_link"
+    URL = "url"
+    WORD = "word"
+
+
+class Span(NamedTuple):
+    """A token found in the text.
+
+    Attributes
+    ----------
+    kind: TokenKind
+        Token class.
+    start: int
+        Start index of the token in the text.
+    end: int
+        End index (exclusive) of the token in the text.
+    key: str
+        Token class specific key:
+        * emote id for `EMOTE`;
+        * site name as in `x`, `instagram` or `clips` for `SOCIAL_LINK`;
+        * the whole link for `URL`;
+        * the lowercase word for `WORD`.
+    detail: str = ""
+        The rest of the url after the site for `SOCIAL_LINK`, empty for other token classes.
+    """
+
+    kind: TokenKind
+    start: int
+    end: int
+    key: str
+    detail: str = ""
+
+
+class ScanResult:
+    """Result of scanning the text: spans in order of appearance plus shortcuts for every token class."""
+
+    __slots__ = ("spans", "text")
+
+    def __init__(self, text: str, spans: list[Span]) -> None:
+        self.text: str = text
+        self.spans: list[Span] = spans
+
+    def __bool__(self) -> bool:
+        return bool(self.spans)
+
+    def of_kind(self, kind: TokenKind) -> list[Span]:
+        """Spans of the token class in order of appearance."""
+        return [span for span in self.spans if span.kind is kind]
+
+    @property
+    def emote_ids(self) -> list[int]:
+        """Custom emote ids without duplicates, in order of appearance."""
+        return list(dict.fromkeys([int(span.key) for span in self.spans if span.kind is TokenKind.EMOTE]))
+
+    @property
+    def social_links(self) -> list[Span]:
+        return self.of_kind(TokenKind.SOCIAL_LINK)
+
+    @property
+    def urls(self) -> list[str]:
+        """All links including the social ones."""
+        return [self.text[span.start : span.end] for span in self.spans if span.kind in _LINK_KINDS]
+
+    @property
+    def words(self) -> set[str]:
+        """Trigger words (lowercase) found in the text."""
+        return {span.key for span in self.spans if span.kind is TokenKind.WORD}
+
+
+_LINK_KINDS = frozenset((TokenKind.URL, TokenKind.SOCIAL_LINK))
+
+
+class Scanner:
+    """Combined-alternation scanner.
+
+    The alternatives are tried in order: emotes, social links, any other links, trigger words.
+    So a social link is never reported as a plain link too and a word inside a link is not a trigger word.
+
+    Attributes
+    ----------
+    words: tuple[str, ...]
+        Trigger words to look for. They only match as whole words, case-insensitively.
+    literals: tuple[str, ...]
+        Lowercase literals for the prefilter (besides `<` for emotes).
+    pattern: re.Pattern[str]
+        The combined pattern.
+    """
+
+    def __init__(self, words: Iterable[str] = ()) -> None:
+        self.words: tuple[str, ...] = tuple(dict.fromkeys(word.lower() for word in words))
+        self.literals: tuple[str, ...] = ("http", *self.words)
+
+        # Every alternative is anchored to the single first character consumed by the leading charset.
+        # This way `re` skips positions in C with a charset check
+        # instead of trying every alternative at every position.
+        first_chars = ["<", "h", "H"]
+        alternatives = [
+            # <:name:id> or <a:name:id>
+            r"(?<=<) (?P<emote> a?:[^\s:<>]+: (?P<emote_id>[0-9]{15,21}) >)",
+            # social links first so they are not reported as plain links
+            rf"""(?<=[hH]) (?P<social_link> (?i:ttps?://) (?i:www\.)? (?P<social_site>(?i:{SOCIAL_SITES_PATTERN}))
+                (?P<social_rest>/{URL_CHARS_PATTERN}) )""",
+            rf"(?<=[hH]) (?P<url> (?i:ttps?://) {URL_CHARS_PATTERN} )",
+        ]
+
+        words_by_first_char: dict[str, list[str]] = {}
+        for word in self.words:
+            words_by_first_char.setdefault(word[0], []).append(word[1:])
+        for char, tails in words_by_first_char.items():
+            cased = re.escape(char.lower()) + re.escape(char.upper())
+            first_chars.extend((char.lower(), char.upper()))
+            # longer words first so `thanks` isn't cut into `thank`
+            joined = "|".join(re.escape(tail) for tail in sorted(tails, key=len, reverse=True))
+            # only whole words: no word character before the first one and a word boundary after the last one
+            alternatives.append(rf"(?<!\w[{cased}]) (?<=[{cased}]) (?P<word_{ord(char)}> (?i:{joined}) ) \b")
+
+        charset = "".join(re.escape(char) for char in dict.fromkeys(first_chars))
+        self.pattern: re.Pattern[str] = re.compile(rf"[{charset}] (?: {' | '.join(alternatives)} )", flags=re.VERBOSE)
+
+    def might_match(self, text: str) -> bool:
+        """Literal prefilter: whether the text has any of the literals every token has to start with.
+
+        Substring checks run at `memchr` speed while the regex has to stop at every `h` and `t` in the text.
+        Most chat messages have nothing to find, so for them the regex doesn't run at all.
+        """
+        if "<" in text:
+            return True
+        lowered = text.lower()
+        for literal in self.literals:  # noqa: SIM110 # the plain loop is measurably faster than `any` + genexpr here
+            if literal in lowered:
+                return True
+        return False
+
+    def scan(self, text: str) -> ScanResult:
+        """Find all tokens in the `text` in one pass."""
+        spans: list[Span] = []
+        if not self.might_match(text):
+            return ScanResult(text, spans)
+
+        for match in self.pattern.finditer(text):
+            group = match.lastgroup
+            if group == "emote":
+                spans.append(Span(TokenKind.EMOTE, match.start(), match.end(), match["emote_id"]))
+            elif group == "social_link":
+                site = match["social_site"].lower().split(".")[0]
+                spans.append(Span(TokenKind.SOCIAL_LINK, match.start(), match.end(), site, match["social_rest"]))
+            elif group == "url":
+                spans.append(Span(TokenKind.URL, match.start(), match.end(), match[0]))
+            else:
+                spans.append(Span(TokenKind.WORD, match.start(), match.end(), match[0].lower()))
+        return ScanResult(text, spans)
+
+
+@functools.cache
+def _default_scanner() -> Scanner:
+    return Scanner(words=THANKS_WORDS)
+
+
+def scan(text: str) -> ScanResult:
+    """Scan the text with the default scanner (emotes, links and `THANKS_WORDS`)."""
+    return _default_scanner().scan(text)
+
+
+# Benchmark: `python -m utils.scanner` with `src` in PYTHONPATH
+# TODO: Rewrite this as pytest-benchmark
+
+
+def _benchmark_corpus(size: int = 20_000) -> list[str]:
+    """Chat-like messages: mostly plain chatter, sometimes emotes, links, thanks and mentions."""
+    import random
+
+    rng = random.Random(42)
+    plain = (
+        "lol that was so bad",
+        "did you see the new patch notes? invoker got nerfed again",
+        "anyone up for some games tonight? I'm streaming later on twitch",
+        "that's what happens when the support buys a midas at 10 minutes",
+        "xd",
+        "what hero should I pick to climb out of herald, pretty please",
+        "the thing is that he had three items more than our carry at the time",
+        "ok",
+    )
+    tokens = (
+        "ty <@123456789012345678> for the help",
+        "<:peepoComfy:726438781208756288> <:peepoComfy:726438781208756288>",
+        "thanks a lot <a:peepoDance:730890894814740541> pretty cool",
+        "check this https://x.com/IceFrog/status/1718834746300719265 xd",
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://www.instagram.com/p/DBg0L6foRNW/ bla bla bla https://reddit.com/r/DotA2/comments/abc",
+        "gg wp, thank you all <:PepoG:807362578237931520>",
+    )
+    # roughly one message in six has something to find
+    return [rng.choice(tokens) if rng.random() < 0.15 else rng.choice(plain) for _ in range(size)]
+
+
+def _benchmark() -> None:
+    import timeit
+
+    # each feature scanning the content on its own
+    url = r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*(),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+"  # `const.Regex.URL`
+    emote_regex = re.compile(r"<a?:.+?:([0-9]{15,21})>")
+    social_regex = re.compile(
+        rf"http[s]?://(?:www\.)?({SOCIAL_SITES_PATTERN})(/ {url.removeprefix('http[s]?://')})",
+        flags=re.VERBOSE | re.IGNORECASE,
+    )
+    url_regex = re.compile(url)
+
+    def multi_pass(text: str) -> None:
+        list(dict.fromkeys(map(int, emote_regex.findall(text))))
+        url_regex.findall(text)
+        if social_regex.findall(text):
+            social_regex.sub(lambda mo: mo.group(1), text)
+        lower = text.lower()
+        _ = [word for word in THANKS_WORDS if word in lower]
+
+    def single_pass(text: str) -> None:
+        result = scan(text)
+        if result:
+            _ = result.emote_ids, result.urls, result.social_links, result.words
+
+    corpus = _benchmark_corpus()
+    for name, func in (("multi-pass", multi_pass), ("single-pass", single_pass)):
+        elapsed = min(timeit.repeat(lambda func=func: [func(text) for text in corpus], number=1, repeat=7))
+        print(f"{name:>11}: {len(corpus)} messages in {elapsed:.3f}s ({len(corpus) / elapsed:.0f}/s)")  # noqa: T201
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -87,8 +87,8 @@ class TimeZoneTransformer(app_commands.Transformer):
 
         if not arg:
             return tz_manager._default_timezones
-        matches = tz_manager.find_timezones(arg)
-        return [tz.to_choice() for tz in matches[:25]]
+        matches = tz_manager.find_timezones(arg, limit=25)
+        return [tz.to_choice() for tz in matches]
 
 
 class CLDRDataEntry(NamedTuple):
@@ -119,6 +119,9 @@ class TimezoneManager:
         self.valid_timezones: set[str] = zoneinfo.available_timezones()
         self._default_timezones: list[app_commands.Choice[str]] = []
 
+        self._timezone_aliases_index: fuzzy.AutocompleteIndex[str] = fuzzy.AutocompleteIndex(())
+        self._valid_timezones_index: fuzzy.AutocompleteIndex[str] = fuzzy.AutocompleteIndex(self.valid_timezones)
+
         self.bot.loop.create_task(self.parse_bcp47_timezones())
 
     async def parse_bcp47_timezones(self) -> None:
@@ -193,6 +196,8 @@ class TimezoneManager:
                 description = f"(UTC{utc_offset_string}) {timezone_name}"
                 self._timezone_aliases[description] = alias
 
+            self._timezone_aliases_index = fuzzy.AutocompleteIndex(self._timezone_aliases.keys())
+
             # CLDR identifiers for most common timezones for the default autocomplete drop down
             # n.b. limited to 25 choices
             # /* cSpell:disable */
@@ -238,13 +243,13 @@ class TimezoneManager:
                     description = f"(UTC{utc_offset_string}) {entry.description}"
                     self._default_timezones.append(app_commands.Choice(name=description, value=alias))
 
-    def find_timezones(self, query: str) -> list[TimeZone]:
+    def find_timezones(self, query: str, *, limit: int = 25) -> list[TimeZone]:
         # A bit hacky, but if '/' is in the query then it's looking for a raw identifier
         # otherwise it's looking for a CLDR alias
         if "/" in query:
-            return [TimeZone(key=a, label=a) for a in fuzzy.finder(query, self.valid_timezones)]
+            return [TimeZone(key=a, label=a) for a in self._valid_timezones_index.search(query, limit=limit)]
 
-        keys = fuzzy.finder(query, self._timezone_aliases.keys())
+        keys = self._timezone_aliases_index.search(query, limit=limit)
         return [TimeZone(label=k, key=self._timezone_aliases[k]) for k in keys]
 
     @staticmethod
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from io import BytesIO, StringIO
 from typing import TYPE_CHECKING
 
 import discord
+from lru import LRU
 from PIL import Image
 
-from . import cache, errors
+from . import cache, errors, fonts
+from .asset_cache import AssetCache
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
     from aiohttp import ClientSession
     from matplotlib.figure import Figure
     from PIL import ImageFont
@@ -17,6 +22,22 @@ if TYPE_CHECKING:
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
 
+PREFETCH_CONCURRENCY = 16
+"""Maximum amount of simultaneous downloads for `TransposeClient.urls_to_images`."""
+
+PREWARM_CONCURRENCY = 4
+"""Maximum amount of simultaneous downloads for `TransposeClient.prewarm_assets`.
+
+Kept separate from (and smaller than) `PREFETCH_CONCURRENCY` so hundreds of startup pre-warm downloads
+don't queue up ahead of the first real notifications.
+"""
+
+AVATAR_CACHE_SIZE = 256
+"""Maximum amount of resized avatars to keep in `TransposeClient.avatars`."""
+
+AVATAR_DOWNLOAD_SIZES = (64, 128, 256, 512, 1024, 2048, 4096)
+"""Sizes Discord CDN serves assets in."""
+
 
 class TransposeClient:
     """Transpose object of X class to an object of Y class.
@@ -31,25 +52,23 @@ class TransposeClient:
 
     def __init__(self, session: ClientSession) -> None:
         self.session: ClientSession = session
+        self.prefetch_semaphore: asyncio.Semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+        self.prewarm_semaphore: asyncio.Semaphore = asyncio.Semaphore(PREWARM_CONCURRENCY)
+        self.asset_cache: AssetCache = AssetCache(session)
+        self.avatars: LRU[tuple[str, int], Image.Image] = LRU(AVATAR_CACHE_SIZE)
 
     @staticmethod
     def get_text_wh(text: str, font: ImageFont.FreeTypeFont) -> tuple[int, int]:
         """Get text wh-dimensions for selected font.
 
+        Shortcut to `utils.fonts.get_text_wh` which caches the metrics.
+
         Returns
         -------
             (width, height) - width and height of the text written in specified font
 
         """
-        # https://stackoverflow.com/a/46220683/9263761
-        # https://levelup.gitconnected.com/how-to-properly-calculate-text-size-in-pil-images-17a2cc6f51fd
-
-        _, descent = font.getmetrics()  # _ is `ascent`
-
-        text_width: int = font.getmask(text).getbbox()[2]
-        text_height: int = font.getmask(text).getbbox()[3] + descent
-
-        return text_width, text_height
+        return fonts.get_text_wh(text, font)
 
     @staticmethod
     def str_to_file(string: str, filename: str = "file.txt") -> discord.File:
@@ -58,6 +77,11 @@ class TransposeClient:
         fp.seek(0)
         return discord.File(fp, filename=filename)
 
+    @staticmethod
+    def bytes_to_file(data: bytes, filename: str = "fromAluBot.png") -> discord.File:
+        """Convert bytes, i.e. an already encoded image, to discord.File."""
+        return discord.File(fp=BytesIO(data), filename=filename)
+
     @staticmethod
     def plot_to_file(figure: Figure, filename: str = "plt.png") -> discord.File:
         """Convert matplotlib.figure.Figure to discord.File."""
@@ -97,9 +121,58 @@ class TransposeClient:
         """Get image for image_url and save it to cache.
 
         Useful because the requests within FPC functionality often request same images over and over.
+        The in-memory LRU is backed by the persistent on-disk `AssetCache` so restarts don't re-download everything.
+        Only use it for static assets (icons), i.e. not for stream previews.
         """
+        if url_or_fp.startswith(("http://", "https://")):
+            return await self.asset_cache.get_image(url_or_fp)
         return await self.url_to_image(url_or_fp)
 
+    async def avatar_to_image(self, avatar: discord.Asset, size: int) -> Image.Image:
+        """Get the avatar as a `size`x`size` image.
+
+        Avatars are cached by their hash (`Asset.key`), so a changed avatar is simply a different key.
+        The smallest sufficient size is requested from Discord CDN and the image is resized once
+        so the image builders don't need to. Don't draw on the result - it's shared.
+        """
+        key = (avatar.key, size)
+        try:
+            return self.avatars[key]
+        except KeyError:
+            pass
+
+        download_size = next((s for s in AVATAR_DOWNLOAD_SIZES if s >= size), AVATAR_DOWNLOAD_SIZES[-1])
+        # static png even for animated avatars, the cards only use the first frame anyway
+        image = await self.url_to_image(avatar.replace(size=download_size, format="png").url)
+        image = self.avatars[key] = await asyncio.to_thread(image.resize, (size, size))
+        return image
+
+    async def prewarm_assets(self, urls: Iterable[str]) -> None:
+        """Pre-download static assets into the on-disk cache."""
+        await self.asset_cache.prewarm(urls, self.prewarm_semaphore)
+
+    async def urls_to_images(self, urls_or_fps: Sequence[str], *, cached: bool = False) -> list[Image.Image]:
+        """Convert many URLs or File Paths to PIL.Image.Image concurrently.
+
+        Useful for image builders that need a dozen of icons: the download time becomes
+        the slowest single download instead of the sum of all of them.
+        The order of the result matches the order of `urls_or_fps`.
+
+        Parameters
+        ----------
+        urls_or_fps: Sequence[str]
+            URLs or local file paths to the images.
+        cached: bool = False
+            Whether to go through `url_to_cached_image` (for commonly repeated icons) or `url_to_image`.
+        """
+        fetch = self.url_to_cached_image if cached else self.url_to_image
+
+        async def fetch_with_limit(url_or_fp: str) -> Image.Image:
+            async with self.prefetch_semaphore:
+                return await fetch(url_or_fp)
+
+        return await asyncio.gather(*(fetch_with_limit(url_or_fp) for url_or_fp in urls_or_fps))
+
     async def url_to_file(self, url: str, filename: str = "fromAluBot.png") -> discord.File:
         """Convert URL to discord.File."""
         async with self.session.get(url) as response:
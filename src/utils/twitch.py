@@ -1,17 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import TYPE_CHECKING, TypedDict, override
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple, TypedDict, override
 
 import discord
 import twitchio
 from twitchio import eventsub
 
+from bot import aluloop
 from config import config
 
 from . import const, fmt
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from bot import AluBot
 
     class LoadTokensQueryRow(TypedDict):
@@ -20,10 +25,25 @@ if TYPE_CHECKING:
         refresh: str
 
 
-__all__ = ("AluTwitchClient",)
+__all__ = (
+    "AluTwitchClient",
+    "LiveStream",
+    "LiveStreamRegistry",
+    "Streamer",
+    "StreamerResolver",
+)
 
 log = logging.getLogger(__name__)
 
+HELIX_MAX_IDS = 100
+"""Maximum amount of IDs Helix endpoints accept in a single request."""
+
+REGISTRY_READY_TIMEOUT = 5.0
+"""Seconds `LiveStreamRegistry.get_live` waits for the first sweep before asking Helix directly."""
+
+STREAMER_CACHE_TTL = 60.0
+"""Seconds `StreamerResolver` keeps resolved streamers and their latest VODs. Expired entries are evicted."""
+
 
 class AluTwitchClient(twitchio.AutoClient):
     """Subclass for TwitchIO's AutoClient."""
@@ -36,6 +56,8 @@ class AluTwitchClient(twitchio.AutoClient):
             subscriptions=self.get_eventsub_subscriptions(),
         )
         self._bot: AluBot = bot
+        self.live_streams: LiveStreamRegistry = LiveStreamRegistry(bot, self)
+        self.streamers: StreamerResolver = StreamerResolver(self)
 
     def print_bot_oauth(self) -> None:
         """Print oauth permissions for the bot."""
@@ -73,6 +95,11 @@ class AluTwitchClient(twitchio.AutoClient):
         # await self.subscribe_websocket(payload=sub, token_for=broadcaster, as_bot=False)
         pass
 
+    @override
+    async def close(self, **options: Any) -> None:
+        self.live_streams.close()
+        await super().close(**options)
+
     def get_eventsub_subscriptions(self) -> list[twitchio.eventsub.SubscriptionPayload]:
         """AutoClient."""
         broadcaster = const.TwitchID.Me
@@ -127,11 +154,16 @@ class AluTwitchClient(twitchio.AutoClient):
             )
 
     async def event_stream_offline(self, offline: twitchio.StreamOffline) -> None:
+        self.live_streams.remove(offline.broadcaster.id)
         self._bot.dispatch("twitchio_stream_offline", offline)
 
     async def event_stream_online(self, online: twitchio.StreamOnline) -> None:
+        await self.live_streams.add(online.broadcaster)
         self._bot.dispatch("twitchio_stream_online", online)
 
+    async def event_channel_update(self, update: twitchio.ChannelUpdate) -> None:
+        self.live_streams.update(update.broadcaster.id, update.category_id, update.title)
+
     # OVERRIDE
 
     @override
@@ -154,10 +186,233 @@ class AluTwitchClient(twitchio.AutoClient):
         """Get Irene's channel from the cache."""
         return self.create_partialuser(const.TwitchID.Me)
 
-    async def fetch_streamer(self, twitch_id: str) -> Streamer:
-        user = await self.create_partialuser(twitch_id).user()
-        stream = next(iter(await self.fetch_streams(user_ids=[twitch_id])), None)  # None if offline
-        return Streamer(self, user, stream)
+    async def fetch_streamer(self, twitch_id: str) -> Streamer | None:
+        """Get the streamer through the short-lived cache of `StreamerResolver`. `None` if Helix doesn't know them."""
+        return await self.streamers.get(twitch_id)
+
+
+class LiveStream(NamedTuple):
+    twitch_id: str
+    game_id: str
+    title: str
+
+
+class LiveStreamRegistry:
+    """In-memory registry of currently live FPC streamers.
+
+    FPC notifications need to know which of the tracked streamers are live (and in which category)
+    every minute. Instead of a Helix round-trip each tick, the registry is fed by EventSub
+    `stream.online`, `stream.offline` and `channel.update` events for every streamer from `{dota,lol}_players`.
+    A periodic reconciliation sweep subscribes newly added streamers and corrects the state
+    in case some events were missed (i.e. during reconnects).
+
+    Attributes
+    ----------
+    streams: dict[str, LiveStream]
+        Mapping `twitch_id -> LiveStream` for tracked streamers that are currently live.
+    tracked: set[str]
+        Twitch IDs that we have EventSub subscriptions for.
+    ready: asyncio.Event
+        Set once the first reconciliation sweep succeeded. Until then `get_live` falls back to Helix.
+    """
+
+    def __init__(self, bot: AluBot, twitch: AluTwitchClient) -> None:
+        self.bot: AluBot = bot
+        self.twitch: AluTwitchClient = twitch
+        self.streams: dict[str, LiveStream] = {}
+        self.tracked: set[str] = set()
+        self.ready: asyncio.Event = asyncio.Event()
+        self._sweep_events: dict[str, LiveStream | None] | None = None
+        """Events that arrived while a reconciliation sweep is in progress, `None` stands for offline."""
+
+    def start(self) -> None:
+        self.reconcile.start()
+
+    def close(self) -> None:
+        self.reconcile.cancel()
+
+    async def add(self, broadcaster: twitchio.PartialUser) -> None:
+        """Stream went live. `stream.online` event doesn't have the category so we have to fetch it."""
+        if broadcaster.id not in self.tracked:
+            return
+        channel_info = await broadcaster.fetch_channel_info()
+        self.set(broadcaster.id, LiveStream(broadcaster.id, channel_info.game_id, channel_info.title))
+
+    def remove(self, twitch_id: str) -> None:
+        """Stream went offline."""
+        self.set(twitch_id, None)
+
+    def update(self, twitch_id: str, game_id: str, title: str) -> None:
+        """Streamer changed the category or the title. Only matters if they are live."""
+        if twitch_id in self.streams:
+            self.set(twitch_id, LiveStream(twitch_id, game_id, title))
+
+    def set(self, twitch_id: str, stream: LiveStream | None) -> None:
+        """Apply the event to the registry and remember it if a sweep is in progress, so the sweep doesn't undo it."""
+        if stream is None:
+            self.streams.pop(twitch_id, None)
+        else:
+            self.streams[twitch_id] = stream
+        if self._sweep_events is not None:
+            self._sweep_events[twitch_id] = stream
+
+    async def fetch_live(self, twitch_ids: list[str]) -> dict[str, LiveStream]:
+        """Ask Helix which of `twitch_ids` are live right now."""
+        streams: dict[str, LiveStream] = {}
+        for start in range(0, len(twitch_ids), HELIX_MAX_IDS):
+            for stream in await self.twitch.fetch_streams(user_ids=twitch_ids[start : start + HELIX_MAX_IDS]):
+                streams[stream.user.id] = LiveStream(stream.user.id, stream.game_id or "", stream.title)
+        return streams
+
+    async def get_live(self, twitch_ids: Iterable[str], game_id: str) -> dict[str, LiveStream]:
+        """Get those `twitch_ids` that are currently live in the category `game_id`.
+
+        If the registry isn't ready (i.e. the first sweep failed because Helix or the database were down at startup),
+        Helix is asked directly so the notifications aren't blocked until the next successful sweep.
+        """
+        twitch_ids = list(twitch_ids)
+        if self.ready.is_set():
+            streams = self.streams
+        else:
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout=REGISTRY_READY_TIMEOUT)
+            except TimeoutError:
+                log.warning("Live stream registry is not ready, asking Helix directly.")
+                streams = await self.fetch_live(twitch_ids)
+            else:
+                streams = self.streams
+        return {
+            twitch_id: stream for twitch_id in twitch_ids if (stream := streams.get(twitch_id)) and stream.game_id == game_id
+        }
+
+    async def subscribe(self, twitch_ids: list[str]) -> None:
+        """Subscribe to stream online/offline and channel update events for `twitch_ids`."""
+        subscriptions: list[twitchio.eventsub.SubscriptionPayload] = []
+        for twitch_id in twitch_ids:
+            subscriptions.extend(
+                [
+                    eventsub.StreamOnlineSubscription(broadcaster_user_id=twitch_id),
+                    eventsub.StreamOfflineSubscription(broadcaster_user_id=twitch_id),
+                    eventsub.ChannelUpdateSubscription(broadcaster_user_id=twitch_id),
+                ]
+            )
+        # already existing subscriptions (i.e. from the previous run) simply error out with 409 Conflict
+        await self.twitch.multi_subscribe(subscriptions, stop_on_error=False)
+        self.tracked.update(twitch_ids)
+
+    @aluloop(minutes=10)
+    async def reconcile(self) -> None:
+        """Reconciliation sweep: subscribe new streamers and re-sync the live state with Helix.
+
+        EventSub events that arrive during the sweep are newer than (or as new as) the Helix snapshot,
+        so they are replayed on top of it instead of being overwritten.
+        """
+        query = "SELECT twitch_id FROM dota_players UNION SELECT twitch_id FROM lol_players"
+        twitch_ids: list[str] = [twitch_id for (twitch_id,) in await self.bot.pool.fetch(query)]
+
+        if new_twitch_ids := [twitch_id for twitch_id in twitch_ids if twitch_id not in self.tracked]:
+            await self.subscribe(new_twitch_ids)
+
+        sweep_events: dict[str, LiveStream | None] = {}
+        self._sweep_events = sweep_events
+        try:
+            streams = await self.fetch_live(twitch_ids)
+        finally:
+            self._sweep_events = None
+
+        for twitch_id, stream in sweep_events.items():
+            if stream is None:
+                streams.pop(twitch_id, None)
+            else:
+                streams[twitch_id] = stream
+
+        if self.ready.is_set() and streams.keys() != self.streams.keys():
+            log.info(
+                "Live stream registry drifted from Helix: missed online %s, missed offline %s",
+                streams.keys() - self.streams.keys(),
+                self.streams.keys() - streams.keys(),
+            )
+        self.streams = streams
+        self.ready.set()
+
+
+class StreamerResolver:
+    """Batched and cached `Streamer` resolution.
+
+    A burst of FPC notifications used to cost 2-3 sequential Helix requests per notification
+    (user, stream and the latest VOD). Instead, the cogs `prefetch` all twitch IDs of a tick at once:
+    users and streams are requested with single multi-ID calls and the results are kept for `STREAMER_CACHE_TTL`.
+
+    Notes
+    -----
+    * Helix `/videos` only accepts a single `user_id`, so VOD lookups can't be merged into one request.
+        They are done concurrently and only for streamers who are live (offline ones don't get the VOD link anyway).
+    * Helix silently omits users it doesn't know (banned, deleted accounts). Those are cached as `None`
+        for the TTL too, so they don't cost a request per notification.
+    """
+
+    def __init__(self, twitch: AluTwitchClient, *, ttl: float = STREAMER_CACHE_TTL) -> None:
+        self.twitch: AluTwitchClient = twitch
+        self.ttl: float = ttl
+        self._streamers: dict[str, tuple[float, Streamer | None]] = {}
+        self._videos: dict[str, tuple[float, twitchio.Video | None]] = {}
+
+    def is_fresh(self, fetched_at: float) -> bool:
+        return time.monotonic() - fetched_at < self.ttl
+
+    async def fetch_video(self, twitch_id: str) -> None:
+        video = next(iter(await self.twitch.fetch_videos(user_id=twitch_id, period="day")), None)
+        self._videos[twitch_id] = time.monotonic(), video
+
+    def evict(self) -> None:
+        """Drop expired streamers and VODs so the caches don't grow with every streamer ever resolved."""
+        for cache in (self._streamers, self._videos):
+            for twitch_id in [twitch_id for twitch_id, (fetched_at, _) in cache.items() if not self.is_fresh(fetched_at)]:
+                del cache[twitch_id]
+
+    async def prefetch(self, twitch_ids: Iterable[str]) -> None:
+        """Resolve all `twitch_ids` that are not in the cache with as few requests as possible."""
+        self.evict()
+        missing = list(
+            {twitch_id for twitch_id in twitch_ids if not ((c := self._streamers.get(twitch_id)) and self.is_fresh(c[0]))}
+        )
+        if not missing:
+            return
+
+        live_ids: list[str] = []
+        for start in range(0, len(missing), HELIX_MAX_IDS):
+            chunk = missing[start : start + HELIX_MAX_IDS]
+            users, streams = await asyncio.gather(
+                self.twitch.fetch_users(ids=chunk),
+                self.twitch.fetch_streams(user_ids=chunk),
+            )
+            streams_by_id = {stream.user.id: stream for stream in streams}
+            fetched_at = time.monotonic()
+            for user in users:
+                stream = streams_by_id.get(user.id)
+                self._streamers[user.id] = fetched_at, Streamer(self.twitch, user, stream)
+                if stream:
+                    live_ids.append(user.id)
+            for twitch_id in set(chunk).difference(user.id for user in users):
+                log.warning("Twitch user %s is not known to Helix (banned or deleted?)", twitch_id)
+                self._streamers[twitch_id] = fetched_at, None
+
+        await asyncio.gather(*(self.fetch_video(twitch_id) for twitch_id in live_ids))
+        log.debug("Resolved %s streamers (%s live)", len(missing), len(live_ids))
+
+    async def get(self, twitch_id: str) -> Streamer | None:
+        """Get the streamer, resolving it if it's not in the cache. `None` if Helix doesn't know the user."""
+        await self.prefetch([twitch_id])
+        return self._streamers[twitch_id][1]
+
+    async def latest_video(self, twitch_id: str) -> tuple[twitchio.Video | None, float]:
+        """Get the latest VOD of the streamer from today and the age (in seconds) of that info."""
+        cached = self._videos.get(twitch_id)
+        if not (cached and self.is_fresh(cached[0])):
+            await self.fetch_video(twitch_id)
+            cached = self._videos[twitch_id]
+        fetched_at, video = cached
+        return video, time.monotonic() - fetched_at
 
 
 # class AluComponent(commands.Component):
@@ -239,11 +494,12 @@ class Streamer:
 
     async def vod_link(self, *, seconds_ago: int = 0, markdown: bool = True) -> str:
         """Get latest vod link, timestamped to timedelta ago."""
-        video = next(iter(await self._twitch.fetch_videos(user_id=self.id, period="day")), None)
+        video, age = await self._twitch.streamers.latest_video(self.id)
         if not video:
             return ""
 
-        duration = fmt.hms_to_seconds(video.duration)
+        # the vod kept growing while the video info was sitting in the cache
+        duration = fmt.hms_to_seconds(video.duration) + int(age)
         new_hms = fmt.divmod_timedelta(duration - seconds_ago)
         url = f"{video.url}?t={new_hms}"
         return f"/[VOD]({url})" if markdown else url